@@ -0,0 +1,70 @@
+'''
+libChEBIpy (c) University of Manchester 2015-2020
+
+libChEBIpy is licensed under the MIT License.
+
+To view a copy of this license, visit <http://opensource.org/licenses/MIT/>.
+
+@author:  neilswainston
+
+Benchmarks bulk annotation of a file of ChEBI ids with annotate, in one
+process and across workers, against a ChebiEntity per row, over synthetic
+flat files (see bench_server).
+
+    python -m benchmarks.bench_annotate [rows] [compounds]
+'''
+import io
+import random
+import sys
+import time
+
+from libchebipy import ChebiEntity
+from libchebipy._annotate import annotate
+from libchebipy._parsers.filesystem import FileSystemCache
+
+from benchmarks.bench_server import _write_files
+
+
+def _annotate_per_row(infile, outfile, parser):
+    '''Annotates each row through a ChebiEntity of its own.'''
+    outfile.write(next(infile).rstrip('\n') + '\tname\tformula\tmass\n')
+
+    for line in infile:
+        entity = ChebiEntity(line.strip(), parser=parser)
+        outfile.write('%s\t%s\t%s\t%s\n' % (line.strip(), entity.get_name(),
+                                            entity.get_formula(),
+                                            entity.get_mass()))
+
+
+def main(args):
+    '''main method'''
+    rows = int(args[0]) if args else 200000
+    compounds = int(args[1]) if len(args) > 1 else 50000
+    parser = FileSystemCache(download_dir=_write_files(compounds),
+                             auto_update=False)
+    parser.load(['compounds', 'chemical_data', 'inchi'])
+
+    rand = random.Random(0)
+    data = 'compound\n' + ''.join('%d\n' % rand.randint(1, compounds)
+                                  for _ in range(rows))
+
+    runs = [('entity per row',
+             lambda infile, outfile: _annotate_per_row(infile, outfile,
+                                                       parser))]
+
+    for processes in [1, 4]:
+        runs.append(('annotate x%d' % processes,
+                     lambda infile, outfile, processes=processes: annotate(
+                         infile, outfile, parser,
+                         fields=['name', 'formula', 'mass'],
+                         processes=processes)))
+
+    for name, run in runs:
+        start = time.perf_counter()
+        run(io.StringIO(data), io.StringIO())
+        secs = time.perf_counter() - start
+        print('%-15s %8.2f s %10.0f rows/s' % (name, secs, rows / secs))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
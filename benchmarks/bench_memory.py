@@ -0,0 +1,124 @@
+'''
+libChEBIpy (c) University of Manchester 2015-2020
+
+libChEBIpy is licensed under the MIT License.
+
+To view a copy of this license, visit <http://opensource.org/licenses/MIT/>.
+
+@author:  neilswainston
+
+Reports the memory held by each table attribute and reverse index (see
+ParserBase.memory_report) over synthetic flat files of compounds, as dicts
+and as packed tables. With a history file, each run is appended to it as a
+JSON line and compared with the last run of the same size: attributes that
+have grown by more than the tolerance are reported as regressions, and the
+exit status is 1.
+
+    python -m benchmarks.bench_memory [--compounds N] [--history FILE]
+        [--tolerance FRACTION]
+'''
+import argparse
+import io
+import json
+import os.path
+import sys
+import time
+
+from benchmarks.bench_server import _write_files
+from libchebipy._parsers.filesystem import FileSystemCache
+
+_TABLES = ['compounds', 'chemical_data', 'names', 'database_accessions',
+           'relation', 'inchi', 'structures']
+
+
+def _get_sizes(download_dir, packed):
+    '''Returns a dict of attribute (or index) name to bytes held, with all
+    tables and indexes loaded.'''
+    parser = FileSystemCache(download_dir=download_dir, auto_update=False,
+                             packed=packed)
+    parser.load(_TABLES)
+
+    if not packed:
+        parser.get_ids_by_name('')
+        parser.get_ids_by_mass(0, 0)
+        parser.get_ids_by_accession('')
+
+    report = parser.memory_report()
+    sizes = {}
+
+    for table in report['tables'].values():
+        for attr, attribute in table['attributes'].items():
+            sizes[attr] = attribute['size']
+
+    for attr, index in report['indexes'].items():
+        sizes['index' + attr] = index['size']
+
+    sizes['total'] = report['total']
+    return sizes
+
+
+def _get_last_run(history, compounds):
+    '''Returns the last run in history with compounds, or None'''
+    last_run = None
+
+    if os.path.exists(history):
+        with io.open(history, encoding='utf-8') as history_file:
+            for line in history_file:
+                run = json.loads(line)
+
+                if run['compounds'] == compounds:
+                    last_run = run
+
+    return last_run
+
+
+def main():
+    '''main method'''
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--compounds', type=int, default=100000)
+    arg_parser.add_argument('--history')
+    arg_parser.add_argument('--tolerance', type=float, default=0.05)
+    args = arg_parser.parse_args()
+
+    download_dir = _write_files(args.compounds)
+    run = {'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+           'compounds': args.compounds,
+           'dict': _get_sizes(download_dir, False),
+           'packed': _get_sizes(download_dir, True)}
+
+    print('%-26s %12s %12s' % ('attribute', 'dict MB', 'packed MB'))
+
+    for attr, size in sorted(run['dict'].items(), key=lambda item: item[1]):
+        packed_size = run['packed'].get(attr)
+        print('%-26s %12.2f %12s' %
+              (attr, size / 1e6,
+               '' if packed_size is None else '%.2f' % (packed_size / 1e6)))
+
+    if args.history is None:
+        return 0
+
+    last_run = _get_last_run(args.history, args.compounds)
+    regressions = []
+
+    if last_run is not None:
+        for representation in ('dict', 'packed'):
+            for attr, size in run[representation].items():
+                last_size = last_run[representation].get(attr)
+
+                if last_size and size > last_size * (1 + args.tolerance):
+                    regressions.append((representation, attr, last_size,
+                                        size))
+
+    with io.open(args.history, 'a', encoding='utf-8') as history_file:
+        history_file.write(json.dumps(run, sort_keys=True) + '\n')
+
+    for representation, attr, last_size, size in regressions:
+        print('REGRESSION %s %s: %d -> %d bytes (%+.1f%%)' %
+              (representation, attr, last_size, size,
+               (size / last_size - 1) * 100))
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,102 @@
+'''
+libChEBIpy (c) University of Manchester 2015-2020
+
+libChEBIpy is licensed under the MIT License.
+
+To view a copy of this license, visit <http://opensource.org/licenses/MIT/>.
+
+@author:  neilswainston
+
+Benchmarks holding default mol blocks in memory: raw strings in a dict,
+against a MolStore compressed per block without and with a trained preset
+dictionary. Reports memory held and the time to read random blocks, over
+synthetic V2000 mol blocks.
+
+    python -m benchmarks.bench_mol_store [compounds]
+'''
+import gc
+import random
+import sys
+import time
+import tracemalloc
+
+from libchebipy import Structure
+from libchebipy._parsers.molstore import MolStore
+
+_ELEMENTS = ['C', 'C', 'C', 'C', 'O', 'O', 'N', 'S', 'P', 'Cl']
+
+
+def _get_mol(rand):
+    '''Returns a random V2000 mol block, in the layout of ChEBI's.'''
+    atoms = rand.randint(3, 60)
+    bonds = [(idx, rand.randint(1, idx - 1)) for idx in range(2, atoms + 1)]
+    lines = ['',
+             '  Marvin  %02d%02d%02d%02d%02d2D' %
+             (rand.randint(1, 12), rand.randint(1, 28), rand.randint(0, 20),
+              rand.randint(0, 23), rand.randint(0, 59)),
+             '',
+             '%3d%3d  0  0  0  0            999 V2000' % (atoms, len(bonds))]
+
+    for _ in range(atoms):
+        lines.append('%10.4f%10.4f%10.4f %-3s 0  0  0  0  0  0  0  0  0  0'
+                     '  0  0' % (rand.uniform(-10, 10), rand.uniform(-10, 10),
+                                 0, rand.choice(_ELEMENTS)))
+
+    for first, second in bonds:
+        lines.append('%3d%3d%3d  0  0  0  0' %
+                     (first, second, rand.choice([1, 1, 1, 2])))
+
+    lines.append('M  END')
+    return '\n'.join(lines) + '\n'
+
+
+def _iter_mols(compounds):
+    '''Yields (ChEBI id, Structure) of the same random mol blocks on each
+    call, so that each store holds blocks of its own.'''
+    rand = random.Random(0)
+
+    for chebi_id in range(compounds):
+        yield chebi_id, Structure(_get_mol(rand), Structure.mol, 2)
+
+
+def _measure(build):
+    '''Returns (result of build, bytes allocated by it).'''
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def main(args):
+    '''main method'''
+    compounds = int(args[0]) if args else 100000
+    rand = random.Random(1)
+    lookups = [rand.randrange(compounds) for _ in range(100000)]
+
+    runs = [('raw strings',
+             lambda: {chebi_id: structure.get_structure()
+                      for chebi_id, structure in _iter_mols(compounds)},
+             lambda store, chebi_id: Structure(store[chebi_id],
+                                               Structure.mol, 2)),
+            ('zlib', lambda: MolStore.build(_iter_mols(compounds),
+                                            dict_size=0),
+             MolStore.get),
+            ('zlib + dict', lambda: MolStore.build(_iter_mols(compounds)),
+             MolStore.get)]
+
+    for name, build, get in runs:
+        store, size = _measure(build)
+        start = time.perf_counter()
+
+        for chebi_id in lookups:
+            get(store, chebi_id)
+
+        get_secs = time.perf_counter() - start
+        print('%-12s %8.1f MB  get %6.2f us' %
+              (name, size / 1e6, get_secs * 1e6 / len(lookups)))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
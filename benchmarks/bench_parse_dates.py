@@ -0,0 +1,111 @@
+'''
+libChEBIpy (c) University of Manchester 2015-2020
+
+libChEBIpy is licensed under the MIT License.
+
+To view a copy of this license, visit <http://opensource.org/licenses/MIT/>.
+
+@author:  neilswainston
+
+Benchmarks parsing compounds and comments with dates kept raw, against
+parsing every date with strptime as rows are read (as previously), and
+filtering compounds by modified on date with get_modified_since, against
+calling get_modified_on for every compound.
+
+    python -m benchmarks.bench_parse_dates [rows]
+'''
+import datetime
+import gzip
+import os.path
+import sys
+import tempfile
+import timeit
+
+from libchebipy._parsers.filesystem import FileSystemCache
+
+
+class _EagerCache(FileSystemCache):
+    '''FileSystemCache that parses dates as rows are read.'''
+
+    def _add_comments(self, tokens):
+        '''Adds a row of comments.tsv, parsing its date.'''
+        super()._add_comments(tokens)
+        datetime.datetime.strptime(tokens[2], '%Y-%M-%d')
+
+    def _add_compounds(self, tokens):
+        '''Adds a row of compounds.tsv, parsing its date.'''
+        super()._add_compounds(tokens)
+        chebi_id = int(tokens[0])
+        self._MODIFIED_ONS[chebi_id] = datetime.datetime.strptime(
+            tokens[7], '%Y-%m-%d')
+
+
+def _write_files(rows):
+    '''Writes compounds and comments files of rows, returning their
+    directory.'''
+    directory = tempfile.mkdtemp()
+
+    with gzip.open(os.path.join(directory, 'compounds.tsv.gz'),
+                   'wt') as compounds:
+        compounds.write('ID\tSTATUS\tCHEBI_ACCESSION\tSOURCE\tPARENT_ID\tNAME'
+                        '\tDEFINITION\tMODIFIED_ON\tCREATED_BY\tSTAR\n')
+
+        for idx in range(rows):
+            compounds.write('%d\tC\tCHEBI:%d\tChEBI\tnull\tcompound %d\tnull'
+                            '\t%s\tCHEBI\t3\n' % (idx, idx, idx,
+                                                   _get_date(idx)))
+
+    with open(os.path.join(directory, 'comments.tsv'), 'w') as comments:
+        comments.write('ID\tCOMPOUND_ID\tCREATED_ON\tDATATYPE\tDATATYPE_ID'
+                       '\tTEXT\n')
+
+        for idx in range(rows):
+            comments.write('%d\t%d\t%s\tGeneral\t%d\tComment %d\n' %
+                           (idx, idx, _get_date(idx), idx, idx))
+
+    return directory
+
+
+def _get_date(idx):
+    '''Returns a yyyy-mm-dd date for row idx.'''
+    return '%04d-%02d-%02d' % (2000 + idx % 20, 1 + idx % 12, 1 + idx % 28)
+
+
+def _time(func):
+    '''Returns the best of three timings of func, in seconds.'''
+    return min(timeit.repeat(func, number=1, repeat=3))
+
+
+def main(args):
+    '''main method'''
+    rows = int(args[0]) if args else 200000
+    directory = _write_files(rows)
+    since = datetime.date(2018, 1, 1)
+
+    for name, cls in [('raw dates', FileSystemCache),
+                      ('strptime', _EagerCache)]:
+        def _parse(cls=cls):
+            parser = cls(download_dir=directory, auto_update=False)
+            parser.load(['compounds', 'comments'])
+
+        print('%-26s %8.3f s' % ('parse, ' + name, _time(_parse)))
+
+    for packed in [False, True]:
+        parser = FileSystemCache(download_dir=directory, auto_update=False,
+                                 packed=packed)
+        parser.load(['compounds'])
+        name = 'packed' if packed else 'dict'
+
+        print('%-26s %8.3f s' % ('get_modified_since, ' + name,
+                                 _time(lambda: parser.get_modified_since(
+                                     since))))
+        print('%-26s %8.3f s' % ('get_modified_on, ' + name,
+                                 _time(lambda: [
+                                     chebi_id for chebi_id in range(rows)
+                                     if parser.get_modified_on(chebi_id) and
+                                     parser.get_modified_on(chebi_id).date()
+                                     >= since])))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,109 @@
+'''
+libChEBIpy (c) University of Manchester 2015-2020
+
+libChEBIpy is licensed under the MIT License.
+
+To view a copy of this license, visit <http://opensource.org/licenses/MIT/>.
+
+@author:  neilswainston
+
+Benchmarks bytes transferred from object storage by get_mol and
+get_references, reading by range with an offset index against downloading
+whole flat files, over a local fake object store.
+
+    python -m benchmarks.bench_ranged_reads [compounds]
+'''
+import gzip
+import os.path
+import random
+import sys
+import tempfile
+import time
+
+from libchebipy._parsers.googlestorage import BLOB_METADATA, \
+    GoogleStorageCache
+from libchebipy.test.fake_storage import FakeClient
+
+_MOL = '''"
+  Marvin  01211112152D
+
+  3  2  0  0  0  0            999 V2000
+   -0.4125    0.7145    0.0000 H   0  0  0  0  0  0  0  0  0  0  0  0
+    0.0000    0.0000    0.0000 O   0  0  0  0  0  0  0  0  0  0  0  0
+   -0.4125   -0.7145    0.0000 H   0  0  0  0  0  0  0  0  0  0  0  0
+  2  1  1  0  0  0  0
+  2  3  1  0  0  0  0
+M  END
+",mol,2D,Y,N'''
+
+
+def _write_files(compounds):
+    '''Writes structures and reference files of compounds, returning their
+    directory.'''
+    directory = tempfile.mkdtemp()
+
+    with gzip.open(os.path.join(directory, 'structures.csv.gz'),
+                   'wt') as structures:
+        structures.write('ID,COMPOUND_ID,STRUCTURE,TYPE,DIMENSION,'
+                         'DEFAULT_STRUCTURE,AUTOGEN_STRUCTURE\n')
+
+        for chebi_id in range(compounds):
+            structures.write('%d,%d,%s\n' % (chebi_id * 2, chebi_id, _MOL))
+            structures.write('%d,%d,InChIKey%d,InChIKey,1D,N,N\n' %
+                             (chebi_id * 2 + 1, chebi_id, chebi_id))
+
+    with gzip.open(os.path.join(directory, 'reference.tsv.gz'),
+                   'wt') as references:
+        references.write('COMPOUND_ID\tREFERENCE_ID\tREFERENCE_DB_NAME'
+                         '\tLOCATION_IN_REF\tREFERENCE_NAME\n')
+
+        for chebi_id in range(compounds):
+            for idx in range(3):
+                references.write('%d\t%d\tPubMed\t\tReference %d\n' %
+                                 (chebi_id, chebi_id * 3 + idx, idx))
+
+    return directory
+
+
+def main(args):
+    '''main method'''
+    compounds = int(args[0]) if args else 100000
+    lookups = 100
+    client = FakeClient()
+    client.put_directory('bucket', _write_files(compounds))
+    chebi_ids = random.Random(0).sample(range(compounds), lookups)
+
+    for name, indexed in [('whole files', False), ('ranged reads', True)]:
+        if indexed:
+            GoogleStorageCache(auto_update=False, client=client,
+                               bucket_name='bucket').publish_indexed_files()
+
+        BLOB_METADATA.invalidate()
+        parser = GoogleStorageCache(auto_update=False, client=client,
+                                    bucket_name='bucket')
+        client.bytes_downloaded = 0
+        start = time.perf_counter()
+
+        # The first lookup downloads whole files, or offset indexes:
+        parser.get_mol(chebi_ids[0])
+        parser.get_references([chebi_ids[0]])
+        first_bytes = client.bytes_downloaded
+        first_secs = time.perf_counter() - start
+
+        client.bytes_downloaded = 0
+        start = time.perf_counter()
+
+        for chebi_id in chebi_ids[1:]:
+            parser.get_mol(chebi_id)
+            parser.get_references([chebi_id])
+
+        secs = time.perf_counter() - start
+        print('%-14s first %10d bytes %8.1f ms   then %8.0f bytes %8.1f ms'
+              ' per lookup' %
+              (name, first_bytes, first_secs * 1000,
+               client.bytes_downloaded / (lookups - 1),
+               secs * 1000 / (lookups - 1)))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
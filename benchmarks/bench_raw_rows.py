@@ -0,0 +1,93 @@
+'''
+libChEBIpy (c) University of Manchester 2015-2020
+
+libChEBIpy is licensed under the MIT License.
+
+To view a copy of this license, visit <http://opensource.org/licenses/MIT/>.
+
+@author:  neilswainston
+
+Benchmarks loading names held as raw rows, with Name objects built by
+get_names, against building a Name for every row as it is read (as
+previously): load time, memory held by the table, and the time to read the
+names of a few thousand compounds.
+
+    python -m benchmarks.bench_raw_rows [rows]
+'''
+import gc
+import gzip
+import os.path
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from libchebipy import Name
+from libchebipy._parsers.filesystem import FileSystemCache
+
+
+class _EagerCache(FileSystemCache):
+    '''FileSystemCache that builds a Name for every row as it is read.'''
+
+    def _add_names(self, tokens):
+        '''Adds a row of names.tsv as a Name.'''
+        self._ALL_NAMES.setdefault(int(tokens[1]), []).append(
+            Name(tokens[4], tokens[2], tokens[3], tokens[5] == 'T',
+                 tokens[6]))
+
+    def get_names(self, chebi_id):
+        '''Returns names'''
+        self._load_table('names')
+        return self._ALL_NAMES.get(chebi_id, [])
+
+
+def _write_names(rows):
+    '''Writes a names file of rows, four per compound, returning its
+    directory.'''
+    directory = tempfile.mkdtemp()
+
+    with gzip.open(os.path.join(directory, 'names.tsv.gz'), 'wt') as names:
+        names.write('ID\tCOMPOUND_ID\tTYPE\tSOURCE\tNAME\tADAPTED'
+                    '\tLANGUAGE\n')
+
+        for idx in range(rows):
+            names.write('%d\t%d\tSYNONYM\tChEBI\tsynonym %d of compound %d'
+                        '\tF\ten\n' % (idx, idx // 4, idx % 4, idx // 4))
+
+    return directory
+
+
+def main(args):
+    '''main method'''
+    rows = int(args[0]) if args else 1000000
+    directory = _write_names(rows)
+
+    for name, cls in [('raw rows', FileSystemCache),
+                      ('objects', _EagerCache)]:
+        parser = cls(download_dir=directory, auto_update=False)
+        parser.get_file('names.tsv.gz')
+
+        start = time.perf_counter()
+        parser.load(['names'])
+        load_secs = time.perf_counter() - start
+
+        start = time.perf_counter()
+
+        for chebi_id in range(0, rows // 4, max(1, rows // 20000)):
+            parser.get_names(chebi_id)
+
+        get_secs = time.perf_counter() - start
+
+        parser = cls(download_dir=directory, auto_update=False)
+        gc.collect()
+        tracemalloc.start()
+        parser.load(['names'])
+        table_mb = tracemalloc.get_traced_memory()[0] / 2 ** 20
+        tracemalloc.stop()
+
+        print('%-10s load %7.3f s %8.1f MB   get 5000 ids %7.3f s' %
+              (name, load_secs, table_mb, get_secs))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
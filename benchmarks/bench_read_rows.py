@@ -0,0 +1,88 @@
+'''
+libChEBIpy (c) University of Manchester 2015-2020
+
+libChEBIpy is licensed under the MIT License.
+
+To view a copy of this license, visit <http://opensource.org/licenses/MIT/>.
+
+@author:  neilswainston
+
+Benchmarks reading a names flat file with a few rows in legacy encodings:
+the single-pass byte reader against decoding the whole file as cp1252, and
+against the former UTF-8 reader that restarted as latin-1 on the first
+UnicodeDecodeError.
+
+    python -m benchmarks.bench_read_rows [rows]
+'''
+import io
+import os.path
+import sys
+import tempfile
+import timeit
+
+from libchebipy._parsers.base import _read_rows
+
+
+def _write_names(rows):
+    '''Writes a names file of rows, with one in 10,000 of the second half in
+    cp1252, returning its path.'''
+    filepath = os.path.join(tempfile.mkdtemp(), 'names.tsv')
+
+    with open(filepath, 'wb') as names_file:
+        names_file.write(b'ID\tCOMPOUND_ID\tTYPE\tSOURCE\tNAME\tADAPTED\t'
+                         b'LANGUAGE\n')
+
+        for idx in range(rows):
+            name = 'α-synonym %d' % idx if idx % 3 else 'synonym %d' % idx
+            encoding = 'utf-8'
+
+            if idx >= rows // 2 and idx % 10000 == 9999:
+                name = 'synonyme é %d' % idx
+                encoding = 'cp1252'
+
+            names_file.write(('%d\t%d\tSYNONYM\tChEBI\t%s\tF\ten\n' %
+                              (idx, idx // 4, name)).encode(encoding))
+
+    return filepath
+
+
+def _read_cp1252(filepath):
+    '''Reads the file as cp1252 text, as the previous reader did.'''
+    with io.open(filepath, 'r', encoding='cp1252') as textfile:
+        next(textfile)
+        return [line.strip().split('\t') for line in textfile]
+
+
+def _read_restart(filepath):
+    '''Reads the file as UTF-8, restarting as latin-1 on a decoding error, as
+    the legacy reader did (without its duplicated rows).'''
+    for encoding in ['utf-8', 'latin-1']:
+        rows = []
+
+        try:
+            with io.open(filepath, 'r', encoding=encoding) as textfile:
+                next(textfile)
+
+                for line in textfile:
+                    rows.append(line.strip().split('\t'))
+
+            return rows
+        except UnicodeDecodeError:
+            continue
+
+
+def main(args):
+    '''main method'''
+    rows = int(args[0]) if args else 1000000
+    filepath = _write_names(rows)
+
+    for name, reader in [('single pass', lambda: list(_read_rows(filepath,
+                                                                 '\t'))),
+                         ('cp1252 text', lambda: _read_cp1252(filepath)),
+                         ('utf-8, restart', lambda: _read_restart(filepath))]:
+        secs = min(timeit.repeat(reader, number=1, repeat=3))
+        print('%-16s %8.3f s %12.0f rows/s' % (name, secs, rows / secs))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,170 @@
+'''
+libChEBIpy (c) University of Manchester 2015-2020
+
+libChEBIpy is licensed under the MIT License.
+
+To view a copy of this license, visit <http://opensource.org/licenses/MIT/>.
+
+@author:  neilswainston
+
+Load tests the HTTP lookup server: concurrent clients POST batches to each
+endpoint, and throughput and latency percentiles are reported. Without a
+URL, a server is started over synthetic flat files of compounds. With hot,
+all clients request the same batch, so that lookups are coalesced.
+
+    python -m benchmarks.bench_server [url] [--clients N] [--requests N]
+        [--batch N] [--compounds N] [--hot]
+'''
+import argparse
+import gzip
+import json
+import os.path
+import random
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from libchebipy._parsers.filesystem import FileSystemCache
+from libchebipy._server import make_server
+
+
+def _write_files(compounds):
+    '''Writes the flat files read by the server's lookups, returning their
+    directory.'''
+    directory = tempfile.mkdtemp()
+    files = {
+        'compounds.tsv.gz': ['ID\tSTATUS\tCHEBI_ACCESSION\tSOURCE\tPARENT_ID'
+                             '\tNAME\tDEFINITION\tMODIFIED_ON\tCREATED_BY'
+                             '\tSTAR'],
+        'chemical_data.tsv': ['ID\tCOMPOUND_ID\tSOURCE\tTYPE\tCHEMICAL_DATA'],
+        'names.tsv.gz': ['ID\tCOMPOUND_ID\tTYPE\tSOURCE\tNAME\tADAPTED'
+                         '\tLANGUAGE'],
+        'database_accession.tsv': ['ID\tCOMPOUND_ID\tSOURCE\tTYPE'
+                                   '\tACCESSION_NUMBER'],
+        'relation.tsv': ['ID\tTYPE\tINIT_ID\tFINAL_ID\tSTATUS'],
+        'chebiId_inchi.tsv': ['CHEBI_ID\tInChI'],
+        'structures.csv.gz': ['ID,COMPOUND_ID,STRUCTURE,TYPE,DIMENSION,'
+                              'DEFAULT_STRUCTURE,AUTOGEN_STRUCTURE'],
+    }
+
+    for chebi_id in range(1, compounds + 1):
+        files['compounds.tsv.gz'].append(
+            '%d\tC\tCHEBI:%d\tChEBI\tnull\tcompound %d\tA compound.'
+            '\t2015-02-03\tCHEBI\t3' % (chebi_id, chebi_id, chebi_id))
+        files['chemical_data.tsv'].extend([
+            '%d\t%d\tChEBI\tFORMULA\tC%dH4' % (chebi_id * 2, chebi_id,
+                                               chebi_id),
+            '%d\t%d\tChEBI\tMASS\t%.5f' % (chebi_id * 2 + 1, chebi_id,
+                                            chebi_id * 1.5)])
+        files['names.tsv.gz'].append(
+            '%d\t%d\tSYNONYM\tChEBI\tsynonym %d\tF\ten' %
+            (chebi_id, chebi_id, chebi_id))
+        files['database_accession.tsv'].append(
+            '%d\t%d\tKEGG COMPOUND\tKEGG COMPOUND accession\tC%05d' %
+            (chebi_id, chebi_id, chebi_id))
+        files['relation.tsv'].append(
+            '%d\tis_a\t%d\t%d\tC' % (chebi_id, chebi_id // 2 or 1, chebi_id))
+        files['chebiId_inchi.tsv'].append('%d\tInChI=1S/C%dH4' %
+                                          (chebi_id, chebi_id))
+        files['structures.csv.gz'].append('%d,%d,C%d,SMILES,1D,N,N' %
+                                          (chebi_id, chebi_id, chebi_id))
+
+    for filename, lines in files.items():
+        data = ('\n'.join(lines) + '\n').encode('utf-8')
+        opener = gzip.open if filename.endswith('.gz') else open
+
+        with opener(os.path.join(directory, filename), 'wb') as flat_file:
+            flat_file.write(data)
+
+    return directory
+
+
+def _get_bodies(compounds, batch, rand):
+    '''Returns a request body of batch items for each endpoint.'''
+    chebi_ids = [rand.randint(1, compounds) for _ in range(batch)]
+    return {
+        '/entities': {'ids': chebi_ids},
+        '/names': {'names': ['synonym %d' % chebi_id
+                             for chebi_id in chebi_ids]},
+        '/mass': {'masses': [chebi_id * 1.5 for chebi_id in chebi_ids],
+                  'tolerance': 0.5},
+        '/xrefs': {'accessions': ['C%05d' % chebi_id
+                                  for chebi_id in chebi_ids]},
+        '/ancestors': {'ids': chebi_ids},
+    }
+
+
+def _post(url, body):
+    '''POSTs body, returning the number of results and seconds taken.'''
+    start = time.perf_counter()
+    request = urllib.request.Request(url, json.dumps(body).encode('utf-8'),
+                                     {'Content-Type': 'application/json'})
+
+    with urllib.request.urlopen(request) as response:
+        results = sum(1 for _ in response)
+
+    return results, time.perf_counter() - start
+
+
+def main():
+    '''main method'''
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('url', nargs='?')
+    arg_parser.add_argument('--clients', type=int, default=8)
+    arg_parser.add_argument('--requests', type=int, default=200)
+    arg_parser.add_argument('--batch', type=int, default=100)
+    arg_parser.add_argument('--compounds', type=int, default=100000)
+    arg_parser.add_argument('--hot', action='store_true')
+    args = arg_parser.parse_args()
+
+    server = None
+    url = args.url
+
+    if url is None:
+        parser = FileSystemCache(download_dir=_write_files(args.compounds),
+                                 auto_update=False)
+        parser.load(['compounds', 'chemical_data', 'names',
+                     'database_accessions', 'relation', 'inchi',
+                     'structures'])
+        server = make_server(parser, port=0)
+        url = 'http://%s:%d' % server.server_address[:2]
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    rand = random.Random(0)
+    hot = _get_bodies(args.compounds, args.batch, rand)
+
+    for endpoint in hot:
+        bodies = [hot[endpoint] if args.hot else
+                  _get_bodies(args.compounds, args.batch, rand)[endpoint]
+                  for _ in range(args.requests)]
+
+        # Warm up indexes:
+        _post(url + endpoint, bodies[0])
+
+        start = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=args.clients) as executor:
+            timings = list(executor.map(
+                lambda body, endpoint=endpoint: _post(url + endpoint, body),
+                bodies))
+
+        secs = time.perf_counter() - start
+        latencies = sorted(timing[1] for timing in timings)
+        results = sum(timing[0] for timing in timings)
+
+        print('%-11s %8.0f results/s %7.1f requests/s   p50 %7.1f ms'
+              '   p99 %7.1f ms' %
+              (endpoint, results / secs, len(bodies) / secs,
+               latencies[len(latencies) // 2] * 1000,
+               latencies[int(len(latencies) * 0.99)] * 1000))
+
+    if server is not None:
+        print('%d lookups coalesced' % server.service.get_coalesced())
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+'''
+libChEBIpy (c) University of Manchester 2015-2020
+
+libChEBIpy is licensed under the MIT License.
+
+To view a copy of this license, visit <http://opensource.org/licenses/MIT/>.
+
+@author:  neilswainston
+
+Benchmarks an incremental update of a names flat file with one changed row
+against a full load of the same file.
+
+    python -m benchmarks.bench_update [rows]
+'''
+import os.path
+import sys
+import tempfile
+import time
+
+from libchebipy._parsers.filesystem import FileSystemCache
+
+
+def _write_names(directory, rows, changed=None):
+    '''Writes a names file of rows, with the name of row changed (if any)
+    changed, returning its path.'''
+    filepath = os.path.join(directory, 'names.tsv')
+
+    with open(filepath, 'w') as names_file:
+        names_file.write('ID\tCOMPOUND_ID\tTYPE\tSOURCE\tNAME\tADAPTED'
+                         '\tLANGUAGE\n')
+
+        for idx in range(rows):
+            name = 'changed %d' % idx if idx == changed else 'synonym %d' % idx
+            names_file.write('%d\t%d\tSYNONYM\tChEBI\t%s\tF\ten\n' %
+                             (idx, idx // 4 + 1, name))
+
+    return filepath
+
+
+def _get_parser(directory):
+    '''Returns a parser reading names.tsv from directory.'''
+    parser = FileSystemCache(download_dir=directory, auto_update=False)
+    parser.get_file = lambda filename: os.path.join(directory, 'names.tsv')
+    return parser
+
+
+def main(args):
+    '''main method'''
+    rows = int(args[0]) if args else 400000
+    directory = tempfile.mkdtemp()
+    _write_names(directory, rows)
+
+    parser = _get_parser(directory)
+    start = time.perf_counter()
+    parser.load(['names'])
+    load_secs = time.perf_counter() - start
+
+    filepath = _write_names(directory, rows, rows // 2)
+    os.utime(filepath, (time.time() + 60, time.time() + 60))
+
+    start = time.perf_counter()
+    updated = parser.update()
+    update_secs = time.perf_counter() - start
+
+    print('%-8s %8.3f s' % ('load', load_secs))
+    print('%-8s %8.3f s (%d ids updated)' % ('update', update_secs,
+                                             updated['names']))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
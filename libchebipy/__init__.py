@@ -7,46 +7,57 @@ To view a copy of this license, visit <http://opensource.org/licenses/MIT/>.
 
 @author:  neilswainston
 '''
-import json
-
-import requests
-
 from ._chebi_entity import ChebiEntity
 from ._chebi_entity import ChebiException
+from ._chebi_entity import EntityCache
+from ._chebi_entity import register_parser
 from ._comment import Comment
 from ._compound_origin import CompoundOrigin
 from ._database_accession import DatabaseAccession
 from ._formula import Formula
+from ._lazy_entity import LazyChebiEntity
+from ._metrics import Metrics
 from ._name import Name
 from ._reference import Reference
 from ._relation import Relation
+from ._search import SearchClient
+from ._store import VersionedStore
 from ._structure import Structure
 
 
 __all__ = [
     "ChebiEntity",
     "ChebiException",
+    "EntityCache",
     "Comment",
     "CompoundOrigin",
     "DatabaseAccession",
     "Formula",
+    "LazyChebiEntity",
+    "Metrics",
     "Name",
     "Reference",
     "Relation",
+    "SearchClient",
     "Structure",
+    "VersionedStore",
+    "register_parser",
     "search",
 ]
 
 
-def search(term, exact=False, rows=1e6):
-    '''Searches ChEBI via ols.'''
-    term = term if exact else '"' + term + '"'
+__SEARCH_CLIENT = []
+
+
+def search(term, exact=False, rows=1e6, lazy=False):
+    '''Searches ChEBI via ols. If lazy, returns LazyChebiEntity handles
+    sharing one parser rather than fully built ChebiEntity objects.'''
+    if not __SEARCH_CLIENT:
+        __SEARCH_CLIENT.append(SearchClient())
 
-    url = 'https://www.ebi.ac.uk/ols/api/search?ontology=chebi' + \
-        '&exact=' + str(exact) + '&q=' + term + \
-        '&rows=' + str(int(rows))
+    obo_ids = __SEARCH_CLIENT[0].search(term, exact, rows)
 
-    response = requests.get(url)
-    data = response.json()
+    if lazy:
+        return LazyChebiEntity.from_ids(obo_ids)
 
-    return [ChebiEntity(doc['obo_id']) for doc in data['response']['docs']]
+    return [ChebiEntity(obo_id) for obo_id in obo_ids]
@@ -0,0 +1,173 @@
+'''
+libChEBIpy (c) University of Manchester 2015-2020
+
+libChEBIpy is licensed under the MIT License.
+
+To view a copy of this license, visit <http://opensource.org/licenses/MIT/>.
+
+@author:  neilswainston
+
+Command line interface:
+
+    python -m libchebipy serve [--host HOST] [--port PORT]
+    python -m libchebipy annotate [INPUT] [-o OUTPUT] [--column COLUMN]
+        [--key {id,name,inchikey}] [--processes N]
+    python -m libchebipy export [-o OUTPUT.sdf | --mol-dir DIR] [--ids-file F]
+'''
+import argparse
+import io
+import sys
+
+from ._chebi_entity import get_parser
+
+
+def _add_parser_args(arg_parser):
+    '''Adds arguments selecting the parser.'''
+    arg_parser.add_argument('--parser', default='filesystem',
+                            help='parser name (default: filesystem)')
+    arg_parser.add_argument('--download-dir', default=None,
+                            help='directory of downloaded flat files')
+    arg_parser.add_argument('--no-auto-update', dest='auto_update',
+                            action='store_false',
+                            help='use flat files already downloaded')
+
+
+def _serve(args):
+    '''Serves batch lookups over HTTP until interrupted.'''
+    from ._server import make_server
+
+    parser = get_parser(args.parser, args.download_dir, args.auto_update)
+
+    if args.preload:
+        parser.load()
+    elif args.warm_up:
+        parser.warm_up(args.warm_up.split(','))
+
+    server = make_server(parser, args.host, args.port, args.verbose)
+    print('Serving on http://%s:%d' % server.server_address[:2])
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def _annotate(args):
+    '''Annotates a tab delimited file, streaming rows to the output.'''
+    from ._annotate import annotate
+
+    parser = get_parser(args.parser, args.download_dir, args.auto_update)
+    column = int(args.column) if args.column.isdigit() else args.column
+    fields = args.fields.split(',') if args.fields else None
+
+    infile = sys.stdin if args.input == '-' else \
+        io.open(args.input, encoding='utf-8')
+    outfile = sys.stdout if args.output == '-' else \
+        io.open(args.output, 'w', encoding='utf-8')
+
+    try:
+        annotate(infile, outfile, parser, column, args.key, fields,
+                 not args.no_header, args.chunk_size, args.processes)
+    finally:
+        for stream in (infile, outfile):
+            if stream not in (sys.stdin, sys.stdout):
+                stream.close()
+
+
+def _export(args):
+    '''Exports default mol blocks as an SDF or a directory of mol files.'''
+    from ._export import export_mol_files, export_sdf
+
+    parser = get_parser(args.parser, args.download_dir, args.auto_update)
+    chebi_ids = None
+
+    if args.ids_file:
+        with io.open(args.ids_file, encoding='utf-8') as ids_file:
+            chebi_ids = [line.strip().replace('CHEBI:', '')
+                         for line in ids_file if line.strip()]
+
+    if args.mol_dir:
+        export_mol_files(args.mol_dir, parser, chebi_ids)
+        return
+
+    properties = args.properties.split(',') if args.properties else None
+    outfile = sys.stdout if args.output == '-' else \
+        io.open(args.output, 'w', encoding='utf-8')
+
+    try:
+        export_sdf(outfile, parser, chebi_ids, properties)
+    finally:
+        if outfile is not sys.stdout:
+            outfile.close()
+
+
+def _get_arg_parser():
+    '''Returns the parser of command line arguments.'''
+    arg_parser = argparse.ArgumentParser(prog='python -m libchebipy')
+    commands = arg_parser.add_subparsers(dest='command')
+    commands.required = True
+
+    serve = commands.add_parser('serve', help='serve batch lookups over HTTP')
+    _add_parser_args(serve)
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8080)
+    serve.add_argument('--preload', action='store_true',
+                       help='load all tables before serving')
+    serve.add_argument('--warm-up',
+                       help='comma separated tables to load in the '
+                       'background while serving')
+    serve.add_argument('--verbose', action='store_true',
+                       help='log each request')
+    serve.set_defaults(func=_serve)
+
+    annotate = commands.add_parser(
+        'annotate', help='annotate a tab delimited file of ids, names or '
+        'InChI keys')
+    _add_parser_args(annotate)
+    annotate.add_argument('input', nargs='?', default='-',
+                          help='input file (default: standard input)')
+    annotate.add_argument('-o', '--output', default='-',
+                          help='output file (default: standard output)')
+    annotate.add_argument('--column', default='0',
+                          help='index or header name of the key column')
+    annotate.add_argument('--key', default='id',
+                          choices=['id', 'name', 'inchikey'])
+    annotate.add_argument('--fields',
+                          help='comma separated annotations (default: '
+                          'chebi_id,name,formula,mass,charge,inchi,'
+                          'parent_id)')
+    annotate.add_argument('--no-header', action='store_true',
+                          help='input has no header line')
+    annotate.add_argument('--chunk-size', type=int, default=10000)
+    annotate.add_argument('--processes', type=int, default=1)
+    annotate.set_defaults(func=_annotate)
+
+    export = commands.add_parser(
+        'export', help='export default mol blocks as an SDF or mol files')
+    _add_parser_args(export)
+    export.add_argument('-o', '--output', default='-',
+                        help='SDF file (default: standard output)')
+    export.add_argument('--mol-dir',
+                        help='write a mol file per compound to this '
+                        'directory, in place of an SDF')
+    export.add_argument('--ids-file',
+                        help='file of ChEBI ids, one per line (default: all '
+                        'compounds)')
+    export.add_argument('--properties',
+                        help='comma separated SDF properties (default: '
+                        'name,formula,mass,inchi_key)')
+    export.set_defaults(func=_export)
+
+    return arg_parser
+
+
+def main(argv=None):
+    '''main method'''
+    args = _get_arg_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
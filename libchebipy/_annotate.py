@@ -0,0 +1,175 @@
+'''
+libChEBIpy (c) University of Manchester 2015-2020
+
+libChEBIpy is licensed under the MIT License.
+
+To view a copy of this license, visit <http://opensource.org/licenses/MIT/>.
+
+@author:  neilswainston
+'''
+import collections
+import itertools
+import math
+import multiprocessing
+
+from ._chebi_entity import ChebiEntity, ChebiException, get_parser
+
+# Annotations, by column name, read from the ChebiEntity of each row
+FIELDS = collections.OrderedDict([
+    ('chebi_id', ChebiEntity.get_id),
+    ('name', ChebiEntity.get_name),
+    ('formula', ChebiEntity.get_formula),
+    ('mass', ChebiEntity.get_mass),
+    ('charge', ChebiEntity.get_charge),
+    ('inchi', ChebiEntity.get_inchi),
+    ('parent_id', ChebiEntity.get_parent_id),
+])
+
+# Kinds of key an input column may hold
+KEYS = ['id', 'name', 'inchikey']
+
+# Annotations kept between chunks, by key, before the cache is cleared
+_CACHE_SIZE = 100000
+
+# The parser of worker processes, inherited when they are forked, and the
+# annotations each has cached
+_WORKER_PARSER = []
+_WORKER_CACHE = {}
+
+
+def annotate(infile, outfile, parser="filesystem", column=0, key='id',
+             fields=None, header=True, chunk_size=10000, processes=1):
+    '''Appends annotation fields (by default, all FIELDS) to each row of a
+    tab delimited text file, where column (an index, or a name if header)
+    holds a ChEBI id, name or InChI key, as key. Rows are read and written a
+    chunk at a time, so memory does not grow with the input. With more than
+    one process, chunks are annotated by forked workers, in order. Returns
+    the number of rows written.'''
+    fields = list(FIELDS) if fields is None else fields
+    unknown = set(fields) - set(FIELDS)
+
+    if unknown:
+        raise ValueError('Unknown fields: %s' % ', '.join(sorted(unknown)))
+
+    if key not in KEYS:
+        raise ValueError('Unknown key %s' % key)
+
+    parser = get_parser(parser)
+    lines = (line.rstrip('\r\n') for line in infile)
+
+    if header:
+        header_line = next(lines, '')
+
+        if not isinstance(column, int):
+            column = header_line.split('\t').index(column)
+
+        outfile.write('\t'.join([header_line] + fields) + '\n')
+
+    chunks = iter(lambda: list(itertools.islice(lines, chunk_size)), [])
+    args = (column, key, fields)
+    rows = 0
+
+    for chunk in _map_chunks(parser, chunks, args, processes):
+        outfile.write(chunk)
+        rows += chunk.count('\n')
+
+    return rows
+
+
+def _map_chunks(parser, chunks, args, processes):
+    '''Yields annotated chunks in order, keeping at most two chunks per
+    worker in flight.'''
+    if processes <= 1:
+        cache = {}
+
+        for chunk in chunks:
+            yield _annotate_chunk(parser, chunk, cache, *args)
+
+        return
+
+    # Load tables and indexes before forking, so workers share them:
+    parser.load(['compounds', 'chemical_data', 'inchi'])
+
+    if args[1] == 'name':
+        parser.get_ids_by_name('')
+    elif args[1] == 'inchikey':
+        parser.get_ids_by_inchi_key('')
+
+    _WORKER_PARSER[:] = [parser]
+
+    try:
+        with multiprocessing.get_context('fork').Pool(processes) as pool:
+            pending = collections.deque()
+
+            for chunk in chunks:
+                pending.append(pool.apply_async(_annotate_worker_chunk,
+                                                (chunk,) + args))
+
+                if len(pending) >= processes * 2:
+                    yield pending.popleft().get()
+
+            while pending:
+                yield pending.popleft().get()
+    finally:
+        del _WORKER_PARSER[:]
+
+
+def _annotate_worker_chunk(chunk, column, key, fields):
+    '''Annotates a chunk with the parser inherited by a worker.'''
+    return _annotate_chunk(_WORKER_PARSER[0], chunk, _WORKER_CACHE, column,
+                           key, fields)
+
+
+def _annotate_chunk(parser, lines, annotations, column, key, fields):
+    '''Returns lines with annotations appended, each ending in a newline.
+    Each distinct key is resolved once, and its annotations cached (up to
+    _CACHE_SIZE keys) in annotations.'''
+    rows = [line.split('\t') for line in lines]
+
+    if len(annotations) > _CACHE_SIZE:
+        annotations.clear()
+
+    for row in rows:
+        value = row[column] if column < len(row) else ''
+
+        if value not in annotations:
+            annotations[value] = _get_annotations(parser, value, key, fields)
+
+    return ''.join(
+        '\t'.join(row + annotations[row[column] if column < len(row)
+                                    else '']) + '\n'
+        for row in rows)
+
+
+def _get_annotations(parser, value, key, fields):
+    '''Returns annotation fields of the entity with value, or empty fields
+    if none is found.'''
+    entity = _get_entity(parser, value.strip(), key)
+
+    if entity is None:
+        return [''] * len(fields)
+
+    return [_format(FIELDS[field](entity)) for field in fields]
+
+
+def _get_entity(parser, value, key):
+    '''Returns the ChebiEntity with an id, name or InChI key, or None'''
+    if key == 'name':
+        chebi_ids = parser.get_ids_by_name(value)
+    elif key == 'inchikey':
+        chebi_ids = parser.get_ids_by_inchi_key(value)
+    else:
+        chebi_ids = [value]
+
+    try:
+        return ChebiEntity(chebi_ids[0], parser=parser) if chebi_ids else None
+    except (ChebiException, ValueError):
+        return None
+
+
+def _format(value):
+    '''Returns value as a field, empty for None and NaN'''
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return ''
+
+    return str(value)
@@ -9,8 +9,12 @@ To view a copy of this license, visit <http://opensource.org/licenses/MIT/>.
 '''
 # pylint: disable=superfluous-parens
 # pylint: disable=too-many-public-methods
+import collections
+import functools
 import math
 import sys
+import threading
+import time
 
 from ._base_object import BaseObject
 
@@ -20,50 +24,214 @@ class ChebiException(Exception):
     pass
 
 
+__PARSERS = {}
+__PARSERS_LOCK = threading.Lock()
+__PARSER_FACTORIES = {}
+
+
+def register_parser(parser_name, factory):
+    '''Registers factory, called with download_dir and auto_update keyword
+    arguments, as the parser named parser_name in get_parser.'''
+    __PARSER_FACTORIES[parser_name.lower().replace('-', '')] = factory
+
+
+def _get_filesystem_cache(**kwargs):
+    '''Saves to filesystem cache'''
+    from ._parsers.filesystem import FileSystemCache
+    return FileSystemCache(**kwargs)
+
+
+def _get_google_storage_cache(**kwargs):
+    '''Saves to Google storage cache'''
+    from ._parsers.googlestorage import GoogleStorageCache
+    return GoogleStorageCache(**kwargs)
+
+
+def _get_object_store_cache(**kwargs):
+    '''Saves to the object store given by LIBCHEBIPY_OBJECT_STORE'''
+    from ._parsers.objectstore import ObjectStoreCache
+    return ObjectStoreCache(**kwargs)
+
+
+register_parser("filesystem", _get_filesystem_cache)
+register_parser("googlestorage", _get_google_storage_cache)
+register_parser("objectstore", _get_object_store_cache)
+
+
+class EntityCache(object):
+    '''Bounded cache of ChebiEntity objects by parser and ChEBI id, used by
+    ChebiEntity.get. Least recently used entities are evicted beyond maxsize,
+    entities older than ttl seconds (if not None) are rebuilt, and entities
+    built before their parser's data was cleared, updated or replaced (see
+    ParserBase.get_generation) are rebuilt.'''
+
+    def __init__(self, maxsize=10000, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.__entries = collections.OrderedDict()
+        self.__lock = threading.Lock()
+        self.__stats = collections.Counter()
+
+    def get(self, chebi_id, parser):
+        '''Returns the cached entity of chebi_id, building it on a miss.
+        Raises ChebiException for invalid ids, which are not cached.'''
+        # Entries hold their parser, so its id is not reused while cached:
+        key = (id(parser), chebi_id)
+        generation = _get_generation(parser)
+        now = time.monotonic()
+
+        with self.__lock:
+            entry = self.__entries.get(key)
+
+            if entry is not None:
+                entity, entry_generation, created = entry
+
+                if entry_generation != generation:
+                    self.__stats['invalidations'] += 1
+                elif self.ttl is not None and now - created > self.ttl:
+                    self.__stats['expirations'] += 1
+                else:
+                    self.__entries.move_to_end(key)
+                    self.__stats['hits'] += 1
+                    return entity
+
+                del self.__entries[key]
+
+            self.__stats['misses'] += 1
+
+        # Built outside the lock, so that slow table loads do not block hits:
+        entity = ChebiEntity(chebi_id, parser=parser)
+        entity._memo = {}
+
+        with self.__lock:
+            self.__entries[key] = (entity, generation, now)
+            self.__entries.move_to_end(key)
+
+            while len(self.__entries) > self.maxsize:
+                self.__entries.popitem(last=False)
+                self.__stats['evictions'] += 1
+
+        return entity
+
+    def get_stats(self):
+        '''Returns a dict of size, hits, misses, evictions, expirations and
+        invalidations.'''
+        with self.__lock:
+            stats = {'size': len(self.__entries)}
+
+            for name in ('hits', 'misses', 'evictions', 'expirations',
+                         'invalidations'):
+                stats[name] = self.__stats[name]
+
+            return stats
+
+    def clear(self):
+        '''Discards all entities and resets statistics.'''
+        with self.__lock:
+            self.__entries.clear()
+            self.__stats.clear()
+
+
+ENTITY_CACHE = EntityCache()
+
+
+def _get_generation(parser):
+    '''Returns the generation of parser, or None if it has none'''
+    get_generation = getattr(parser, 'get_generation', None)
+    return None if get_generation is None else get_generation()
+
+
+def _memoised(getter):
+    '''Caches the result of getter on entities returned by ChebiEntity.get,
+    which share results between callers. Lists are returned as copies, so
+    callers cannot modify the cached result.'''
+    name = getter.__name__
+
+    @functools.wraps(getter)
+    def wrapper(self):
+        memo = self.__dict__.get('_memo')
+
+        if memo is None:
+            return getter(self)
+
+        if name not in memo:
+            memo[name] = getter(self)
+
+        result = memo[name]
+        return list(result) if isinstance(result, list) else result
+
+    return wrapper
+
+
+def get_parser(parser_name="filesystem", download_dir=None, auto_update=True):
+    '''Returns the parser shared by all entities with the same parser name,
+    download directory and auto update settings. A parser instance may also
+    be passed, in which case it is returned as is.'''
+    if not isinstance(parser_name, str):
+        return parser_name
+
+    parser_name = parser_name.lower().replace('-', '')
+    if parser_name not in __PARSER_FACTORIES:
+        raise ChebiException('Parser %s is not valid.' % parser_name)
+
+    key = (parser_name, download_dir, auto_update)
+
+    with __PARSERS_LOCK:
+        if key not in __PARSERS:
+            __PARSERS[key] = __PARSER_FACTORIES[parser_name](
+                download_dir=download_dir, auto_update=auto_update)
+
+        return __PARSERS[key]
+
+
 class ChebiEntity(BaseObject):
     '''Class representing a single entity in the ChEBI database.'''
 
     def __init__(self, chebi_id, parser="filesystem", auto_update=True, download_dir=None):
-        self.__chebi_id = int(chebi_id.replace('CHEBI:', ''))
+        self.__chebi_id = int(str(chebi_id).replace('CHEBI:', ''))
         self.__all_ids = None
         self._get_parser(parser, download_dir, auto_update)
 
         if self.get_name() is None:
-            raise ChebiException('ChEBI id ' + chebi_id + ' invalid')
+            raise ChebiException('ChEBI id ' + str(chebi_id) + ' invalid')
+
+    @classmethod
+    def get(cls, chebi_id, parser="filesystem", auto_update=True,
+            download_dir=None, cache=None):
+        '''Returns the entity of chebi_id from cache (by default,
+        ENTITY_CACHE), so that repeated lookups of the same entity, such as
+        hub terms reached across relations, share one object. Getter results
+        of cached entities are memoised, with lists returned as copies.'''
+        parser = get_parser(parser, download_dir, auto_update)
+        chebi_id = int(str(chebi_id).replace('CHEBI:', ''))
+        return (ENTITY_CACHE if cache is None else cache).get(chebi_id,
+                                                               parser)
 
     def _get_parser(self, parser_name, download_dir, auto_update):
-        parser_name = parser_name.lower().replace('-', '')
-        if parser_name not in ["filesystem", "googlestorage"]:
-            raise ChebiException('Parser %s is not valid.' % parser_name)
-        
-        # Save to filesystem cache
-        if parser_name == "filesystem":
-            from ._parsers.filesystem import FileSystemCache
-            self.parser = FileSystemCache(download_dir=download_dir, auto_update=auto_update)
-
-        # Save to Google storage cache
-        elif parser_name == "googlestorage":
-            from ._parsers.googlestorage import GoogleStorageCache
-            self.parser = GoogleStorageCache(download_dir=download_dir, auto_update=auto_update)
+        self.parser = get_parser(parser_name, download_dir, auto_update)
 
     def get_id(self):
         '''Returns id'''
         return 'CHEBI:' + str(self.__chebi_id)
 
+    @_memoised
     def get_parent_id(self):
         '''Returns parent id'''
         parent_id = self.parser.get_parent_id(self.__chebi_id)
         return None if math.isnan(parent_id) else 'CHEBI:' + str(parent_id)
 
+    @_memoised
     def get_formulae(self):
         '''Returns formulae'''
         return self.parser.get_all_formulae(self.__get_all_ids())
 
+    @_memoised
     def get_formula(self):
         '''Returns formula'''
         formulae = self.get_formulae()
         return None if len(formulae) == 0 else formulae[0].get_formula()
 
+    @_memoised
     def get_mass(self):
         '''Returns mass'''
         mass = self.parser.get_mass(self.__chebi_id)
@@ -80,6 +248,7 @@ class ChebiEntity(BaseObject):
 
         return mass
 
+    @_memoised
     def get_charge(self):
         '''Returns charge'''
         charge = self.parser.get_charge(self.__chebi_id)
@@ -96,14 +265,17 @@ class ChebiEntity(BaseObject):
 
         return charge
 
+    @_memoised
     def get_comments(self):
         '''Returns comments'''
         return self.parser.get_all_comments(self.__get_all_ids())
 
+    @_memoised
     def get_source(self):
         '''Returns source'''
         return self.parser.get_source(self.__chebi_id)
 
+    @_memoised
     def get_name(self):
         '''Returns name'''
         name = self.parser.get_name(self.__chebi_id)
@@ -120,6 +292,7 @@ class ChebiEntity(BaseObject):
 
         return name
 
+    @_memoised
     def get_definition(self):
         '''Returns definition'''
         definition = self.parser.get_definition(self.__chebi_id)
@@ -136,10 +309,12 @@ class ChebiEntity(BaseObject):
 
         return definition
 
+    @_memoised
     def get_modified_on(self):
         '''Returns modified on'''
         return self.parser.get_all_modified_on(self.__get_all_ids())
 
+    @_memoised
     def get_created_by(self):
         '''Returns created by'''
         created_by = self.parser.get_created_by(self.__chebi_id)
@@ -156,14 +331,17 @@ class ChebiEntity(BaseObject):
 
         return created_by
 
+    @_memoised
     def get_star(self):
         '''Returns star'''
         return self.parser.get_star(self.__chebi_id)
 
+    @_memoised
     def get_database_accessions(self):
         '''Returns database accessions'''
         return self.parser.get_all_database_accessions(self.__get_all_ids())
 
+    @_memoised
     def get_inchi(self):
         '''Returns inchi'''
         inchi = self.parser.get_inchi(self.__chebi_id)
@@ -180,6 +358,7 @@ class ChebiEntity(BaseObject):
 
         return inchi
 
+    @_memoised
     def get_inchi_key(self):
         '''Returns inchi key'''
         structure = self.parser.get_inchi_key(self.__chebi_id)
@@ -196,6 +375,7 @@ class ChebiEntity(BaseObject):
 
         return None if structure is None else structure.get_structure()
 
+    @_memoised
     def get_smiles(self):
         '''Returns smiles'''
         structure = self.parser.get_smiles(self.__chebi_id)
@@ -212,6 +392,7 @@ class ChebiEntity(BaseObject):
 
         return None if structure is None else structure.get_structure()
 
+    @_memoised
     def get_mol(self):
         '''Returns mol'''
         structure = self.parser.get_mol(self.__chebi_id)
@@ -245,26 +426,58 @@ class ChebiEntity(BaseObject):
 
         return mol_filename
 
+    @_memoised
     def get_names(self):
         '''Returns names'''
         return self.parser.get_all_names(self.__get_all_ids())
 
+    @_memoised
     def get_references(self):
         '''Returns references'''
         return self.parser.get_references(self.__get_all_ids())
 
+    @_memoised
     def get_compound_origins(self):
         '''Returns compound origins'''
         return self.parser.get_all_compound_origins(self.__get_all_ids())
 
+    @_memoised
     def get_outgoings(self):
         '''Returns outgoings'''
         return self.parser.get_all_outgoings(self.__get_all_ids())
 
+    @_memoised
     def get_incomings(self):
         '''Returns incomings'''
         return self.parser.get_all_incomings(self.__get_all_ids())
 
+    @_memoised
+    def get_outgoing_targets(self):
+        '''Returns lazy entities for the targets of outgoings'''
+        from ._lazy_entity import LazyChebiEntity
+        return LazyChebiEntity.from_ids(
+            [outgoing.get_target_chebi_id()
+             for outgoing in self.get_outgoings()], self.parser)
+
+    @_memoised
+    def get_incoming_sources(self):
+        '''Returns lazy entities for the sources of incomings'''
+        from ._lazy_entity import LazyChebiEntity
+        return LazyChebiEntity.from_ids(
+            [incoming.get_target_chebi_id()
+             for incoming in self.get_incomings()], self.parser)
+
+    def __eq__(self, other):
+        # Memoised results are excluded, so cached entities equal new ones:
+        if isinstance(other, ChebiEntity):
+            return self.__chebi_id == other.__chebi_id and \
+                self.parser is other.parser
+
+        return False
+
+    def __hash__(self):
+        return hash(self.__chebi_id)
+
     def __get_status(self):
         '''Returns status'''
         return self.parser.get_status(self.__chebi_id)
@@ -292,9 +505,9 @@ def main(parser_name="filesystem"):
 
     print(chebi_entity.get_name())
 
-    for outgoing in chebi_entity.get_outgoings():
-        target_chebi_entity = ChebiEntity(outgoing.get_target_chebi_id())
-        print(outgoing.get_type() + '\t' + target_chebi_entity.get_name())
+    for outgoing, target in zip(chebi_entity.get_outgoings(),
+                                chebi_entity.get_outgoing_targets()):
+        print(outgoing.get_type() + '\t' + target.get_name())
 
 
 if __name__ == '__main__':
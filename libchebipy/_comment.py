@@ -7,6 +7,8 @@ To view a copy of this license, visit <http://opensource.org/licenses/MIT/>.
 
 @author:  neilswainston
 '''
+import datetime
+
 from ._base_object import BaseObject
 
 
@@ -14,6 +16,8 @@ class Comment(BaseObject):
     '''Class representing a ChEBI comment.'''
 
     def __init__(self, datatype_id, datatype, text, created_on):
+        '''created_on is a datetime, or the date as written in the ChEBI
+        comments file, which is only parsed when read.'''
         self.__datatype_id = datatype_id
         self.__datatype = datatype
         self.__text = text
@@ -30,8 +34,24 @@ class Comment(BaseObject):
 
     def get_created_on(self):
         '''Returns created_on'''
+        if isinstance(self.__created_on, str):
+            # Parsed with minutes (%M) in place of months, as always:
+            return datetime.datetime.strptime(self.__created_on, '%Y-%M-%d')
+
         return self.__created_on
 
+    def __eq__(self, other):
+        if type(other) is type(self):
+            return self.__get_values() == other.__get_values()
+
+        return False
+
+    def __get_values(self):
+        '''Returns attributes, with created_on parsed'''
+        values = dict(self.__dict__)
+        values['_Comment__created_on'] = self.get_created_on()
+        return values
+
     def __get_datatype_id(self):
         '''Returns datatype_id'''
         return self.__datatype_id
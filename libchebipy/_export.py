@@ -0,0 +1,111 @@
+'''
+libChEBIpy (c) University of Manchester 2015-2020
+
+libChEBIpy is licensed under the MIT License.
+
+To view a copy of this license, visit <http://opensource.org/licenses/MIT/>.
+
+@author:  neilswainston
+'''
+import collections
+import io
+import math
+import os.path
+
+from ._chebi_entity import get_parser
+
+
+def _get_formula(parser, chebi_id):
+    '''Returns the first formula of a compound'''
+    formulae = parser.get_formulae(chebi_id)
+    return formulae[0].get_formula() if formulae else None
+
+
+def _get_inchi_key(parser, chebi_id):
+    '''Returns the InChI key of a compound'''
+    inchi_key = parser.get_inchi_key(chebi_id)
+    return None if inchi_key is None else inchi_key.get_structure()
+
+
+# Properties that can be attached to SDF records: (data item name, getter)
+PROPERTIES = collections.OrderedDict([
+    ('name', ('ChEBI Name', lambda parser, chebi_id:
+              parser.get_name(chebi_id))),
+    ('formula', ('Formulae', _get_formula)),
+    ('mass', ('Mass', lambda parser, chebi_id: parser.get_mass(chebi_id))),
+    ('inchi_key', ('InChIKey', _get_inchi_key)),
+])
+
+
+def export_sdf(outfile, parser="filesystem", chebi_ids=None,
+               properties=None):
+    '''Writes the default mol block of each of chebi_ids (by default, of all
+    compounds) to a text file object as an SDF record, titled with its ChEBI
+    id and with properties (by default, all PROPERTIES) as data items.
+    Mol blocks are read from structures.csv.gz in one pass, and one record
+    is held at a time. Other properties are read from their tables, loaded
+    in full on first use: name from compounds, formula and mass from
+    chemical_data, and inchi_key from structures, which reads
+    structures.csv.gz a second time and holds the InChI keys and SMILES of
+    all compounds. (InChI keys are rows of their own, not necessarily next
+    to their mol block, so cannot be taken from the same pass without
+    holding records.) Returns the number of records written.'''
+    parser = get_parser(parser)
+    properties = list(PROPERTIES) if properties is None else properties
+    _check_properties(properties)
+    records = 0
+
+    for chebi_id, structure in parser.iter_mols(chebi_ids):
+        record = [_get_mol_block(chebi_id, structure)]
+
+        for prop in properties:
+            item_name, getter = PROPERTIES[prop]
+            value = getter(parser, chebi_id)
+
+            if value is not None and \
+                    not (isinstance(value, float) and math.isnan(value)):
+                record.append('> <%s>\n%s\n\n' % (item_name, value))
+
+        record.append('$$$$\n')
+        outfile.write(''.join(record))
+        records += 1
+
+    return records
+
+
+def export_mol_files(directory, parser="filesystem", chebi_ids=None):
+    '''Writes the default mol block of each of chebi_ids (by default, of all
+    compounds) to ChEBI_<id>.mol in directory, reading structures.csv.gz
+    once. Returns the paths written.'''
+    parser = get_parser(parser)
+    filenames = []
+
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+
+    for chebi_id, structure in parser.iter_mols(chebi_ids):
+        filename = os.path.join(directory, 'ChEBI_%d.mol' % chebi_id)
+
+        with io.open(filename, 'w', encoding='utf-8') as mol_file:
+            mol_file.write(_get_mol_block(chebi_id, structure))
+
+        filenames.append(filename)
+
+    return filenames
+
+
+def _check_properties(properties):
+    '''Raises ValueError for unknown properties'''
+    unknown = set(properties) - set(PROPERTIES)
+
+    if unknown:
+        raise ValueError('Unknown properties: %s' %
+                         ', '.join(sorted(unknown)))
+
+
+def _get_mol_block(chebi_id, structure):
+    '''Returns a mol block titled with its ChEBI id, ending in a newline'''
+    lines = structure.get_structure().split('\n')
+    lines[0] = 'CHEBI:%d' % chebi_id
+    mol_block = '\n'.join(lines)
+    return mol_block if mol_block.endswith('\n') else mol_block + '\n'
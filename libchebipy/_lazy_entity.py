@@ -0,0 +1,74 @@
+'''
+libChEBIpy (c) University of Manchester 2015-2020
+
+libChEBIpy is licensed under the MIT License.
+
+To view a copy of this license, visit <http://opensource.org/licenses/MIT/>.
+
+@author:  neilswainston
+'''
+from ._chebi_entity import ChebiEntity, _get_generation, get_parser
+
+
+class LazyChebiEntity(object):
+    '''Lightweight handle to a ChEBI entity, holding only its id and a shared
+    parser. The full ChebiEntity is fetched from ChebiEntity.get on the first
+    call to any getter other than get_id(), so that handles to the same
+    entity share it, and again once the parser's data has changed.'''
+
+    __slots__ = ('__chebi_id', '__parser', '__entity', '__generation')
+
+    def __init__(self, chebi_id, parser="filesystem"):
+        self.__chebi_id = int(str(chebi_id).replace('CHEBI:', ''))
+        self.__parser = get_parser(parser)
+        self.__entity = None
+        self.__generation = None
+
+    @classmethod
+    def from_ids(cls, chebi_ids, parser="filesystem"):
+        '''Returns lazy entities for chebi_ids, all sharing one parser.'''
+        parser = get_parser(parser)
+        return [cls(chebi_id, parser) for chebi_id in chebi_ids]
+
+    def get_id(self):
+        '''Returns id'''
+        return 'CHEBI:' + str(self.__chebi_id)
+
+    def get_entity(self):
+        '''Returns the materialised ChebiEntity, materialised again if the
+        parser has since been cleared, updated or given new packed tables'''
+        generation = _get_generation(self.__parser)
+
+        if self.__entity is None or self.__generation != generation:
+            self.__entity = ChebiEntity.get(self.__chebi_id, self.__parser)
+            self.__generation = generation
+
+        return self.__entity
+
+    def is_materialised(self):
+        '''Returns whether the ChebiEntity has been built'''
+        return self.__entity is not None
+
+    def __getattr__(self, name):
+        if name.startswith('get_'):
+            return getattr(self.get_entity(), name)
+
+        raise AttributeError(name)
+
+    def __eq__(self, other):
+        if isinstance(other, LazyChebiEntity):
+            return self.__chebi_id == other.__chebi_id and \
+                self.__parser is other.__parser
+        elif isinstance(other, ChebiEntity):
+            return self.get_entity() == other
+
+        return False
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash(self.__chebi_id)
+
+    def __repr__(self):
+        return 'LazyChebiEntity(%r)' % self.get_id()
@@ -0,0 +1,207 @@
+'''
+libChEBIpy (c) University of Manchester 2015-2020
+
+libChEBIpy is licensed under the MIT License.
+
+To view a copy of this license, visit <http://opensource.org/licenses/MIT/>.
+
+@author:  neilswainston
+'''
+import bisect
+import functools
+import os.path
+import threading
+import time
+
+# Upper bounds, in seconds, of latency histogram buckets: 1 us, doubling to
+# about 67 s, then an overflow bucket
+BUCKETS = [1e-6 * 2 ** exponent for exponent in range(27)]
+
+
+class Histogram(object):
+    '''Counts of latencies in exponential buckets (see BUCKETS).'''
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        '''Counts a latency'''
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def get_percentile(self, percentile):
+        '''Returns the upper bound of the bucket holding percentile (0 to
+        100) of latencies, or the maximum for the overflow bucket'''
+        rank = self.count * percentile / 100.0
+        cumulative = 0
+
+        for bucket, count in enumerate(self.counts):
+            cumulative += count
+
+            if count and cumulative >= rank:
+                return BUCKETS[bucket] if bucket < len(BUCKETS) else self.max
+
+        return 0.0
+
+    def to_dict(self):
+        '''Returns count, total, max, p50, p90 and p99 seconds, and counts
+        by bucket upper bound (None for overflow) of non-empty buckets'''
+        return {'count': self.count,
+                'total': self.total,
+                'max': self.max,
+                'p50': self.get_percentile(50),
+                'p90': self.get_percentile(90),
+                'p99': self.get_percentile(99),
+                'buckets': [(BUCKETS[bucket] if bucket < len(BUCKETS)
+                             else None, count)
+                            for bucket, count in enumerate(self.counts)
+                            if count]}
+
+
+class Metrics(object):
+    '''Timings and counters of a parser's hot paths, recorded once set on a
+    parser with ParserBase.set_metrics. Events are:
+
+    file: get_file of a flat file, with the bytes of the local file and the
+        outermost getter (if any) it was fetched for
+    extract: _extract_compressed_file, with the bytes of the file returned
+    parse: the parse of a table, with its rows and bytes
+    getter: a call to a data getter, other than from within another (as
+        of get_all_names calling get_names), which is timed as part of the
+        outermost
+
+    Each event is counted and timed by name (file name, table or getter),
+    and passed to hooks, called with (event, name, seconds, fields), which
+    may export them to other metrics systems. Bytes of files fetched for a
+    getter are also totalled against it, as file_bytes.'''
+
+    def __init__(self):
+        self.__stats = {}
+        self.__hooks = []
+        self.__lock = threading.Lock()
+        self.__local = threading.local()
+
+    def add_hook(self, hook):
+        '''Calls hook(event, name, seconds, fields) on each event.'''
+        with self.__lock:
+            self.__hooks = self.__hooks + [hook]
+
+    def remove_hook(self, hook):
+        '''Stops calling hook.'''
+        with self.__lock:
+            self.__hooks = [other for other in self.__hooks
+                            if other is not hook]
+
+    def record(self, event, name, seconds, **fields):
+        '''Records an event taking seconds, with numeric fields (such as
+        bytes or rows) totalled by name.'''
+        getters = self.__get_getters()
+
+        if event == 'file' and getters:
+            fields['getter'] = getters[0]
+
+        with self.__lock:
+            stats = self.__get_stats(event, name)
+            stats['calls'] += 1
+            stats['latency'].observe(seconds)
+
+            for field, value in fields.items():
+                if isinstance(value, (int, float)):
+                    stats[field] = stats.get(field, 0) + value
+
+            if 'getter' in fields:
+                stats = self.__get_stats('getter', fields['getter'])
+                stats['file_bytes'] = stats.get('file_bytes', 0) + \
+                    fields.get('bytes', 0)
+
+            hooks = self.__hooks
+
+        for hook in hooks:
+            hook(event, name, seconds, fields)
+
+    def get_stats(self):
+        '''Returns a dict of event to name to calls, latency (see
+        Histogram.to_dict) and field totals.'''
+        stats = {}
+
+        with self.__lock:
+            for (event, name), values in self.__stats.items():
+                values = dict(values)
+                values['latency'] = values['latency'].to_dict()
+                stats.setdefault(event, {})[name] = values
+
+        return stats
+
+    def reset(self):
+        '''Discards all recorded events.'''
+        with self.__lock:
+            self.__stats.clear()
+
+    def wrap_getter(self, getter):
+        '''Returns getter, timed as a getter event unless called by
+        another.'''
+        name = getter.__name__
+
+        @functools.wraps(getter)
+        def wrapper(*args, **kwargs):
+            getters = self.__get_getters()
+
+            if getters:
+                return getter(*args, **kwargs)
+
+            getters.append(name)
+            start = time.perf_counter()
+
+            try:
+                return getter(*args, **kwargs)
+            finally:
+                getters.pop()
+                self.record('getter', name, time.perf_counter() - start)
+
+        return wrapper
+
+    def wrap_file(self, event, get_file):
+        '''Returns get_file (or _extract_compressed_file), timed as event,
+        named by the base name of its first argument and with the bytes of
+        the file it returns.'''
+        @functools.wraps(get_file)
+        def wrapper(filename, *args, **kwargs):
+            start = time.perf_counter()
+            filepath = get_file(filename, *args, **kwargs)
+            seconds = time.perf_counter() - start
+            self.record(event, os.path.basename(filename), seconds,
+                        bytes=_get_file_size(filepath))
+            return filepath
+
+        return wrapper
+
+    def __get_getters(self):
+        '''Returns the names of getters being called by this thread'''
+        getters = getattr(self.__local, 'getters', None)
+
+        if getters is None:
+            getters = self.__local.getters = []
+
+        return getters
+
+    def __get_stats(self, event, name):
+        '''Returns the stats of event and name, under the lock'''
+        key = (event, name)
+
+        if key not in self.__stats:
+            self.__stats[key] = {'calls': 0, 'latency': Histogram()}
+
+        return self.__stats[key]
+
+
+def _get_file_size(filepath):
+    '''Returns the size of filepath, or 0 if it is not a file'''
+    try:
+        return os.path.getsize(filepath)
+    except (OSError, TypeError):
+        return 0
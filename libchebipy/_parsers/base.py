@@ -8,14 +8,26 @@ To view a copy of this license, visit <http://opensource.org/licenses/MIT/>.
 @author:  neilswainston
 """
 
+import bisect
 import calendar
+import collections
 import datetime
+import functools
 import gzip
 import io
+import itertools
+import math
+import mmap
 import os.path
 import re
+import shutil
+import sys
+import threading
+import time
+import weakref
 import zipfile
 import tempfile
+from concurrent.futures import Future, ThreadPoolExecutor
 
 from .._comment import Comment
 from .._compound_origin import CompoundOrigin
@@ -25,14 +37,129 @@ from .._name import Name
 from .._reference import Reference
 from .._relation import Relation
 from .._structure import Structure
+from .molstore import MolStore
+from .packed import PackedTable, dumps, loads, pack
+
+# Stands for null dates, which precede all others
+_NULL_DATE = 0
+
+# Size of blocks in which flat files are read
+_BLOCK_SIZE = 1024 * 1024
+
+# The first line of a row of structures.csv that starts a quoted (mol) field
+_MOL_START = re.compile(r'^\d+,(\d+),"[^"]*$')
+
+# The ChEBI flat files read by a parser
+FILENAMES = [
+    "chebiId_inchi.tsv",
+    "chemical_data.tsv",
+    "comments.tsv",
+    "compound_origins.tsv",
+    "compounds.tsv.gz",
+    "database_accession.tsv",
+    "names.tsv.gz",
+    "reference.tsv.gz",
+    "relation.tsv",
+    "structures.csv.gz",
+]
 
 
 class ParserBase:
     """A parser base provides shared functions to interact with a libchebi cache
     """
 
-    def __init__(self, download_dir=None, auto_update=True):
+    # Tables, each parsed from one flat file: (filename, delimiter, column
+    # holding the ChEBI id that rows are keyed by, attributes populated)
+    _TABLES = {
+        "chemical_data": (
+            "chemical_data.tsv",
+            "\t",
+            1,
+            ["_FORMULAE", "_MASSES", "_CHARGES"],
+        ),
+        "comments": ("comments.tsv", "\t", 1, ["_COMMENTS"]),
+        "compound_origins": ("compound_origins.tsv", "\t", 1, ["_COMPOUND_ORIGINS"]),
+        "compounds": (
+            "compounds.tsv.gz",
+            "\t",
+            0,
+            [
+                "_STATUSES",
+                "_SOURCES",
+                "_PARENT_IDS",
+                "_ALL_IDS",
+                "_NAMES",
+                "_DEFINITIONS",
+                "_MODIFIED_ONS",
+                "_CREATED_BYS",
+                "_STARS",
+            ],
+        ),
+        "database_accessions": (
+            "database_accession.tsv",
+            "\t",
+            1,
+            ["_DATABASE_ACCESSIONS"],
+        ),
+        "inchi": ("chebiId_inchi.tsv", "\t", 0, ["_INCHIS"]),
+        "names": ("names.tsv.gz", "\t", 1, ["_ALL_NAMES"]),
+        "relation": ("relation.tsv", "\t", 3, ["_OUTGOINGS", "_INCOMINGS"]),
+        "structures": ("structures.csv.gz", ",", 1, ["_INCHI_KEYS", "_SMILES"]),
+    }
+
+    # Attributes keyed by ChEBI ids other than those of the rows that fill
+    # them (parents in all ids, targets in incomings)
+    _CROSS_ID_ATTRS = {"_ALL_IDS", "_INCOMINGS"}
+
+    # Attributes holding raw rows (see _put_row)
+    _ROW_ATTRS = {"_COMMENTS", "_COMPOUND_ORIGINS", "_DATABASE_ACCESSIONS", "_ALL_NAMES"}
+
+    # Getters of ChEBI data, timed while metrics are set (see set_metrics)
+    _DATA_GETTERS = (
+        "get_formulae",
+        "get_all_formulae",
+        "get_mass",
+        "get_charge",
+        "get_comments",
+        "get_all_comments",
+        "get_compound_origins",
+        "get_all_compound_origins",
+        "get_status",
+        "get_source",
+        "get_parent_id",
+        "get_all_ids",
+        "get_name",
+        "get_definition",
+        "get_modified_on",
+        "get_all_modified_on",
+        "get_modified_since",
+        "get_created_by",
+        "get_star",
+        "get_database_accessions",
+        "get_all_database_accessions",
+        "get_inchi",
+        "get_names",
+        "get_all_names",
+        "get_outgoings",
+        "get_all_outgoings",
+        "get_incomings",
+        "get_all_incomings",
+        "get_ids_by_name",
+        "get_ids_by_inchi_key",
+        "get_ids_by_mass",
+        "get_ids_by_accession",
+        "get_ancestors",
+        "get_inchi_key",
+        "get_smiles",
+        "get_references",
+        "get_mol",
+        "get_mol_filename",
+    )
+
+    def __init__(self, download_dir=None, auto_update=True, packed=False):
         """set a unique id that includes executor name (type) and random uuid)
+           If packed, parsed tables are held in flat buffers (see PackedTable)
+           so that they stay shared between forked worker processes.
         """
         # First preference to command line, then environment, then default
         self.download_dir = download_dir or os.environ.get(
@@ -40,6 +167,7 @@ class ParserBase:
         )
         self.path = self.download_dir
         self.auto_update = auto_update
+        self.packed = packed
 
         self._ALL_IDS = {}
         self._ALL_NAMES = {}
@@ -64,6 +192,47 @@ class ParserBase:
         self._STARS = {}
         self._STATUSES = {}
 
+        # (filename, mtime, size) each table was parsed from, and the row
+        # hashes of each table, used to apply incremental updates
+        self._parsed_files = {}
+        self._row_hashes = {}
+
+        # Each table is parsed once, under its own lock
+        self._table_locks = {table: threading.RLock() for table in self._TABLES}
+
+        # Reverse indexes over tables, built on first use (see _get_index),
+        # and the number of times the attributes of each table have been
+        # replaced, which indexes are keyed by
+        self._indexes = {}
+        self._table_generations = collections.Counter()
+
+        # Compressed mol blocks, if loaded (see load_mol_store), and whether
+        # they cover all compounds, both read and set under one lock
+        self._mol_store = None
+        self._mol_store_complete = False
+        self._mol_store_lock = threading.Lock()
+
+        # Incremented whenever loaded data may change (by clear, update and
+        # set_packed_tables), so that cached entities can be invalidated
+        self._generation = 0
+
+        # Memory budget in bytes, if any (see set_memory_budget): the sizes
+        # of loaded tables, least recently used first, the snapshot file and
+        # file signature of each evicted table, and eviction counts
+        self._memory_budget = None
+        self._table_sizes = collections.OrderedDict()
+        self._residency_lock = threading.Lock()
+        self._snapshot_dir = None
+        self._snapshots = {}
+        self._evicted = set()
+        self._evictions = collections.Counter()
+        self._reloads = collections.Counter()
+
+        # Metrics recorded, if any (see set_metrics), and the names of the
+        # methods wrapped on this instance to record them
+        self._metrics = None
+        self._instrumented = []
+
     def set_download_cache_path(self, path):
         """Sets download cache path."""
         self.path = path
@@ -72,10 +241,128 @@ class ParserBase:
         """Sets auto update flag."""
         self.auto_update = auto_update
 
+    def set_memory_budget(self, memory_budget):
+        """Sets the number of bytes loaded tables may hold, or None for no
+           limit. Over budget, least recently used tables are evicted to
+           snapshot files, and read back from them (memory mapped, without
+           parsing) on next access.
+        """
+        with self._residency_lock:
+            self._memory_budget = memory_budget
+
+        if memory_budget is None:
+            with self._residency_lock:
+                self._table_sizes.clear()
+
+            return
+
+        # Tables already tracked keep their recency:
+        for table in self.get_loaded_tables():
+            if table not in self._table_sizes:
+                self._track_table(table)
+
+        self._evict_tables()
+
+    def get_memory_stats(self):
+        """Returns the memory budget, total and per table size of loaded
+           tables, and counts of evictions and reloads per table. Sizes are
+           only tracked while a budget is set.
+        """
+        with self._residency_lock:
+            return {
+                "budget": self._memory_budget,
+                "size": sum(self._table_sizes.values()),
+                "tables": dict(self._table_sizes),
+                "evictions": dict(self._evictions),
+                "reloads": dict(self._reloads),
+            }
+
+    def memory_report(self):
+        """Returns the memory held by the parser, as a dict of: tables, each
+           loaded table's size and, for each of its attributes, its type,
+           entries (ChEBI ids) and deep size in bytes; indexes, the entries
+           and size of each reverse index built; mol_store, the size of any
+           mol store; and total. Objects shared between attributes are
+           counted once, against the first.
+        """
+        seen = set()
+        report = {"tables": {}, "indexes": {}, "mol_store": 0, "total": 0}
+
+        for table in self.get_loaded_tables():
+            attributes = {}
+
+            with self._table_locks[table]:
+                for attr in self._TABLES[table][3]:
+                    value = getattr(self, attr)
+                    attributes[attr] = {
+                        "type": type(value).__name__,
+                        "entries": len(value),
+                        "size": _get_size(value, seen),
+                    }
+
+            report["tables"][table] = {
+                "size": sum(attribute["size"] for attribute in attributes.values()),
+                "attributes": attributes,
+            }
+
+        for attr, (_, index) in list(self._indexes.items()):
+            # Indexes are dicts, or parallel sequences (as of masses):
+            report["indexes"][attr] = {
+                "entries": len(index if isinstance(index, dict) else index[0]),
+                "size": _get_size(index, seen),
+            }
+
+        mol_store = self._mol_store
+
+        if mol_store is not None:
+            report["mol_store"] = mol_store.get_size()
+
+        report["total"] = (
+            sum(table["size"] for table in report["tables"].values())
+            + sum(index["size"] for index in report["indexes"].values())
+            + report["mol_store"]
+        )
+
+        return report
+
+    def set_metrics(self, metrics):
+        """Records timings of flat file fetches and extraction, table parses
+           and calls of data getters (see _DATA_GETTERS) in metrics (a
+           Metrics), or stops recording if None. Methods are wrapped on this
+           instance only while recording, so that getters cost nothing more
+           otherwise.
+        """
+        for name in self._instrumented:
+            delattr(self, name)
+
+        self._instrumented = []
+        self._metrics = metrics
+
+        if metrics is None:
+            return
+
+        for name in self._DATA_GETTERS:
+            setattr(self, name, metrics.wrap_getter(getattr(self, name)))
+            self._instrumented.append(name)
+
+        for event, name in (("file", "get_file"), ("extract", "_extract_compressed_file")):
+            setattr(self, name, metrics.wrap_file(event, getattr(self, name)))
+            self._instrumented.append(name)
+
+    def get_metrics(self):
+        """Returns the Metrics being recorded, or None"""
+        return self._metrics
+
+    def prefetch_all(self, max_workers=4):
+        """Fetches (and extracts) every flat file in parallel, so that no
+           getter stalls on a download. Returns the local file paths.
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(self.get_file, FILENAMES))
+
     def get_formulae(self, chebi_id):
         """Returns formulae"""
-        if not self._FORMULAE:
-            self._parse_chemical_data()
+        self._load_table("chemical_data")
         return self._FORMULAE[chebi_id] if chebi_id in self._FORMULAE else []
 
     def get_all_formulae(self, chebi_ids):
@@ -85,21 +372,23 @@ class ParserBase:
 
     def get_mass(self, chebi_id):
         """Returns mass"""
-        if not self._MASSES:
-            self._parse_chemical_data()
+        self._load_table("chemical_data")
         return self._MASSES[chebi_id] if chebi_id in self._MASSES else float("NaN")
 
     def get_charge(self, chebi_id):
         """Returns charge"""
-        if not self._CHARGES:
-            self._parse_chemical_data()
+        self._load_table("chemical_data")
         return self._CHARGES[chebi_id] if chebi_id in self._CHARGES else float("NaN")
 
     def get_comments(self, chebi_id):
         """Returns comments"""
-        if not self._COMMENTS:
-            self._parse_comments()
-        return self._COMMENTS[chebi_id] if chebi_id in self._COMMENTS else []
+        self._load_table("comments")
+
+        # Comments, whose date is only parsed when read:
+        return [
+            Comment(fields[1], fields[2], fields[3], fields[0])
+            for fields in _get_rows(self._COMMENTS, chebi_id)
+        ]
 
     def get_all_comments(self, chebi_ids):
         """Returns all comments"""
@@ -108,13 +397,11 @@ class ParserBase:
 
     def get_compound_origins(self, chebi_id):
         """Returns compound origins"""
-        if not self._COMPOUND_ORIGINS:
-            self._parse_compound_origins()
-        return (
-            self._COMPOUND_ORIGINS[chebi_id]
-            if chebi_id in self._COMPOUND_ORIGINS
-            else []
-        )
+        self._load_table("compound_origins")
+        return [
+            CompoundOrigin(*fields)
+            for fields in _get_rows(self._COMPOUND_ORIGINS, chebi_id)
+        ]
 
     def get_all_compound_origins(self, chebi_ids):
         """Returns all compound origins"""
@@ -125,68 +412,606 @@ class ParserBase:
 
     def get_status(self, chebi_id):
         """Returns status"""
-        if not self._STATUSES:
-            self._parse_compounds()
+        self._load_table("compounds")
         return self._STATUSES[chebi_id] if chebi_id in self._STATUSES else None
 
     def get_source(self, chebi_id):
         """Returns source"""
-        if not self._SOURCES:
-            self._parse_compounds()
+        self._load_table("compounds")
         return self._SOURCES[chebi_id] if chebi_id in self._SOURCES else None
 
     def get_parent_id(self, chebi_id):
         """Returns parent id"""
-        if not self._PARENT_IDS:
-            self._parse_compounds()
+        self._load_table("compounds")
         return (
             self._PARENT_IDS[chebi_id] if chebi_id in self._PARENT_IDS else float("NaN")
         )
 
     def get_all_ids(self, chebi_id):
         """Returns all ids"""
-        if not self._ALL_IDS:
-            self._parse_compounds()
+        self._load_table("compounds")
         return self._ALL_IDS[chebi_id] if chebi_id in self._ALL_IDS else []
 
     def get_name(self, chebi_id):
         """Returns name"""
-        if not self._NAMES:
-            self._parse_compounds()
+        self._load_table("compounds")
         return self._NAMES[chebi_id] if chebi_id in self._NAMES else None
 
     def get_definition(self, chebi_id):
         """Returns definition"""
-        if not self._DEFINITIONS:
-            self._parse_compounds()
+        self._load_table("compounds")
         return self._DEFINITIONS[chebi_id] if chebi_id in self._DEFINITIONS else None
 
     def get_modified_on(self, chebi_id):
         """Returns modified on"""
-        if not self._MODIFIED_ONS:
-            self._parse_compounds()
-        return self._MODIFIED_ONS[chebi_id] if chebi_id in self._MODIFIED_ONS else None
+        self._load_table("compounds")
+        return _get_datetime(self._MODIFIED_ONS.get(chebi_id, _NULL_DATE))
 
     def get_all_modified_on(self, chebi_ids):
         """Returns all modified on"""
-        all_modified_ons = [self.get_modified_on(chebi_id) for chebi_id in chebi_ids]
-        all_modified_ons = [
-            modified_on for modified_on in all_modified_ons if modified_on is not None
+        self._load_table("compounds")
+        modified_ons = [
+            self._MODIFIED_ONS.get(chebi_id, _NULL_DATE) for chebi_id in chebi_ids
         ]
-        return None if not all_modified_ons else sorted(all_modified_ons)[-1]
+        return _get_datetime(max(modified_ons, default=_NULL_DATE))
+
+    def get_modified_since(self, since):
+        """Returns ids of compounds modified on or after since (a date or
+           datetime), in ascending order
+        """
+        self._load_table("compounds")
+        threshold = since.year * 10000 + since.month * 100 + since.day
+
+        if isinstance(self._MODIFIED_ONS, PackedTable):
+            chebi_ids, modified_ons = self._MODIFIED_ONS.get_arrays()
+        else:
+            chebi_ids = sorted(self._MODIFIED_ONS)
+            modified_ons = [self._MODIFIED_ONS[chebi_id] for chebi_id in chebi_ids]
+
+        return list(itertools.compress(chebi_ids, map(threshold.__le__, modified_ons)))
 
     def get_created_by(self, chebi_id):
         """Returns created by"""
-        if not self._CREATED_BYS:
-            self._parse_compounds()
+        self._load_table("compounds")
         return self._CREATED_BYS[chebi_id] if chebi_id in self._MODIFIED_ONS else None
 
     def get_star(self, chebi_id):
         """Returns star"""
-        if not self._STARS:
-            self._parse_compounds()
+        self._load_table("compounds")
         return self._STARS[chebi_id] if chebi_id in self._STARS else float("NaN")
 
+    def load(self, tables=None):
+        """Parses tables (by default, all tables) that are not yet loaded"""
+        for table in self._TABLES if tables is None else tables:
+            if table not in self._TABLES:
+                raise ValueError("Unknown table %s" % table)
+
+            self._load_table(table)
+
+    def warm_up(self, tables=None, background=True):
+        """Loads tables (by default, all tables) in the order given, so that
+           the first getters to need them do not stall on a parse. If
+           background, tables are loaded on a daemon thread while the parser
+           stays in use, and a Future of the table names, done once all are
+           loaded, is returned; a getter needing a table being loaded waits
+           for that load rather than parsing it again. Otherwise, returns
+           the table names once loaded.
+        """
+        tables = list(self._TABLES if tables is None else tables)
+
+        for table in tables:
+            if table not in self._TABLES:
+                raise ValueError("Unknown table %s" % table)
+
+        if not background:
+            self.load(tables)
+            return tables
+
+        future = Future()
+
+        def _warm_up():
+            if not future.set_running_or_notify_cancel():
+                return
+
+            try:
+                self.load(tables)
+            except BaseException as err:  # pylint: disable=broad-except
+                future.set_exception(err)
+            else:
+                future.set_result(tables)
+
+        threading.Thread(
+            target=_warm_up, name="libchebipy-warm-up", daemon=True
+        ).start()
+
+        return future
+
+    def get_generation(self):
+        """Returns a counter incremented whenever loaded data is discarded
+           or replaced
+        """
+        return self._generation
+
+    def get_loaded_tables(self):
+        """Returns names of loaded tables"""
+        return [table for table in self._TABLES if table in self._parsed_files]
+
+    def clear(self):
+        """Discards all loaded tables, any mol store, and the snapshots of
+           evicted tables
+        """
+        self._set_mol_store(None, False)
+        self._generation += 1
+
+        for table in self._TABLES:
+            with self._table_locks[table]:
+                self._parsed_files.pop(table, None)
+                self._row_hashes.pop(table, None)
+                self._reset_table(table)
+                self._snapshots.pop(table, None)
+                self._evicted.discard(table)
+
+        self._indexes.clear()
+
+        with self._residency_lock:
+            self._table_sizes.clear()
+            snapshot_dir, self._snapshot_dir = self._snapshot_dir, None
+
+        if snapshot_dir is not None:
+            shutil.rmtree(snapshot_dir, ignore_errors=True)
+
+    def get_packed_tables(self):
+        """Returns a dict of attribute to PackedTable for all loaded tables,
+           packing any that are held as dicts
+        """
+        tables = {}
+
+        for table in self.get_loaded_tables():
+            for attr in self._TABLES[table][3]:
+                value = getattr(self, attr)
+                tables[attr] = value if isinstance(value, PackedTable) else pack(value)
+
+        return tables
+
+    def set_packed_tables(self, tables):
+        """Installs a dict of attribute to PackedTable, as returned by
+           get_packed_tables, marking tables whose attributes are all present
+           as loaded
+        """
+        self.packed = True
+
+        for table, (filename, _, _, attrs) in self._TABLES.items():
+            if all(attr in tables for attr in attrs):
+                with self._table_locks[table]:
+                    for attr in attrs:
+                        setattr(self, attr, tables[attr])
+
+                    self._invalidate_indexes(table)
+                    self._row_hashes.pop(table, None)
+                    self._evicted.discard(table)
+                    self._parsed_files[table] = (filename, None, None)
+
+                if self._memory_budget is not None:
+                    self._track_table(table)
+
+        self._generation += 1
+        self._evict_tables()
+
+    def _load_table(self, table):
+        """Parses table if it is not yet loaded. Concurrent callers block
+           until a single parse completes, so tables are never read while
+           partially built.
+        """
+        if table in self._parsed_files:
+            if self._memory_budget is not None:
+                self._touch_table(table)
+
+            return
+
+        with self._table_locks[table]:
+            if table in self._parsed_files:
+                return
+
+            # A failed parse leaves no partial rows, so may be retried:
+            try:
+                if table in self._evicted:
+                    self._reload_table(table)
+                else:
+                    getattr(self, "_parse_" + table)()
+            except Exception:
+                self._reset_table(table)
+                raise
+
+        if self._memory_budget is not None:
+            self._track_table(table)
+            self._evict_tables(table)
+
+    def update(self):
+        """Applies changes to the flat files of loaded tables. Raw rows are
+           hashed by ChEBI id as tables are parsed, and each changed file is
+           read once, hashing its rows again: only the rows of ChEBI ids
+           whose hash has changed (for example, through a new modified_on
+           date) are parsed, with those of other ids adding to the same
+           parents' all ids or targets' incomings, so that these are rebuilt
+           in file order. Each attribute is then swapped for an updated
+           copy, so readers never see a partly updated table. Returns a dict
+           of table to number of ChEBI ids updated, or None where the table
+           was packed and was replaced in full.
+        """
+        updated = {}
+
+        # Mol blocks may have changed, so are read again until reloaded
+        self._set_mol_store(None, False)
+
+        for table, (filename, _, _, _) in self._TABLES.items():
+            with self._table_locks[table]:
+                if table in self._parsed_files:
+                    updated[table] = self._update_table(table, filename)
+
+                    if self._memory_budget is not None:
+                        self._track_table(table)
+
+        self._evict_tables()
+
+        if any(count != 0 for count in updated.values()):
+            self._generation += 1
+
+        return updated
+
+    def _update_table(self, table, filename):
+        """Applies changes to the flat file of a loaded table, returning the
+           number of ChEBI ids updated, or None if replaced in full
+        """
+        filepath = self.get_file(filename)
+
+        if _get_file_signature(filepath) == self._parsed_files[table]:
+            return 0
+
+        _, delimiter, key_column, attrs = self._TABLES[table]
+        old_row_hashes = self._row_hashes.get(table)
+
+        # Packed tables are read-only, so are replaced in full:
+        if self._is_packed(table) or old_row_hashes is None:
+            parsed = self._new_tables(table)
+            self._parse_file(parsed, table, filepath)
+
+            for attr in attrs:
+                value = getattr(parsed, attr)
+                setattr(self, attr, pack(value) if self.packed else value)
+
+            self._invalidate_indexes(table)
+            self._row_hashes.pop(table, None)
+            self._parsed_files[table] = _get_file_signature(filepath)
+            return None
+
+        row_hashes = {}
+        lines = []
+
+        for block in _read_blocks(filepath):
+            _hash_lines(block, delimiter, key_column, row_hashes, lines)
+
+        changed = set(
+            chebi_id
+            for chebi_id, row_hash in row_hashes.items()
+            if old_row_hashes.get(chebi_id) != row_hash
+        )
+        changed.update(set(old_row_hashes) - set(row_hashes))
+
+        if changed:
+            parsed = self._parse_lines(table, lines, changed)
+            keys = {attr: changed for attr in attrs}
+            sources = set()
+
+            # Cross id values changed ids added to, or now add to, are
+            # rebuilt from the rows of all ids that add to them:
+            for attr in self._CROSS_ID_ATTRS.intersection(attrs):
+                keys[attr] = set()
+
+                for chebi_id in changed:
+                    keys[attr].update(self._get_cross_id_keys(attr, chebi_id))
+                    keys[attr].update(parsed._get_cross_id_keys(attr, chebi_id))
+
+                for parser in (self, parsed):
+                    values = getattr(parser, attr)
+
+                    for key in keys[attr]:
+                        sources.update(
+                            parser._get_cross_id_sources(attr, values.get(key, []))
+                        )
+
+            if not sources <= changed:
+                parsed = self._parse_lines(table, lines, changed | sources)
+
+            for attr in attrs:
+                new_values = getattr(parsed, attr)
+                updated_values = dict(getattr(self, attr))
+
+                for key in keys[attr]:
+                    if key in new_values:
+                        updated_values[key] = new_values[key]
+                    else:
+                        updated_values.pop(key, None)
+
+                setattr(self, attr, updated_values)
+
+            self._invalidate_indexes(table)
+
+        self._row_hashes[table] = row_hashes
+        self._parsed_files[table] = _get_file_signature(filepath)
+        return len(changed)
+
+    def _is_packed(self, table):
+        """Returns whether table is held as PackedTables, which are read-only
+           (as when packed, or reloaded from a snapshot)
+        """
+        return self.packed or isinstance(
+            getattr(self, self._TABLES[table][3][0]), PackedTable
+        )
+
+    def _touch_table(self, table):
+        """Marks table as the most recently used"""
+        with self._residency_lock:
+            if table in self._table_sizes:
+                self._table_sizes.move_to_end(table)
+
+    def _track_table(self, table):
+        """Records the size of a loaded table, as the most recently used"""
+        size = sum(_get_size(getattr(self, attr)) for attr in self._TABLES[table][3])
+
+        with self._residency_lock:
+            self._table_sizes[table] = size
+            self._table_sizes.move_to_end(table)
+
+    def _evict_tables(self, keep=None):
+        """Evicts least recently used tables, other than keep, until loaded
+           tables fit the memory budget
+        """
+        while True:
+            with self._residency_lock:
+                if (
+                    self._memory_budget is None
+                    or sum(self._table_sizes.values()) <= self._memory_budget
+                ):
+                    return
+
+                tables = [table for table in self._table_sizes if table != keep]
+
+            if not any(self._evict_table(table) for table in tables):
+                return
+
+    def _evict_table(self, table):
+        """Writes a snapshot of table, if it has none of its current file,
+           and replaces its attributes with placeholders that reload it.
+           Returns False, without waiting, if table is being loaded.
+        """
+        lock = self._table_locks[table]
+
+        if not lock.acquire(blocking=False):
+            return False
+
+        try:
+            signature = self._parsed_files.get(table)
+
+            if signature is None:
+                with self._residency_lock:
+                    self._table_sizes.pop(table, None)
+
+                return False
+
+            if self._snapshots.get(table, (None, None))[1] != signature:
+                self._snapshots[table] = (self._write_snapshot(table), signature)
+
+            # Unmarked as loaded first, so placeholders wait on the lock:
+            del self._parsed_files[table]
+            self._row_hashes.pop(table, None)
+            self._evicted.add(table)
+
+            for attr in self._TABLES[table][3]:
+                setattr(self, attr, _EvictedTable(self, table, attr))
+
+            self._invalidate_indexes(table)
+
+            with self._residency_lock:
+                self._table_sizes.pop(table, None)
+                self._evictions[table] += 1
+
+            return True
+        finally:
+            lock.release()
+
+    def _write_snapshot(self, table):
+        """Writes the attributes of table, packed, to a snapshot file,
+           returning its path
+        """
+        tables = {}
+
+        for attr in self._TABLES[table][3]:
+            value = getattr(self, attr)
+            tables[attr] = value if isinstance(value, PackedTable) else pack(value)
+
+        with self._residency_lock:
+            if self._snapshot_dir is None:
+                self._snapshot_dir = tempfile.mkdtemp(prefix="libchebipy-")
+                weakref.finalize(self, shutil.rmtree, self._snapshot_dir, True)
+
+            path = os.path.join(self._snapshot_dir, table + ".lcpk")
+
+        # A snapshot being read through a memory map is left intact:
+        with open(path + ".part", "wb") as snapshot_file:
+            snapshot_file.write(dumps(tables))
+
+        os.replace(path + ".part", path)
+        return path
+
+    def _reload_table(self, table):
+        """Reads an evicted table back from its snapshot, memory mapped, or
+           parses it again if the snapshot has gone
+        """
+        path, signature = self._snapshots[table]
+        self._evicted.discard(table)
+
+        try:
+            with open(path, "rb") as snapshot_file:
+                buf = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (IOError, OSError, ValueError):
+            self._reset_table(table)
+            getattr(self, "_parse_" + table)()
+            return
+
+        tables, _ = loads(buf)
+
+        for attr in self._TABLES[table][3]:
+            setattr(self, attr, tables[attr])
+
+        self._invalidate_indexes(table)
+        self._parsed_files[table] = signature
+
+        with self._residency_lock:
+            self._reloads[table] += 1
+
+    def _parse_table(self, table):
+        """Gets and parses the flat file of table"""
+        filepath = self.get_file(self._TABLES[table][0])
+        start = time.perf_counter()
+        rows, row_hashes = self._parse_file(self, table, filepath)
+
+        if self.packed:
+            for attr in self._TABLES[table][3]:
+                setattr(self, attr, pack(getattr(self, attr)))
+        else:
+            self._row_hashes[table] = row_hashes
+
+        self._invalidate_indexes(table)
+        self._parsed_files[table] = _get_file_signature(filepath)
+
+        if self._metrics is not None:
+            self._metrics.record(
+                "parse",
+                table,
+                time.perf_counter() - start,
+                rows=rows,
+                bytes=self._parsed_files[table][2],
+            )
+
+    def _parse_file(self, parser, table, filepath):
+        """Adds the rows of a flat file of table to the attributes of parser
+           (this parser, or one holding new tables), returning the number of
+           rows and a dict of ChEBI id to hash of all raw rows with that id
+           (or None if packed, as packed tables are never updated in place)
+        """
+        add = getattr(parser, "_add_" + table)
+        _, delimiter, key_column, _ = self._TABLES[table]
+        row_hashes = None if self.packed else {}
+        rows = 0
+
+        for block in _read_blocks(filepath):
+            if row_hashes is not None:
+                _hash_lines(block, delimiter, key_column, row_hashes)
+
+            for tokens in _split_rows(block, delimiter):
+                add(tokens)
+                rows += 1
+
+        self._join_rows(parser, table)
+        return rows, row_hashes
+
+    def _parse_lines(self, table, lines, chebi_ids):
+        """Returns new tables (see _new_tables) of the rows of chebi_ids in
+           lines, a list of (ChEBI id, raw row) in file order
+        """
+        parsed = self._new_tables(table)
+        add = getattr(parsed, "_add_" + table)
+        block = b"".join(
+            line + b"\n" for chebi_id, line in lines if chebi_id in chebi_ids
+        )
+
+        for tokens in _split_rows(block, self._TABLES[table][1]):
+            add(tokens)
+
+        self._join_rows(parsed, table)
+        return parsed
+
+    def _new_tables(self, table):
+        """Returns an uninitialised parser holding only empty attributes of
+           table, for rows to be parsed into
+        """
+        parsed = object.__new__(type(self))
+
+        for attr in self._TABLES[table][3]:
+            setattr(parsed, attr, {})
+
+        return parsed
+
+    def _get_cross_id_keys(self, attr, chebi_id):
+        """Returns the keys of attr (one of _CROSS_ID_ATTRS) that the rows of
+           chebi_id add to
+        """
+        if attr == "_ALL_IDS":
+            parent_id = self._PARENT_IDS.get(chebi_id, float("NaN"))
+            return [chebi_id] if math.isnan(parent_id) else [chebi_id, parent_id]
+
+        return [
+            int(relation.get_target_chebi_id()[6:])
+            for relation in self._OUTGOINGS.get(chebi_id, [])
+        ]
+
+    def _get_cross_id_sources(self, attr, value):
+        """Returns the ChEBI ids of the rows that added to value, a value of
+           attr (one of _CROSS_ID_ATTRS)
+        """
+        if attr == "_ALL_IDS":
+            return value
+
+        return [int(relation.get_target_chebi_id()[6:]) for relation in value]
+
+    def _read_indexed(self, filename, chebi_ids):
+        """Returns the rows of chebi_ids in filename, as bytes ending in a
+           newline, read by range from storage with an offset index (see
+           offsetindex), or None if filename must be read whole through
+           get_file
+        """
+        return None
+
+    def _reset_table(self, table):
+        """Replaces the attributes of table with empty dicts"""
+        for attr in self._TABLES[table][3]:
+            setattr(self, attr, {})
+
+        self._invalidate_indexes(table)
+
+    def _invalidate_indexes(self, table):
+        """Discards the indexes of table, once its attributes have been
+           replaced
+        """
+        self._table_generations[table] += 1
+
+        for attr in self._TABLES[table][3]:
+            self._indexes.pop(attr, None)
+
+    def _put_row(self, table, chebi_id, fields):
+        """Appends the fields of a row to the rows of chebi_id in table.
+           Rows are collected in a list per ChEBI id while parsing, then kept
+           as a single string (see _join_rows), and model objects are only
+           built by getters (see _get_rows).
+        """
+        row = "\t".join(fields)
+
+        if chebi_id in table:
+            table[chebi_id].append(row)
+        else:
+            table[chebi_id] = [row]
+
+    def _join_rows(self, parser, table):
+        """Joins the rows of each ChEBI id in the raw row attributes of table
+           in parser, once parsed, into a single string, so that each row is
+           copied once rather than on every append
+        """
+        for attr in self._ROW_ATTRS.intersection(self._TABLES[table][3]):
+            values = getattr(parser, attr)
+
+            for chebi_id, rows in values.items():
+                values[chebi_id] = "\n".join(rows)
+
     def _put_all_ids(self, parent_id, child_id):
         """Add a parent and child id to the list of all ids"""
         if parent_id in self._ALL_IDS:
@@ -196,14 +1021,11 @@ class ParserBase:
 
     def get_database_accessions(self, chebi_id):
         """Returns database accession"""
-        if not self._DATABASE_ACCESSIONS:
-            self._parse_database_accessions()
-
-        return (
-            self._DATABASE_ACCESSIONS[chebi_id]
-            if chebi_id in self._DATABASE_ACCESSIONS
-            else []
-        )
+        self._load_table("database_accessions")
+        return [
+            DatabaseAccession(fields[1], fields[2], fields[0])
+            for fields in _get_rows(self._DATABASE_ACCESSIONS, chebi_id)
+        ]
 
     def get_all_database_accessions(self, chebi_ids):
         """Returns all database accessions"""
@@ -214,15 +1036,16 @@ class ParserBase:
 
     def get_inchi(self, chebi_id):
         """Returns InChI string"""
-        if not self._INCHIS:
-            self._parse_inchi()
+        self._load_table("inchi")
         return self._INCHIS[chebi_id] if chebi_id in self._INCHIS else None
 
     def get_names(self, chebi_id):
         """Returns names"""
-        if not self._ALL_NAMES:
-            self._parse_names()
-        return self._ALL_NAMES[chebi_id] if chebi_id in self._ALL_NAMES else []
+        self._load_table("names")
+        return [
+            Name(fields[2], fields[0], fields[1], fields[3] == "T", fields[4])
+            for fields in _get_rows(self._ALL_NAMES, chebi_id)
+        ]
 
     def get_all_names(self, chebi_ids):
         """Returns all names"""
@@ -231,8 +1054,7 @@ class ParserBase:
 
     def get_outgoings(self, chebi_id):
         """Returns outgoings"""
-        if not self._OUTGOINGS:
-            self._parse_relation()
+        self._load_table("relation")
         return self._OUTGOINGS[chebi_id] if chebi_id in self._OUTGOINGS else []
 
     def get_all_outgoings(self, chebi_ids):
@@ -242,8 +1064,7 @@ class ParserBase:
 
     def get_incomings(self, chebi_id):
         """Returns incomings"""
-        if not self._INCOMINGS:
-            self._parse_relation()
+        self._load_table("relation")
         return self._INCOMINGS[chebi_id] if chebi_id in self._INCOMINGS else []
 
     def get_all_incomings(self, chebi_ids):
@@ -251,18 +1072,95 @@ class ParserBase:
         all_incomings = [self.get_incomings(chebi_id) for chebi_id in chebi_ids]
         return [x for sublist in all_incomings for x in sublist]
 
+    def get_ids_by_name(self, name):
+        """Returns ids of compounds with name (or synonym) name, ignoring
+           case, in ascending order
+        """
+        name = name.lower()
+        chebi_ids = set(self._get_index("compounds", "_NAMES", _index_names).get(name, []))
+        chebi_ids.update(
+            self._get_index("names", "_ALL_NAMES", _index_all_names).get(name, [])
+        )
+        return sorted(chebi_ids)
+
+    def get_ids_by_inchi_key(self, inchi_key):
+        """Returns ids of compounds with InChI key inchi_key, in ascending
+           order
+        """
+        inchi_keys = self._get_index("structures", "_INCHI_KEYS", _index_structures)
+        return sorted(inchi_keys.get(inchi_key, []))
+
+    def get_ids_by_mass(self, min_mass, max_mass):
+        """Returns ids of compounds with a mass between min_mass and max_mass
+           inclusive, in ascending order of mass
+        """
+        masses, chebi_ids = self._get_index("chemical_data", "_MASSES", _index_masses)
+        start = bisect.bisect_left(masses, min_mass)
+        end = bisect.bisect_right(masses, max_mass)
+        return list(chebi_ids[start:end])
+
+    def get_ids_by_accession(self, accession_number, typ=None):
+        """Returns ids of compounds with a database accession of
+           accession_number (and type typ, if given), in ascending order
+        """
+        accessions = self._get_index(
+            "database_accessions", "_DATABASE_ACCESSIONS", _index_accessions
+        )
+        return sorted(
+            set(
+                chebi_id
+                for chebi_id, accession_typ in accessions.get(accession_number, [])
+                if typ is None or accession_typ == typ
+            )
+        )
+
+    def get_ancestors(self, chebi_id, types=("is_a",)):
+        """Returns ids of all compounds reachable from chebi_id through
+           outgoing relations of types, nearest first
+        """
+        self._load_table("relation")
+        ancestors = []
+        seen = {chebi_id}
+        queue = [chebi_id]
+
+        for source_id in queue:
+            for relation in self._OUTGOINGS.get(source_id, []):
+                if relation.get_type() in types:
+                    target_id = int(relation.get_target_chebi_id()[6:])
+
+                    if target_id not in seen:
+                        seen.add(target_id)
+                        ancestors.append(target_id)
+                        queue.append(target_id)
+
+        return ancestors
+
     def get_inchi_key(self, chebi_id):
         """Returns InChI key"""
-        if not self._INCHI_KEYS:
-            self._parse_structures()
+        self._load_table("structures")
         return self._INCHI_KEYS[chebi_id] if chebi_id in self._INCHI_KEYS else None
 
     def get_smiles(self, chebi_id):
         """Returns InChI key"""
-        if not self._SMILES:
-            self._parse_structures()
+        self._load_table("structures")
         return self._SMILES[chebi_id] if chebi_id in self._SMILES else None
 
+    def _get_index(self, table, attr, build):
+        """Returns the index of attribute attr of table returned by build,
+           building it again once the table has been reloaded or updated
+        """
+        self._load_table(table)
+
+        with self._table_locks[table]:
+            generation = self._table_generations[table]
+            cached = self._indexes.get(attr)
+
+            if cached is None or cached[0] != generation:
+                cached = (generation, build(getattr(self, attr)))
+                self._indexes[attr] = cached
+
+        return cached[1]
+
     def _get_last_update_time(self):
         """Returns last FTP site update time"""
         now = datetime.datetime.utcnow()
@@ -296,20 +1194,28 @@ class ParserBase:
 
         elif filepath.endswith(".gz"):
             unzipped_filepath = filepath[: -len(".gz")]
-            if os.path.exists(unzipped_filepath) and self._is_current(
+
+            # Extracted files carry the mtime of their archive, so that a
+            # changed archive is always re-extracted
+            if os.path.exists(unzipped_filepath) and os.path.getmtime(
                 unzipped_filepath
-            ):
+            ) == os.path.getmtime(filepath):
                 filepath = unzipped_filepath
             else:
                 input_file = gzip.open(filepath, "rb")
                 filepath = os.path.join(destination, input_file.name[: -len(".gz")])
-                output_file = open(filepath, "wb")
 
-                for line in input_file:
-                    output_file.write(line)
+                # Extract to a temporary file so readers never see partial data
+                file_descriptor, tmp_filepath = tempfile.mkstemp(dir=destination)
+
+                with os.fdopen(file_descriptor, "wb") as output_file:
+                    for line in input_file:
+                        output_file.write(line)
 
                 input_file.close()
-                output_file.close()
+                archive_mtime = os.path.getmtime(input_file.name)
+                os.utime(tmp_filepath, (archive_mtime, archive_mtime))
+                os.replace(tmp_filepath, filepath)
 
         return filepath
 
@@ -319,180 +1225,105 @@ class ParserBase:
 
     def _parse_chemical_data(self):
         """Gets and parses file using the local filesystem"""
-        filename = self.get_file("chemical_data.tsv")
-
-        with io.open(filename, "r", encoding="cp1252") as textfile:
-            next(textfile)
+        self._parse_table("chemical_data")
 
-            for line in textfile:
-                tokens = line.strip().split("\t")
+    def _add_chemical_data(self, tokens):
+        """Adds a row of chemical_data.tsv"""
+        if tokens[3] == "FORMULA":
+            # Many seemingly contradictory formulae exist,
+            # depending upon the source database
+            chebi_id = int(tokens[1])
 
-                if tokens[3] == "FORMULA":
-                    # Many seemingly contradictory formulae exist,
-                    # depending upon the source database
-                    chebi_id = int(tokens[1])
+            if chebi_id not in self._FORMULAE:
+                self._FORMULAE[chebi_id] = []
 
-                    if chebi_id not in self._FORMULAE:
-                        self._FORMULAE[chebi_id] = []
+            # Append formula:
+            form = Formula(tokens[4], tokens[2])
+            self._FORMULAE[chebi_id].append(form)
 
-                    # Append formula:
-                    form = Formula(tokens[4], tokens[2])
-                    self._FORMULAE[chebi_id].append(form)
+        elif tokens[3] == "MASS":
+            self._MASSES[int(tokens[1])] = float(tokens[4])
 
-                elif tokens[3] == "MASS":
-                    self._MASSES[int(tokens[1])] = float(tokens[4])
-
-                elif tokens[3] == "CHARGE":
-                    self._CHARGES[int(tokens[1])] = int(
-                        tokens[4] if tokens[4][-1] != "-" else "-" + tokens[4][:-1]
-                    )
+        elif tokens[3] == "CHARGE":
+            self._CHARGES[int(tokens[1])] = int(
+                tokens[4] if tokens[4][-1] != "-" else "-" + tokens[4][:-1]
+            )
 
     def _parse_comments(self):
         """Gets and parses file"""
+        self._parse_table("comments")
 
-        filename = self.get_file("comments.tsv")
-
-        with io.open(filename, "r", encoding="cp1252") as textfile:
-            next(textfile)
-
-            for line in textfile:
-                tokens = line.strip().split("\t")
-                chebi_id = int(tokens[1])
-
-                if chebi_id not in self._COMMENTS:
-                    self._COMMENTS[chebi_id] = []
-
-                # Append Comment:
-                com = Comment(
-                    tokens[3],
-                    tokens[4],
-                    tokens[5],
-                    datetime.datetime.strptime(tokens[2], "%Y-%M-%d"),
-                )
-
-                self._COMMENTS[chebi_id].append(com)
+    def _add_comments(self, tokens):
+        """Adds a row of comments.tsv"""
+        self._put_row(self._COMMENTS, int(tokens[1]), tokens[2:6])
 
     def _parse_compound_origins(self):
         """Gets and parses file"""
-        filename = self.get_file("compound_origins.tsv")
-
-        with io.open(filename, "r", encoding="cp1252") as textfile:
-            next(textfile)
-
-            for line in textfile:
-                tokens = line.strip().split("\t")
-
-                if len(tokens) > 10:
-                    chebi_id = int(tokens[1])
-
-                    if chebi_id not in self._COMPOUND_ORIGINS:
-                        self._COMPOUND_ORIGINS[chebi_id] = []
-
-                    # Append CompoundOrigin:
-                    comp_orig = CompoundOrigin(
-                        tokens[2],
-                        tokens[3],
-                        tokens[4],
-                        tokens[5],
-                        tokens[6],
-                        tokens[7],
-                        tokens[8],
-                        tokens[9],
-                        tokens[10],
-                    )
-                    self._COMPOUND_ORIGINS[chebi_id].append(comp_orig)
+        self._parse_table("compound_origins")
+
+    def _add_compound_origins(self, tokens):
+        """Adds a row of compound_origins.tsv"""
+        if len(tokens) > 10:
+            self._put_row(self._COMPOUND_ORIGINS, int(tokens[1]), tokens[2:11])
 
     def _parse_compounds(self):
         """Gets and parses file"""
+        self._parse_table("compounds")
 
-        filename = self.get_file("compounds.tsv.gz")
+    def _add_compounds(self, tokens):
+        """Adds a row of compounds.tsv"""
+        chebi_id = int(tokens[0])
 
-        with io.open(filename, "r", encoding="cp1252") as textfile:
-            next(textfile)
+        self._STATUSES[chebi_id] = tokens[1]
+        self._SOURCES[chebi_id] = tokens[3]
 
-            for line in textfile:
-                tokens = line.strip().split("\t")
-                chebi_id = int(tokens[0])
+        parent_id_token = tokens[4]
+        self._PARENT_IDS[chebi_id] = (
+            float("NaN") if parent_id_token == "null" else int(parent_id_token)
+        )
+        self._put_all_ids(chebi_id, chebi_id)
 
-                self._STATUSES[chebi_id] = tokens[1]
-                self._SOURCES[chebi_id] = tokens[3]
+        if parent_id_token != "null":
+            parent_id = int(parent_id_token)
+            self._put_all_ids(parent_id, chebi_id)
 
-                parent_id_token = tokens[4]
-                self._PARENT_IDS[chebi_id] = (
-                    float("NaN") if parent_id_token == "null" else int(parent_id_token)
-                )
-                self._put_all_ids(chebi_id, chebi_id)
-
-                if parent_id_token != "null":
-                    parent_id = int(parent_id_token)
-                    self._put_all_ids(parent_id, chebi_id)
-
-                self._NAMES[chebi_id] = None if tokens[5] == "null" else tokens[5]
-                self._DEFINITIONS[chebi_id] = None if tokens[6] == "null" else tokens[6]
-                self._MODIFIED_ONS[chebi_id] = (
-                    None
-                    if tokens[7] == "null"
-                    else datetime.datetime.strptime(tokens[7], "%Y-%m-%d")
-                )
-                self._CREATED_BYS[chebi_id] = (
-                    None if tokens[8] == "null" or len(tokens) == 9 else tokens[8]
-                )
-                self._STARS[chebi_id] = (
-                    float("NaN")
-                    if tokens[9 if len(tokens) > 9 else 8] == "null"
-                    else int(tokens[9 if len(tokens) > 9 else 8])
-                )
+        self._NAMES[chebi_id] = None if tokens[5] == "null" else tokens[5]
+        self._DEFINITIONS[chebi_id] = None if tokens[6] == "null" else tokens[6]
+        self._MODIFIED_ONS[chebi_id] = (
+            _NULL_DATE if tokens[7] == "null" else _get_date_int(tokens[7])
+        )
+        self._CREATED_BYS[chebi_id] = (
+            None if tokens[8] == "null" or len(tokens) == 9 else tokens[8]
+        )
+        self._STARS[chebi_id] = (
+            float("NaN")
+            if tokens[9 if len(tokens) > 9 else 8] == "null"
+            else int(tokens[9 if len(tokens) > 9 else 8])
+        )
 
     def _parse_database_accessions(self):
         """Gets and parses file"""
+        self._parse_table("database_accessions")
 
-        filename = self.get_file("database_accession.tsv")
-
-        with io.open(filename, "r", encoding="cp1252") as textfile:
-            next(textfile)
-
-            for line in textfile:
-                tokens = line.strip().split("\t")
-                chebi_id = int(tokens[1])
-
-                if chebi_id not in self._DATABASE_ACCESSIONS:
-                    self._DATABASE_ACCESSIONS[chebi_id] = []
-
-                # Append DatabaseAccession:
-                dat_acc = DatabaseAccession(tokens[3], tokens[4], tokens[2])
-                self._DATABASE_ACCESSIONS[chebi_id].append(dat_acc)
+    def _add_database_accessions(self, tokens):
+        """Adds a row of database_accession.tsv"""
+        self._put_row(self._DATABASE_ACCESSIONS, int(tokens[1]), tokens[2:5])
 
     def _parse_inchi(self):
         """Gets and parses file"""
+        self._parse_table("inchi")
 
-        filename = self.get_file("chebiId_inchi.tsv")
-
-        with io.open(filename, "r", encoding="cp1252") as textfile:
-            next(textfile)
-
-            for line in textfile:
-                tokens = line.strip().split("\t")
-                self._INCHIS[int(tokens[0])] = tokens[1]
+    def _add_inchi(self, tokens):
+        """Adds a row of chebiId_inchi.tsv"""
+        self._INCHIS[int(tokens[0])] = tokens[1]
 
     def _parse_names(self):
         """Gets and parses file"""
+        self._parse_table("names")
 
-        filename = self.get_file("names.tsv.gz")
-
-        with io.open(filename, "r", encoding="cp1252") as textfile:
-            next(textfile)
-
-            for line in textfile:
-                tokens = line.strip().split("\t")
-                chebi_id = int(tokens[1])
-
-                if chebi_id not in self._ALL_NAMES:
-                    self._ALL_NAMES[chebi_id] = []
-
-                # Append Name:
-                nme = Name(tokens[4], tokens[2], tokens[3], tokens[5] == "T", tokens[6])
-
-                self._ALL_NAMES[chebi_id].append(nme)
+    def _add_names(self, tokens):
+        """Adds a row of names.tsv"""
+        self._put_row(self._ALL_NAMES, int(tokens[1]), tokens[2:7])
 
     def get_references(self, chebi_ids):
         """Returns references"""
@@ -500,93 +1331,131 @@ class ParserBase:
         references = []
         chebi_ids = [str(chebi_id) for chebi_id in chebi_ids]
 
-        filename = self.get_file("reference.tsv.gz")
+        data = self._read_indexed("reference.tsv.gz", chebi_ids)
 
-        with io.open(filename, "r", encoding="cp1252") as textfile:
-            next(textfile)
-
-            for line in textfile:
-                tokens = line.strip().split("\t")
+        if data is None:
+            rows = _read_rows(self.get_file("reference.tsv.gz"), "\t")
+        else:
+            rows = _split_rows(data, "\t")
 
-                if tokens[0] in chebi_ids:
-                    # Append Reference:
-                    if len(tokens) > 3:
-                        ref = Reference(tokens[1], tokens[2], tokens[3], tokens[4])
-                    else:
-                        ref = Reference(tokens[1], tokens[2])
+        for tokens in rows:
+            if tokens[0] in chebi_ids:
+                # Append Reference:
+                if len(tokens) > 3:
+                    ref = Reference(tokens[1], tokens[2], tokens[3], tokens[4])
+                else:
+                    ref = Reference(tokens[1], tokens[2])
 
-                    references.append(ref)
+                references.append(ref)
         return references
 
     def _parse_relation(self):
         """Gets and parses file"""
+        self._parse_table("relation")
 
-        relation_filename = self.get_file("relation.tsv")
-        relation_textfile = open(relation_filename, "r")
+    def _add_relation(self, tokens):
+        """Adds a row of relation.tsv"""
+        source_chebi_id = int(tokens[3])
+        target_chebi_id = int(tokens[2])
+        typ = tokens[1]
 
-        next(relation_textfile)
+        if source_chebi_id not in self._OUTGOINGS:
+            self._OUTGOINGS[source_chebi_id] = []
 
-        for line in relation_textfile:
-            tokens = line.strip().split("\t")
+        if target_chebi_id not in self._INCOMINGS:
+            self._INCOMINGS[target_chebi_id] = []
 
-            source_chebi_id = int(tokens[3])
-            target_chebi_id = int(tokens[2])
-            typ = tokens[1]
+        target_relation = Relation(typ, str(target_chebi_id), tokens[4])
+        source_relation = Relation(typ, str(source_chebi_id), tokens[4])
 
-            if source_chebi_id not in self._OUTGOINGS:
-                self._OUTGOINGS[source_chebi_id] = []
+        self._OUTGOINGS[source_chebi_id].append(target_relation)
+        self._INCOMINGS[target_chebi_id].append(source_relation)
+
+    def get_mol(self, chebi_id):
+        """Returns mol"""
+        with self._mol_store_lock:
+            mol_store = self._mol_store
+            complete = self._mol_store_complete
 
-            if target_chebi_id not in self._INCOMINGS:
-                self._INCOMINGS[target_chebi_id] = []
+        if mol_store is not None:
+            try:
+                structure = mol_store.get(int(str(chebi_id)))
+            except ValueError:
+                return None
 
-            target_relation = Relation(typ, str(target_chebi_id), tokens[4])
-            source_relation = Relation(typ, str(source_chebi_id), tokens[4])
+            if structure is not None or complete:
+                return structure
 
-            self._OUTGOINGS[source_chebi_id].append(target_relation)
-            self._INCOMINGS[target_chebi_id].append(source_relation)
+        for _, structure in self.iter_mols([chebi_id]):
+            return structure
 
-    def get_mol(self, chebi_id):
-        """Returns mol"""
+        return None
 
-        chebi_id_regexp = "^\\d+\\," + str(chebi_id) + "\\,.*"
+    def load_mol_store(self, chebi_ids=None, **kwargs):
+        """Holds the default mol blocks of chebi_ids (by default, of all
+           compounds) in memory, compressed (see MolStore.build, given
+           kwargs), so that get_mol need not read structures.csv.gz. Returns
+           the MolStore.
+        """
+        mol_store = MolStore.build(self.iter_mols(chebi_ids), **kwargs)
+        self._set_mol_store(mol_store, chebi_ids is None)
+        return mol_store
+
+    def _set_mol_store(self, mol_store, complete):
+        """Replaces the mol store, and whether it covers all compounds"""
+        with self._mol_store_lock:
+            self._mol_store = mol_store
+            self._mol_store_complete = complete
+
+    def iter_mols(self, chebi_ids=None):
+        """Yields (ChEBI id, Structure) of the default mol block of each of
+           chebi_ids (by default, of all compounds), in file order, reading
+           structures.csv.gz once and holding one mol block at a time
+        """
         mol_file_end_regexp = '",mol,\\dD,[Y\\|N],[Y\\|N]$'
-        this_structure = []
+        data = None
 
-        filename = self.get_file("structures.csv.gz")
+        if chebi_ids is not None:
+            chebi_ids = set(str(chebi_id) for chebi_id in chebi_ids)
+            data = self._read_indexed("structures.csv.gz", chebi_ids)
 
-        with io.open(filename, "r", encoding="cp1252") as textfile:
-            in_chebi_id = False
+        if data is None:
+            lines = _read_lines(self.get_file("structures.csv.gz"))
+            next(lines, None)
+        else:
+            lines = _decode_lines(io.BytesIO(data))
 
-            next(textfile)
+        chebi_id = None
+        this_structure = []
 
-            for line in textfile:
-                if in_chebi_id or line[0].isdigit():
-                    if re.match(chebi_id_regexp, line):
-                        tokens = line.strip().split(",")
-                        in_chebi_id = True
-                        this_structure = []
-                        this_structure.append(",".join(tokens[2:]).replace('"', ""))
-                        this_structure.append("\n")
-                    elif in_chebi_id:
+        for line in lines:
+            if chebi_id is not None or line[:1].isdigit():
+                match = _MOL_START.match(line)
 
-                        if re.match(mol_file_end_regexp, line):
-                            tokens = line.strip().split(",")
+                if match and (chebi_ids is None or match.group(1) in chebi_ids):
+                    tokens = line.strip().split(",")
+                    chebi_id = match.group(1)
+                    this_structure = []
+                    this_structure.append(",".join(tokens[2:]).replace('"', ""))
+                    this_structure.append("\n")
+                elif chebi_id is not None:
 
-                            if self._is_default_structure(tokens[3]):
-                                tokens = line.strip().split(",")
-                                this_structure.append(tokens[0].replace('"', ""))
-                                return Structure(
-                                    "".join(this_structure),
-                                    Structure.mol,
-                                    int(tokens[2][0]),
-                                )
+                    if re.match(mol_file_end_regexp, line):
+                        tokens = line.strip().split(",")
+
+                        if self._is_default_structure(tokens[3]):
+                            this_structure.append(tokens[0].replace('"', ""))
+                            yield int(chebi_id), Structure(
+                                "".join(this_structure),
+                                Structure.mol,
+                                int(tokens[2][0]),
+                            )
 
-                            # else:
-                            this_structure = []
-                            in_chebi_id = False
-                            continue
+                        this_structure = []
+                        chebi_id = None
+                        continue
 
-                        this_structure.append(line)
+                    this_structure.append(line)
 
     def get_mol_filename(self, chebi_id):
         """Returns mol file"""
@@ -595,7 +1464,7 @@ class ParserBase:
         if mol is None:
             return None
 
-        file_descriptor, mol_filename = tempfile.mkstemp(str(chebi_id) + "_", ".mol")
+        file_descriptor, mol_filename = tempfile.mkstemp(".mol", str(chebi_id) + "_")
         with open(mol_filename, "w") as mol_file:
             mol_file.write(mol.get_structure())
         os.close(file_descriptor)
@@ -603,20 +1472,274 @@ class ParserBase:
 
     def _parse_structures(self):
         """COMMENT"""
-        filename = self.get_file("structures.csv.gz")
+        self._parse_table("structures")
+
+    def _add_structures(self, tokens):
+        """Adds a row of structures.csv"""
+        if len(tokens) == 7:
+            if tokens[3] == "InChIKey":
+                self._INCHI_KEYS[int(tokens[1])] = Structure(
+                    tokens[2], Structure.InChIKey, int(tokens[4][0])
+                )
+            elif tokens[3] == "SMILES":
+                self._SMILES[int(tokens[1])] = Structure(
+                    tokens[2], Structure.SMILES, int(tokens[4][0])
+                )
 
-        with io.open(filename, "r", encoding="cp1252") as textfile:
-            next(textfile)
 
-            for line in textfile:
-                tokens = line.strip().split(",")
+class _EvictedTable:
+    """Stands in for an attribute of a table evicted under a memory budget.
+       Any access reloads the table and is passed on to the reloaded
+       attribute, so getters that read the attribute before its eviction
+       still see the table.
+    """
 
-                if len(tokens) == 7:
-                    if tokens[3] == "InChIKey":
-                        self._INCHI_KEYS[int(tokens[1])] = Structure(
-                            tokens[2], Structure.InChIKey, int(tokens[4][0])
-                        )
-                    elif tokens[3] == "SMILES":
-                        self._SMILES[int(tokens[1])] = Structure(
-                            tokens[2], Structure.SMILES, int(tokens[4][0])
-                        )
+    def __init__(self, parser, table, attr):
+        self._parser = parser
+        self._table = table
+        self._attr = attr
+
+    def _get_value(self):
+        """Returns the attribute, reloading its table"""
+        self._parser._load_table(self._table)
+        return getattr(self._parser, self._attr)
+
+    def __getattr__(self, name):
+        return getattr(self._get_value(), name)
+
+    def __contains__(self, key):
+        return key in self._get_value()
+
+    def __getitem__(self, key):
+        return self._get_value()[key]
+
+    def __iter__(self):
+        return iter(self._get_value())
+
+    def __len__(self):
+        return len(self._get_value())
+
+    def __bool__(self):
+        return bool(self._get_value())
+
+
+def _get_size(value, seen=None):
+    """Returns the deep size in bytes of a table attribute: the buffers of a
+       PackedTable, or an object with the objects it holds (the items of
+       containers, and the attributes of model objects). Objects whose ids
+       are in seen, if given, are not counted, and counted ones are added.
+    """
+    if isinstance(value, PackedTable):
+        return sum(memoryview(buffer).nbytes for buffer in value.buffers.values())
+
+    if seen is not None:
+        if id(value) in seen:
+            return 0
+
+        seen.add(id(value))
+
+    size = sys.getsizeof(value)
+
+    if isinstance(value, dict):
+        size += sum(
+            _get_size(key, seen) + _get_size(item, seen)
+            for key, item in value.items()
+        )
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(_get_size(item, seen) for item in value)
+    elif hasattr(value, "__dict__"):
+        size += _get_size(vars(value), seen)
+
+    return size
+
+
+def _get_rows(table, chebi_id):
+    """Returns the fields of each row of chebi_id stored by _put_row"""
+    rows = table.get(chebi_id)
+    return [] if rows is None else [row.split("\t") for row in rows.split("\n")]
+
+
+def _index_names(names):
+    """Returns a dict of lower case compound name to ids"""
+    index = {}
+
+    for chebi_id, name in names.items():
+        if name is not None:
+            index.setdefault(name.lower(), []).append(chebi_id)
+
+    return index
+
+
+def _index_all_names(all_names):
+    """Returns a dict of lower case name, from rows of names.tsv, to ids"""
+    index = {}
+
+    for chebi_id, rows in all_names.items():
+        for row in rows.split("\n"):
+            index.setdefault(row.split("\t")[2].lower(), []).append(chebi_id)
+
+    return index
+
+
+def _index_structures(structures):
+    """Returns a dict of structure string to ids"""
+    index = {}
+
+    for chebi_id, structure in structures.items():
+        index.setdefault(structure.get_structure(), []).append(chebi_id)
+
+    return index
+
+
+def _index_masses(masses):
+    """Returns ascending masses, and the ids of each"""
+    pairs = sorted(
+        (mass, chebi_id) for chebi_id, mass in masses.items() if not math.isnan(mass)
+    )
+    return [pair[0] for pair in pairs], [pair[1] for pair in pairs]
+
+
+def _index_accessions(accessions):
+    """Returns a dict of accession number to (id, type) pairs"""
+    index = {}
+
+    for chebi_id, rows in accessions.items():
+        for row in rows.split("\n"):
+            fields = row.split("\t")
+            index.setdefault(fields[2], []).append((chebi_id, fields[1]))
+
+    return index
+
+
+def _get_date_int(date):
+    """Returns a yyyy-mm-dd date as an int, yyyymmdd, which orders as dates
+       do and is only converted to a datetime when read
+    """
+    return int(date[:4]) * 10000 + int(date[5:7]) * 100 + int(date[8:10])
+
+
+def _get_datetime(date_int):
+    """Returns a datetime from an int returned by _get_date_int"""
+    if date_int == _NULL_DATE:
+        return None
+
+    return datetime.datetime(date_int // 10000, date_int // 100 % 100, date_int % 100)
+
+
+def _get_file_signature(filepath):
+    """Returns (filepath, mtime, size), identifying a version of a file"""
+    try:
+        return filepath, os.path.getmtime(filepath), os.path.getsize(filepath)
+    except OSError:
+        return filepath, None, None
+
+
+def _read_rows(filepath, delimiter):
+    """Yields the tokens of each row, after the header, of a flat file.
+
+       Files are read once, as bytes, in blocks of whole lines. ChEBI files
+       are mostly UTF-8 but some fields are in legacy encodings, so blocks
+       that are not valid UTF-8 are decoded line by line and, where needed,
+       field by field, falling back to cp1252 and then latin-1.
+    """
+    for block in _read_blocks(filepath):
+        yield from _split_rows(block, delimiter)
+
+
+def _read_blocks(filepath):
+    """Yields blocks of whole lines, as bytes ending in a newline, after the
+       header of a flat file
+    """
+    with io.open(filepath, "rb") as binfile:
+        next(binfile, None)
+        tail = b""
+
+        for block in iter(functools.partial(binfile.read, _BLOCK_SIZE), b""):
+            block = tail + block
+            end = block.rfind(b"\n") + 1
+            tail = block[end:]
+
+            if end:
+                yield block[:end]
+
+        if tail:
+            yield tail + b"\n"
+
+
+def _hash_lines(block, delimiter, key_column, row_hashes, lines=None):
+    """Hashes each line of a block of bytes into row_hashes, a dict of ChEBI
+       id (read from key_column) to hash of all lines with that id, so that
+       changed rows are found without decoding or parsing them. Lines with
+       no id (such as mol block lines) are skipped. (ChEBI id, line) pairs
+       are appended to lines, if given.
+    """
+    separator = delimiter.encode("ascii")
+
+    for line in block.split(b"\n")[:-1]:
+        try:
+            chebi_id = int(line.split(separator, key_column + 1)[key_column])
+        except (IndexError, ValueError):
+            continue
+
+        row_hashes[chebi_id] = hash((row_hashes.get(chebi_id), line))
+
+        if lines is not None:
+            lines.append((chebi_id, line))
+
+
+def _split_rows(block, delimiter):
+    """Returns the tokens of each line of a block of bytes ending in a
+       newline
+    """
+    rows = []
+    view = memoryview(block)
+    pos = 0
+
+    while pos < len(block):
+        try:
+            text, invalid, pos = str(view[pos:], "utf-8"), None, len(block)
+        except UnicodeDecodeError as err:
+            # Decode the lines before the invalid one as UTF-8, and the
+            # invalid one field by field:
+            start = max(pos, block.rfind(b"\n", pos, pos + err.start) + 1)
+            end = block.index(b"\n", pos + err.start) + 1
+            text, invalid = str(view[pos:start], "utf-8"), block[start:end]
+            pos = end
+
+        rows.extend(line.strip().split(delimiter) for line in text.split("\n")[:-1])
+
+        if invalid is not None:
+            fields = invalid.strip().split(delimiter.encode("ascii"))
+            rows.append([_decode(field) for field in fields])
+
+    return rows
+
+
+def _read_lines(filepath):
+    """Yields each line of a file, decoded as for _read_rows and with
+       universal newlines
+    """
+    with io.open(filepath, "rb") as binfile:
+        yield from _decode_lines(binfile)
+
+
+def _decode_lines(binfile):
+    """Yields each line of a binary file object, as for _read_lines"""
+    for line in binfile:
+        if line.endswith(b"\r\n"):
+            line = line[:-2] + b"\n"
+
+        yield _decode(line)
+
+
+def _decode(data):
+    """Decodes bytes as UTF-8, falling back to cp1252 and then latin-1 (which
+       decodes any bytes)
+    """
+    for encoding in ("utf-8", "cp1252"):
+        try:
+            return data.decode(encoding)
+        except UnicodeDecodeError:
+            pass
+
+    return data.decode("latin-1")
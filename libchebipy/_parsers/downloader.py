@@ -0,0 +1,232 @@
+"""
+libChEBIpy (c) University of Manchester 2015-2020
+
+libChEBIpy is licensed under the MIT License.
+
+To view a copy of this license, visit <http://opensource.org/licenses/MIT/>.
+
+@author:  neilswainston
+"""
+
+import calendar
+import email.utils
+import ftplib
+import hashlib
+import json
+import os.path
+import threading
+import time
+
+import six.moves.urllib.parse as urlparse
+from six.moves.urllib.request import Request, urlopen
+
+
+FTP_URL = "ftp://ftp.ebi.ac.uk/pub/databases/chebi/Flat_file_tab_delimited/"
+
+_CHUNK_SIZE = 1024 * 1024
+
+
+def get_remote_metadata(url, timeout=60):
+    """Returns (size in bytes, modification time in seconds since the epoch)
+       of the file at url. Either is None if the server does not report it.
+    """
+    parsed = urlparse.urlparse(url)
+
+    if parsed.scheme == "ftp":
+        ftp = _ftp_connect(parsed, timeout)
+        try:
+            ftp.voidcmd("TYPE I")
+            size = ftp.size(parsed.path)
+
+            try:
+                # Response is of the form "213 YYYYMMDDHHMMSS"
+                mdtm = ftp.voidcmd("MDTM " + parsed.path).split()[-1]
+                mtime = calendar.timegm(time.strptime(mdtm[:14], "%Y%m%d%H%M%S"))
+            except ftplib.error_perm:
+                mtime = None
+
+            return size, mtime
+        finally:
+            ftp.close()
+
+    response = urlopen(Request(url, method="HEAD"), timeout=timeout)
+    try:
+        length = response.headers.get("Content-Length")
+        last_modified = response.headers.get("Last-Modified")
+        return (
+            None if length is None else int(length),
+            None
+            if last_modified is None
+            else email.utils.parsedate_to_datetime(last_modified).timestamp(),
+        )
+    finally:
+        response.close()
+
+
+class MetadataCache:
+    """Caches remote file metadata for ttl seconds, so that freshness checks
+       do not hit the server on every call. Failed lookups are cached as
+       (None, None) for negative_ttl seconds, so that an unreachable server
+       does not stall every call for the timeout.
+    """
+
+    def __init__(self, ttl=3600, timeout=60, negative_ttl=60):
+        self.ttl = ttl
+        self.timeout = timeout
+        self.negative_ttl = negative_ttl
+        self._metadata = {}
+        self._lock = threading.Lock()
+
+    def get(self, url):
+        """Returns (size, mtime) of the file at url, or (None, None) if the
+           server cannot be reached
+        """
+        with self._lock:
+            cached = self._metadata.get(url)
+
+        if cached is not None and time.time() < cached[0]:
+            return cached[1]
+
+        try:
+            metadata = get_remote_metadata(url, self.timeout)
+            ttl = self.ttl
+        except (IOError, ftplib.Error):
+            metadata = None, None
+            ttl = min(self.ttl, self.negative_ttl)
+
+        with self._lock:
+            self._metadata[url] = (time.time() + ttl, metadata)
+
+        return metadata
+
+    def invalidate(self, url=None):
+        """Forgets cached metadata for url, or for all urls if None"""
+        with self._lock:
+            if url is None:
+                self._metadata.clear()
+            else:
+                self._metadata.pop(url, None)
+
+
+def download(url, filepath, size=None, md5=None, timeout=60, mtime=None):
+    """Downloads url to filepath, resuming any partial download left by an
+       earlier attempt of the same remote version (size and mtime, read from
+       the server unless given). Data lands in filepath + ".part", with the
+       version it is of in filepath + ".part.version", and is moved into
+       place only once its size (and md5, if given) has been verified.
+    """
+    part_filepath = filepath + ".part"
+    version_filepath = part_filepath + ".version"
+
+    if size is None and mtime is None:
+        size, mtime = get_remote_metadata(url, timeout)
+
+    version = {"size": size, "mtime": mtime}
+    offset = os.path.getsize(part_filepath) if os.path.exists(part_filepath) else 0
+
+    # A partial download is only resumed if it is of the same version, which
+    # cannot be told without both size and mtime:
+    if offset and (
+        size is None
+        or mtime is None
+        or offset > size
+        or _read_version(version_filepath) != version
+    ):
+        os.remove(part_filepath)
+        offset = 0
+
+    if not offset:
+        with open(version_filepath, "w") as version_file:
+            json.dump(version, version_file)
+
+    if size is None or offset < size:
+        if urlparse.urlparse(url).scheme == "ftp":
+            _download_ftp(url, part_filepath, offset, timeout)
+        else:
+            _download_http(url, part_filepath, offset, timeout, mtime)
+
+    actual_size = os.path.getsize(part_filepath)
+
+    if size is not None and actual_size != size:
+        raise IOError(
+            "Downloaded %s is %d bytes, expected %d" % (url, actual_size, size)
+        )
+
+    if md5 is not None and _get_md5(part_filepath) != md5.lower():
+        os.remove(part_filepath)
+        raise IOError("Downloaded %s failed md5 check" % url)
+
+    os.replace(part_filepath, filepath)
+    os.remove(version_filepath)
+    return filepath
+
+
+def _read_version(version_filepath):
+    """Returns the version a partial download is of, or None if unknown"""
+    try:
+        with open(version_filepath) as version_file:
+            return json.load(version_file)
+    except (IOError, OSError, ValueError):
+        return None
+
+
+def _download_ftp(url, part_filepath, offset, timeout):
+    """Downloads (the remainder of) an FTP url, appending to part_filepath"""
+    parsed = urlparse.urlparse(url)
+    ftp = _ftp_connect(parsed, timeout)
+
+    try:
+        with open(part_filepath, "ab") as part_file:
+            ftp.retrbinary(
+                "RETR " + parsed.path,
+                part_file.write,
+                blocksize=_CHUNK_SIZE,
+                rest=offset or None,
+            )
+    finally:
+        ftp.close()
+
+
+def _download_http(url, part_filepath, offset, timeout, mtime=None):
+    """Downloads (the remainder of) an HTTP url, appending to part_filepath.
+       The remainder is only sent if the file is still last modified at
+       mtime (If-Range), otherwise the whole file is.
+    """
+    request = Request(url)
+
+    if offset:
+        request.add_header("Range", "bytes=%d-" % offset)
+
+        if mtime is not None:
+            request.add_header("If-Range", email.utils.formatdate(mtime, usegmt=True))
+
+    response = urlopen(request, timeout=timeout)
+
+    try:
+        # Servers that ignore Range send the whole file, so start again:
+        mode = "ab" if offset and response.getcode() == 206 else "wb"
+
+        with open(part_filepath, mode) as part_file:
+            for chunk in iter(lambda: response.read(_CHUNK_SIZE), b""):
+                part_file.write(chunk)
+    finally:
+        response.close()
+
+
+def _ftp_connect(parsed, timeout):
+    """Returns a logged in FTP connection for a parsed url"""
+    ftp = ftplib.FTP(timeout=timeout)
+    ftp.connect(parsed.hostname, parsed.port or 21)
+    ftp.login(parsed.username or "anonymous", parsed.password or "")
+    return ftp
+
+
+def _get_md5(filepath):
+    """Returns hex md5 digest of filepath"""
+    digest = hashlib.md5()
+
+    with open(filepath, "rb") as infile:
+        for chunk in iter(lambda: infile.read(_CHUNK_SIZE), b""):
+            digest.update(chunk)
+
+    return digest.hexdigest()
@@ -11,10 +11,10 @@ import datetime
 import os.path
 
 import six.moves.urllib.parse as urlparse
-from six.moves.urllib.request import urlretrieve, urlcleanup
 
 
 from .base import ParserBase
+from .downloader import FTP_URL, MetadataCache, download
 
 
 class FileSystemCache(ParserBase):
@@ -23,34 +23,75 @@ class FileSystemCache(ParserBase):
        that would warrant opening a file on the filesystem.
     """
 
-    def __init__(self, download_dir=None, auto_update=True):
-        super().__init__(download_dir, auto_update)
+    def __init__(
+        self,
+        download_dir=None,
+        auto_update=True,
+        url=FTP_URL,
+        checksums=None,
+        metadata_ttl=3600,
+        packed=False,
+        timeout=60,
+    ):
+        """Remote file metadata is checked at most every metadata_ttl
+           seconds, and requests to the remote site time out after timeout
+           seconds.
+        """
+        super().__init__(download_dir, auto_update, packed)
+        self.url = url
+        self.checksums = checksums or {}
+        self.timeout = timeout
+        self.metadata = MetadataCache(ttl=metadata_ttl, timeout=timeout)
 
     def get_file(self, filename):
         """Downloads filename from ChEBI FTP site"""
         filepath = os.path.join(self.path, filename)
 
         if not self._is_current(filepath):
-            if not os.path.exists(self.path):
-                os.makedirs(self.path)
+            os.makedirs(self.path, exist_ok=True)
 
-            url = (
-                "ftp://ftp.ebi.ac.uk/pub/databases/chebi/" + "Flat_file_tab_delimited/"
+            size, mtime = self._get_remote_metadata(filename)
+
+            download(
+                urlparse.urljoin(self.url, filename),
+                filepath,
+                size=size,
+                md5=self.checksums.get(filename),
+                timeout=self.timeout,
+                mtime=mtime,
             )
-            urlretrieve(urlparse.urljoin(url, filename), filepath)
-            urlcleanup()
+
+            # Stamp the file with the remote time, so changes can be detected
+            if mtime is not None:
+                os.utime(filepath, (mtime, mtime))
 
         return self._extract_compressed_file(filepath, self.path)
 
     def _is_current(self, filepath):
-        """Checks whether file is current"""
+        """Checks whether file is current, comparing its size and
+           modification time with those of the remote file. Falls back to
+           the expected release date if the remote file cannot be checked.
+        """
         if not self.auto_update:
             return True
 
         if not os.path.isfile(filepath):
             return False
 
-        return (
-            datetime.datetime.utcfromtimestamp(os.path.getmtime(filepath))
-            > self._get_last_update_time()
+        size, mtime = self._get_remote_metadata(os.path.basename(filepath))
+
+        if size is None and mtime is None:
+            return (
+                datetime.datetime.utcfromtimestamp(os.path.getmtime(filepath))
+                > self._get_last_update_time()
+            )
+
+        return (size is None or os.path.getsize(filepath) == size) and (
+            mtime is None or os.path.getmtime(filepath) >= mtime
         )
+
+    def _get_remote_metadata(self, filename):
+        """Returns (size, mtime) of remote filename, or (None, None) if the
+           remote site cannot be reached.
+        """
+        return self.metadata.get(urlparse.urljoin(self.url, filename))
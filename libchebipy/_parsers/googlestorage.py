@@ -12,92 +12,64 @@ import os.path
 import tempfile
 import shutil
 
-import six.moves.urllib.parse as urlparse
+from .downloader import FTP_URL
+from .objectstore import SNAPSHOT_NAME, STAT_CACHE, GoogleStore, ObjectStoreCache
 
-from google.cloud import storage
-import gs_chunked_io as gscio
-import urllib
+__all__ = ["BLOB_METADATA", "SNAPSHOT_NAME", "GoogleStorageCache"]
 
-from .base import ParserBase
+# Blob metadata is cached with that of all object stores
+BLOB_METADATA = STAT_CACHE
 
 
-class GoogleStorageCache(ParserBase):
+class GoogleStorageCache(ObjectStoreCache):
     """Save files in a Google Storage bucket. Since this is likely to use
-       app engine (which does not have write to the filesystem) we do most
-       work in memory.
-    """
+       app engine (which has little writable filesystem) files are copied
+       to a temporary directory, removed with the instance.
 
-    def __init__(self, download_dir=None, auto_update=True):
-        super().__init__(download_dir, auto_update)
-        self._init_bucket()
-        self.path = None
-        self.download_dir = tempfile.mkdtemp()
+       See ObjectStoreCache for snapshots and indexed files.
+    """
 
-    def _init_bucket(self):
-        """Given a GOOGLE_STORAGE_BUCKET in the environment, make a connection
-           to it.
+    def __init__(
+        self,
+        download_dir=None,
+        auto_update=True,
+        packed=False,
+        client=None,
+        bucket_name=None,
+        snapshot=True,
+        metadata_ttl=3600,
+        url=FTP_URL,
+    ):
+        """client is a google.cloud.storage.Client (by default, one is
+           created) and bucket_name defaults to GOOGLE_STORAGE_BUCKET. Blob
+           and FTP file metadata are checked at most every metadata_ttl
+           seconds.
         """
-        self.bucket_name = os.environ.get("GOOGLE_STORAGE_BUCKET")
-        self.storage_prefix = os.environ.get("GOOGLE_STORAGE_PREFIX", "").strip("/")
-        if not self.bucket_name:
+        bucket_name = bucket_name or os.environ.get("GOOGLE_STORAGE_BUCKET")
+
+        if not bucket_name:
             raise ValueError(
                 "GOOGLE_STORAGE_BUCKET is required to be exported in the environment."
             )
 
-        # Instantiates a client to connect to a Google Storage Bucket
-        self.client = storage.Client()
-        self.bucket = self.client.bucket(self.bucket_name)
+        store = GoogleStore(
+            bucket_name,
+            os.environ.get("GOOGLE_STORAGE_PREFIX", "").strip("/"),
+            client,
+        )
+
+        super().__init__(
+            store, download_dir, auto_update, packed, snapshot, metadata_ttl, url
+        )
+        self.bucket_name = bucket_name
+        self.client = store.client
+        self.bucket = store.bucket
+        self.path = self.download_dir = tempfile.mkdtemp()
 
     def __del__(self):
         """Cleanup when the instance is destroyed
         """
-        if os.path.exists(self.download_dir):
-            shutil.rmtree(self.download_dir)
-
-    def get_file(self, filename):
-        """Downloads filename from ChEBI FTP site and saves to Google Storage"""
-        filename = os.path.join(self.storage_prefix, filename)
-        filepath = os.path.join(self.bucket_name, filename)
-
-        # If the temporary download exists, use it
-        tmpfile = os.path.join(self.download_dir, os.path.basename(filepath))
-        if os.path.exists(tmpfile):
-            return tmpfile
-
-        # The blob in storage
-        blob = self.bucket.blob(filename)
-
-        # If the blob doesn't exist or is not current
-        if not self._is_current(filepath):
-
-            url = (
-                "ftp://ftp.ebi.ac.uk/pub/databases/chebi/" + "Flat_file_tab_delimited/"
-            )
-
-            # Upload the original file
-            response = urllib.request.urlopen(urlparse.urljoin(url, filename))
-            with gscio.Writer(filename, self.bucket) as fh:
-                fh.write(response.read())
-
-        # Write to temporary location
-        blob.download_to_filename(tmpfile)
-        return self._extract_compressed_file(tmpfile, self.download_dir)
-
-    def _is_current(self, filepath):
-        """Checks whether file is current"""
-        if not self.auto_update:
-            return True
-
-        # Check if the blob exists
-        blob = self.bucket.blob(filepath)
-        if not blob.exists():
-            return False
-
-        # Make sure we have updated metadata
-        blob.update()
-
-        # This technically shouldn't happen, but might be an edge case
-        if not blob.time_created:
-            return False
+        download_dir = getattr(self, "download_dir", None)
 
-        return blob.time_created.utcnow() > self._get_last_update_time()
+        if download_dir and os.path.exists(download_dir):
+            shutil.rmtree(download_dir)
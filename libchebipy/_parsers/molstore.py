@@ -0,0 +1,172 @@
+"""
+libChEBIpy (c) University of Manchester 2015-2020
+
+libChEBIpy is licensed under the MIT License.
+
+To view a copy of this license, visit <http://opensource.org/licenses/MIT/>.
+
+@author:  neilswainston
+"""
+
+import array
+import bisect
+import collections
+import itertools
+import zlib
+
+from .._structure import Structure
+
+# Largest preset dictionary zlib uses (its window size)
+_MAX_DICT_SIZE = 32 * 1024
+
+# Size of dictionaries trained by default: larger dictionaries compress
+# little better, but cost more to prime on every block compressed or read
+_DICT_SIZE = 4 * 1024
+
+# Columns of a V2000 atom line holding coordinates, which rarely repeat
+_COORDINATES_END = 30
+
+
+class MolStore:
+    """Default mol blocks of many compounds, each compressed on its own
+       against a preset dictionary trained on a sample of them, so that one
+       block is decompressed per access. Ids, offsets and dimensions are
+       held in flat arrays (as in PackedTable) and blocks in a single bytes
+       buffer.
+    """
+
+    def __init__(self, zdict, ids, offsets, dimensions, data):
+        self.zdict = zdict
+        self._ids = ids
+        self._offsets = offsets
+        self._dimensions = dimensions
+        self._data = data
+
+    @classmethod
+    def build(cls, mols, dict_size=_DICT_SIZE, sample_size=1000, level=6):
+        """Returns a store of (ChEBI id, Structure) pairs, such as those
+           yielded by ParserBase.iter_mols, training a dictionary of up to
+           dict_size bytes (0 for none) on the first sample_size blocks
+        """
+        mols = iter(mols)
+        sample = list(itertools.islice(mols, sample_size))
+        zdict = train_dict(
+            [structure.get_structure() for _, structure in sample], dict_size
+        )
+
+        blocks = {}
+        dimensions = {}
+
+        for chebi_id, structure in itertools.chain(sample, mols):
+            # Only the first default block of a compound is kept, as get_mol:
+            if chebi_id not in blocks:
+                compressor = (
+                    zlib.compressobj(level, zdict=zdict)
+                    if zdict
+                    else zlib.compressobj(level)
+                )
+                blocks[chebi_id] = compressor.compress(
+                    structure.get_structure().encode("utf-8")
+                ) + compressor.flush()
+                dimensions[chebi_id] = structure.get_dimension()
+
+        ids = array.array("q", sorted(blocks))
+        offsets = array.array("q", [0])
+        data = bytearray()
+
+        for chebi_id in ids:
+            data += blocks.pop(chebi_id)
+            offsets.append(len(data))
+
+        return cls(
+            zdict,
+            ids,
+            offsets,
+            array.array("b", [dimensions[chebi_id] for chebi_id in ids]),
+            bytes(data),
+        )
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, chebi_id):
+        return self._find(chebi_id) is not None
+
+    def get(self, chebi_id):
+        """Returns the mol Structure of chebi_id, or None"""
+        pos = self._find(chebi_id)
+
+        if pos is None:
+            return None
+
+        decompressor = (
+            zlib.decompressobj(zdict=self.zdict) if self.zdict else zlib.decompressobj()
+        )
+        block = decompressor.decompress(
+            self._data[self._offsets[pos] : self._offsets[pos + 1]]
+        )
+
+        return Structure(block.decode("utf-8"), Structure.mol, self._dimensions[pos])
+
+    def get_size(self):
+        """Returns bytes held by the dictionary, arrays and blocks"""
+        return (
+            len(self.zdict)
+            + len(self._data)
+            + sum(
+                len(values) * values.itemsize
+                for values in (self._ids, self._offsets, self._dimensions)
+            )
+        )
+
+    def _find(self, chebi_id):
+        """Returns position of chebi_id, or None if not present"""
+        if type(chebi_id) is not int:
+            return None
+
+        pos = bisect.bisect_left(self._ids, chebi_id)
+
+        if pos < len(self._ids) and self._ids[pos] == chebi_id:
+            return pos
+
+        return None
+
+
+def train_dict(blocks, dict_size=_DICT_SIZE):
+    """Returns a preset dictionary of up to dict_size bytes (at most 32 kB,
+       zlib's window) of the fragments of blocks (whole lines, and atom
+       lines after their coordinates) that save the most bytes, with the
+       most valuable last, where zlib finds them cheapest
+    """
+    dict_size = min(dict_size, _MAX_DICT_SIZE)
+    counts = collections.Counter()
+
+    for block in blocks:
+        for line in block.splitlines(True):
+            counts[line] += 1
+
+            if len(line) > _COORDINATES_END:
+                counts[line[_COORDINATES_END:]] += 1
+
+    fragments = sorted(
+        (
+            (count * len(fragment), fragment)
+            for fragment, count in counts.items()
+            if count > 1
+        ),
+        reverse=True,
+    )
+
+    chosen = []
+    size = 0
+
+    for _, fragment in fragments:
+        fragment = fragment.encode("utf-8")
+
+        if size + len(fragment) > dict_size:
+            continue
+
+        chosen.append(fragment)
+        size += len(fragment)
+
+    return b"".join(reversed(chosen))
@@ -0,0 +1,607 @@
+"""
+libChEBIpy (c) University of Manchester 2015-2020
+
+libChEBIpy is licensed under the MIT License.
+
+To view a copy of this license, visit <http://opensource.org/licenses/MIT/>.
+
+@author:  neilswainston
+"""
+
+import abc
+import collections
+import datetime
+import gzip
+import json
+import os.path
+import posixpath
+import struct
+import threading
+import time
+
+import six.moves.urllib.parse as urlparse
+
+from .base import ParserBase
+from .downloader import FTP_URL, MetadataCache, download
+from .offsetindex import INDEXED_FILES, OffsetIndex, build_index
+from .packed import dumps, loads
+
+# Name of the snapshot of parsed tables in a store
+SNAPSHOT_NAME = "libchebipy-snapshot.lcpk.gz"
+
+# Offset index objects start with a JSON header, giving the version of the
+# data object they index
+_HEADER_LENGTH = struct.Struct("<I")
+
+# Object store classes, by URL scheme
+_STORES = {}
+
+
+def register_store(scheme, factory):
+    """Registers factory, called with a bucket and prefix, as the object
+       store of URLs with scheme (such as s3://bucket/prefix)
+    """
+    _STORES[scheme] = factory
+
+
+def get_store(url):
+    """Returns the object store of a URL such as s3://bucket/prefix"""
+    scheme, _, path = url.partition("://")
+
+    if scheme not in _STORES:
+        raise ValueError("Unknown object store %s" % url)
+
+    bucket, _, prefix = path.partition("/")
+    return _STORES[scheme](bucket, prefix.strip("/"))
+
+
+class ObjectStore(abc.ABC):
+    """A bucket of objects, named relative to a prefix. A version (such as a
+       generation or etag) identifies the content of an object; reads given
+       a version fail if the object has since changed.
+    """
+
+    def __init__(self, scheme, bucket, prefix=""):
+        self.bucket_name = bucket
+        self.prefix = prefix
+        self.url = "%s://%s/%s" % (scheme, bucket, prefix)
+
+    @abc.abstractmethod
+    def stat(self, name):
+        """Returns a dict of size, version and updated (an aware datetime)
+           of name, or None if it does not exist
+        """
+
+    @abc.abstractmethod
+    def get(self, name, version=None):
+        """Returns the data of name"""
+
+    @abc.abstractmethod
+    def put(self, name, data):
+        """Stores data as name"""
+
+    @abc.abstractmethod
+    def read_range(self, name, start, end, version=None):
+        """Returns bytes start to end (exclusive) of name"""
+
+    def get_file(self, name, filepath, version=None):
+        """Writes the data of name to filepath"""
+        data = self.get(name, version)
+
+        with open(filepath, "wb") as dest:
+            dest.write(data)
+
+    def put_file(self, name, filepath):
+        """Stores the contents of filepath as name"""
+        with open(filepath, "rb") as src:
+            self.put(name, src.read())
+
+    def _get_key(self, name):
+        """Returns the key of name in the bucket"""
+        return posixpath.join(self.prefix, name)
+
+
+class MemoryStore(ObjectStore):
+    """An in-process object store, for tests. Stores of the same bucket
+       share objects, and each counts the calls made through it.
+    """
+
+    _BUCKETS = collections.defaultdict(dict)
+    _LOCK = threading.Lock()
+
+    def __init__(self, bucket, prefix=""):
+        super().__init__("memory", bucket, prefix)
+        self.calls = collections.Counter()
+
+    def stat(self, name):
+        self.calls["stat"] += 1
+        obj = self._BUCKETS[self.bucket_name].get(self._get_key(name))
+
+        if obj is None:
+            return None
+
+        return {
+            "size": len(obj["data"]),
+            "version": obj["version"],
+            "updated": obj["updated"],
+        }
+
+    def get(self, name, version=None):
+        self.calls["get"] += 1
+        return self._get_data(name, version)
+
+    def put(self, name, data, updated=None):
+        """Stores data as name, optionally with the time it was updated"""
+        self.calls["put"] += 1
+        key = self._get_key(name)
+
+        with self._LOCK:
+            objects = self._BUCKETS[self.bucket_name]
+            objects[key] = {
+                "data": bytes(data),
+                "version": objects[key]["version"] + 1 if key in objects else 1,
+                "updated": updated or datetime.datetime.now(datetime.timezone.utc),
+            }
+
+    def read_range(self, name, start, end, version=None):
+        self.calls["read_range"] += 1
+        return self._get_data(name, version)[start:end]
+
+    def _get_data(self, name, version):
+        """Returns the data of name, if it has version"""
+        obj = self._BUCKETS[self.bucket_name].get(self._get_key(name))
+
+        if obj is None or version not in (None, obj["version"]):
+            raise IOError("No such object: %s" % name)
+
+        return obj["data"]
+
+
+class S3Store(ObjectStore):
+    """An object store in an S3-compatible bucket. Uses boto3, with an
+       endpoint given by AWS_ENDPOINT_URL, unless a client is given.
+    """
+
+    def __init__(self, bucket, prefix="", client=None):
+        super().__init__("s3", bucket, prefix)
+
+        if client is None:
+            # Only required when no client is given:
+            import boto3
+
+            client = boto3.client(
+                "s3", endpoint_url=os.environ.get("AWS_ENDPOINT_URL")
+            )
+
+        self.client = client
+
+    def stat(self, name):
+        try:
+            response = self.client.head_object(
+                Bucket=self.bucket_name, Key=self._get_key(name)
+            )
+        except Exception as err:  # botocore.exceptions.ClientError
+            if _is_not_found(err):
+                return None
+
+            raise
+
+        return {
+            "size": response["ContentLength"],
+            "version": response["ETag"],
+            "updated": response["LastModified"],
+        }
+
+    def get(self, name, version=None):
+        return self.client.get_object(
+            Bucket=self.bucket_name, Key=self._get_key(name), **_if_match(version)
+        )["Body"].read()
+
+    def put(self, name, data):
+        self.client.put_object(Bucket=self.bucket_name, Key=self._get_key(name), Body=data)
+
+    def read_range(self, name, start, end, version=None):
+        return self.client.get_object(
+            Bucket=self.bucket_name,
+            Key=self._get_key(name),
+            Range="bytes=%d-%d" % (start, end - 1),
+            **_if_match(version)
+        )["Body"].read()
+
+    def get_file(self, name, filepath, version=None):
+        self.client.download_file(
+            self.bucket_name, self._get_key(name), filepath, ExtraArgs=_if_match(version)
+        )
+
+    def put_file(self, name, filepath):
+        self.client.upload_file(filepath, self.bucket_name, self._get_key(name))
+
+
+class GoogleStore(ObjectStore):
+    """An object store in a Google Storage bucket. Uses
+       google.cloud.storage, unless a client is given.
+    """
+
+    def __init__(self, bucket, prefix="", client=None):
+        super().__init__("gs", bucket, prefix)
+
+        if client is None:
+            # Only required when no client is given:
+            from google.cloud import storage
+
+            client = storage.Client()
+
+        self.client = client
+        self.bucket = client.bucket(bucket)
+
+    def stat(self, name):
+        blob = self.bucket.get_blob(self._get_key(name))
+
+        if blob is None:
+            return None
+
+        return {"size": blob.size, "version": blob.generation, "updated": blob.updated}
+
+    def get(self, name, version=None):
+        return self.bucket.blob(self._get_key(name), generation=version).download_as_bytes()
+
+    def put(self, name, data):
+        self.bucket.blob(self._get_key(name)).upload_from_string(
+            data, content_type="application/octet-stream"
+        )
+
+    def read_range(self, name, start, end, version=None):
+        # Ranges are inclusive of their end:
+        blob = self.bucket.blob(self._get_key(name), generation=version)
+        return blob.download_as_bytes(start=start, end=end - 1)
+
+    def get_file(self, name, filepath, version=None):
+        blob = self.bucket.blob(self._get_key(name), generation=version)
+        blob.download_to_filename(filepath)
+
+    def put_file(self, name, filepath):
+        self.bucket.blob(self._get_key(name)).upload_from_filename(filepath)
+
+
+register_store("memory", MemoryStore)
+register_store("s3", S3Store)
+register_store("gs", GoogleStore)
+
+
+class StatCache:
+    """Caches object metadata, from ObjectStore.stat, so that freshness
+       checks do not call the store on every access. Shared by all parsers
+       in a process (see STAT_CACHE).
+    """
+
+    def __init__(self):
+        self._metadata = {}
+        self._lock = threading.Lock()
+
+    def get(self, store, name, ttl):
+        """Returns metadata of name in store, fetched at most ttl seconds ago,
+           or None if it does not exist
+        """
+        key = (store.url, name)
+
+        with self._lock:
+            cached = self._metadata.get(key)
+
+        if cached is not None and time.time() - cached[0] < ttl:
+            return cached[1]
+
+        metadata = store.stat(name)
+
+        with self._lock:
+            self._metadata[key] = (time.time(), metadata)
+
+        return metadata
+
+    def invalidate(self, store_url=None, name=None):
+        """Forgets cached metadata of name in the store at store_url, of all
+           objects in that store if name is None, or of all objects if both
+           are None
+        """
+        with self._lock:
+            for key in list(self._metadata):
+                if store_url in (None, key[0]) and name in (None, key[1]):
+                    del self._metadata[key]
+
+
+STAT_CACHE = StatCache()
+
+
+class ObjectStoreCache(ParserBase):
+    """Keeps flat files in an object store shared by a cluster, so that each
+       file is staged from the ChEBI FTP site once per release, then copied
+       to the local download directory of each parser that reads it. With
+       auto_update, a stored file is staged again once its size or updated
+       time differ from those of the file on the FTP site. A copy is fetched
+       again only if its size or modification time differ from those of
+       the stored object.
+
+       Parsed tables can be published to the store as a single compressed
+       snapshot (see publish_snapshot), which, if snapshot, is loaded in
+       place of parsing flat files on first access. Large files read by
+       get_mol and get_references can be published with offset indexes
+       (see publish_indexed_files), so that only the rows needed are read.
+    """
+
+    def __init__(
+        self,
+        store=None,
+        download_dir=None,
+        auto_update=True,
+        packed=False,
+        snapshot=True,
+        metadata_ttl=3600,
+        url=FTP_URL,
+    ):
+        """store is an ObjectStore or its URL (by default, given by
+           LIBCHEBIPY_OBJECT_STORE). Object and FTP file metadata are
+           checked at most every metadata_ttl seconds.
+        """
+        super().__init__(download_dir, auto_update, packed)
+
+        store = store or os.environ.get("LIBCHEBIPY_OBJECT_STORE")
+
+        if not store:
+            raise ValueError(
+                "LIBCHEBIPY_OBJECT_STORE is required to be exported in the environment."
+            )
+
+        self.store = get_store(store) if isinstance(store, str) else store
+        self.url = url
+        self.metadata_ttl = metadata_ttl
+        self.metadata = MetadataCache(ttl=metadata_ttl)
+        self.snapshot = snapshot
+        self._versions = {}
+        self._offset_indexes = {}
+        self._snapshot_checked = not snapshot
+        self._snapshot_lock = threading.Lock()
+
+    def clear(self):
+        """Discards all loaded tables. The snapshot, if any, is loaded again
+           on next access.
+        """
+        with self._snapshot_lock:
+            super().clear()
+            self._snapshot_checked = not self.snapshot
+
+    def load_snapshot(self):
+        """Loads tables from the snapshot in the store, without parsing.
+           Returns whether a current snapshot was found.
+        """
+        metadata = self._get_metadata(SNAPSHOT_NAME)
+
+        sources = [filename for filename, _, _, _ in self._TABLES.values()]
+
+        if metadata is None or not self._is_derived_current(metadata, sources):
+            return False
+
+        data = self.store.get(SNAPSHOT_NAME, metadata["version"])
+        tables, _ = loads(gzip.decompress(data))
+        self.set_packed_tables(tables)
+        return True
+
+    def publish_snapshot(self, tables=None):
+        """Loads tables (by default, all tables) and publishes all loaded
+           tables to the store as a compressed snapshot, for other parsers
+           to load with load_snapshot
+        """
+        self.load(tables)
+        data = dumps(self.get_packed_tables(), {"tables": self.get_loaded_tables()})
+
+        self.store.put(SNAPSHOT_NAME, gzip.compress(data))
+        STAT_CACHE.invalidate(self.store.url, SNAPSHOT_NAME)
+
+    def publish_indexed_files(self, filenames=None):
+        """Publishes flat files (by default, all of INDEXED_FILES)
+           uncompressed, with an offset index, so that get_mol and
+           get_references read only the rows they need, by range
+        """
+        for filename in filenames or INDEXED_FILES:
+            filepath = self.get_file(filename)
+            index = build_index(filepath, *INDEXED_FILES[filename])
+            data_name, index_name = _get_indexed_names(filename)
+
+            self.store.put_file(data_name, filepath)
+            STAT_CACHE.invalidate(self.store.url, data_name)
+
+            header = json.dumps(
+                {"version": self._get_metadata(data_name)["version"]}
+            ).encode("utf-8")
+
+            self.store.put(
+                index_name,
+                gzip.compress(_HEADER_LENGTH.pack(len(header)) + header + index.dumps()),
+            )
+            STAT_CACHE.invalidate(self.store.url, index_name)
+
+    def get_file(self, filename):
+        """Copies filename from the store, first staging it from the ChEBI
+           FTP site if it is missing or not current
+        """
+        filepath = os.path.join(self.path, filename)
+        copied = os.path.exists(filepath) and filename in self._versions
+
+        # If the local copy exists and need not be checked, use it
+        if copied and not self.auto_update:
+            return self._extract_compressed_file(filepath, self.path)
+
+        os.makedirs(self.path, exist_ok=True)
+
+        metadata = self._get_metadata(filename)
+
+        # If the object doesn't exist or is older than the FTP file, stage it
+        if metadata is None or not self._is_staged(filename, metadata):
+            size, mtime = self._get_remote_metadata(filename)
+            download(
+                urlparse.urljoin(self.url, filename), filepath, size=size, mtime=mtime
+            )
+            self.store.put_file(filename, filepath)
+            STAT_CACHE.invalidate(self.store.url, filename)
+
+            metadata = self._get_metadata(filename)
+            _stamp_file(filepath, metadata)
+            self._versions[filename] = metadata["version"]
+
+        # Copy to a temporary file, so readers never see partial data
+        elif not self._is_current(metadata, filepath):
+            self.store.get_file(filename, filepath + ".copy", metadata["version"])
+            _stamp_file(filepath + ".copy", metadata)
+            os.replace(filepath + ".copy", filepath)
+            self._versions[filename] = metadata["version"]
+
+        return self._extract_compressed_file(filepath, self.path)
+
+    def _load_table(self, table):
+        """Loads the snapshot, on first access, then parses table if it is
+           not yet loaded
+        """
+        if not self._snapshot_checked:
+            with self._snapshot_lock:
+                if not self._snapshot_checked:
+                    self.load_snapshot()
+                    self._snapshot_checked = True
+
+        super()._load_table(table)
+
+    def _read_indexed(self, filename, chebi_ids):
+        """Returns the rows of chebi_ids in filename, read by range, or None
+           if no current offset index has been published
+        """
+        if filename not in INDEXED_FILES:
+            return None
+
+        data_name, index_name = _get_indexed_names(filename)
+        metadata = self._get_metadata(index_name)
+
+        if metadata is None or not self._is_derived_current(metadata, [filename]):
+            return None
+
+        cached = self._offset_indexes.get(filename)
+
+        if cached is None or cached[0] != metadata["version"]:
+            data = gzip.decompress(self.store.get(index_name, metadata["version"]))
+            header_end = _HEADER_LENGTH.size + _HEADER_LENGTH.unpack_from(data)[0]
+            header = json.loads(data[_HEADER_LENGTH.size : header_end].decode("utf-8"))
+            cached = (
+                metadata["version"],
+                header["version"],
+                OffsetIndex.loads(memoryview(data)[header_end:]),
+            )
+            self._offset_indexes[filename] = cached
+
+        _, data_version, index = cached
+        data = b"".join(
+            self.store.read_range(data_name, start, end, data_version)
+            for start, end in index.get_spans(chebi_ids)
+        )
+
+        return data if not data or data.endswith(b"\n") else data + b"\n"
+
+    def _get_metadata(self, name):
+        """Returns cached metadata of name, or None if it does not exist"""
+        return STAT_CACHE.get(self.store, name, self.metadata_ttl)
+
+    def _is_current(self, metadata, filepath):
+        """Checks whether filepath is a copy of an object, comparing its size
+           and modification time (stamped when copied) with those of the
+           object
+        """
+        updated = _get_timestamp(metadata)
+
+        return (
+            os.path.isfile(filepath)
+            and os.path.getsize(filepath) == metadata["size"]
+            and updated is not None
+            and os.path.getmtime(filepath) >= updated
+        )
+
+    def _is_staged(self, filename, metadata):
+        """Checks whether the object of filename is current, comparing its
+           size and updated time with those of the file on the FTP site (if
+           auto_update is set and the site can be reached)
+        """
+        if not self.auto_update:
+            return True
+
+        size, mtime = self._get_remote_metadata(filename)
+        updated = _get_timestamp(metadata)
+
+        return (size is None or metadata["size"] == size) and (
+            mtime is None or (updated is not None and updated >= mtime)
+        )
+
+    def _get_remote_metadata(self, filename):
+        """Returns (size, mtime) of filename on the FTP site, or (None, None)
+           if the site cannot be reached
+        """
+        return self.metadata.get(urlparse.urljoin(self.url, filename))
+
+    def _is_derived_current(self, metadata, sources):
+        """Checks whether an object derived from the objects named sources
+           (such as a snapshot or offset index) was written no earlier than
+           any that exist, and that none of those is to be staged again
+        """
+        if not self.auto_update:
+            return True
+
+        updated = _get_timestamp(metadata)
+
+        # This technically shouldn't happen, but might be an edge case
+        if updated is None:
+            return False
+
+        for source in sources:
+            source_metadata = self._get_metadata(source)
+
+            if source_metadata is None:
+                continue
+
+            source_updated = _get_timestamp(source_metadata)
+
+            if (source_updated is not None and source_updated > updated) or not (
+                self._is_staged(source, source_metadata)
+            ):
+                return False
+
+        return True
+
+
+def _get_timestamp(metadata):
+    """Returns the updated time of object metadata in seconds since the
+       epoch, or None if it is unknown
+    """
+    updated = metadata and metadata["updated"]
+    return updated.timestamp() if updated else None
+
+
+def _stamp_file(filepath, metadata):
+    """Sets the modification time of filepath to the updated time of the
+       object it is a copy of, so that changes can be detected
+    """
+    updated = _get_timestamp(metadata)
+
+    if updated is not None:
+        os.utime(filepath, (updated, updated))
+
+
+def _get_indexed_names(filename):
+    """Returns the names of the uncompressed data and offset index objects
+       of filename
+    """
+    data_name = filename[: -len(".gz")]
+    return data_name, data_name + ".idx.gz"
+
+
+def _if_match(version):
+    """Returns S3 request arguments requiring version, if given"""
+    return {} if version is None else {"IfMatch": version}
+
+
+def _is_not_found(err):
+    """Returns whether an S3 client error is for a missing object"""
+    code = getattr(err, "response", {}).get("Error", {}).get("Code")
+    return code in ("404", "NoSuchKey", "NotFound")
@@ -0,0 +1,139 @@
+"""
+libChEBIpy (c) University of Manchester 2015-2020
+
+libChEBIpy is licensed under the MIT License.
+
+To view a copy of this license, visit <http://opensource.org/licenses/MIT/>.
+
+@author:  neilswainston
+"""
+
+import array
+import bisect
+import io
+import struct
+
+# Flat files that can be read by range, with their delimiter, the column
+# holding the ChEBI id and whether fields may be quoted over several lines
+INDEXED_FILES = {
+    "structures.csv.gz": (",", 1, True),
+    "reference.tsv.gz": ("\t", 0, False),
+}
+
+# Serialised indexes: magic, number of spans, then ids, starts and ends
+_MAGIC = b"LCOI"
+_HEADER = struct.Struct("<4sQ")
+
+
+class OffsetIndex:
+    """The byte spans of the rows of each ChEBI id in an uncompressed flat
+       file, so that the rows of an id can be fetched with range reads
+    """
+
+    def __init__(self, ids, starts, ends):
+        self._ids = ids
+        self._starts = starts
+        self._ends = ends
+
+    def __len__(self):
+        return len(self._ids)
+
+    def get_spans(self, chebi_ids):
+        """Returns (start, end) byte spans, end exclusive, of the rows of
+           chebi_ids, in file order with adjacent spans merged
+        """
+        spans = []
+
+        for chebi_id in chebi_ids:
+            try:
+                chebi_id = int(chebi_id)
+            except ValueError:
+                continue
+
+            pos = bisect.bisect_left(self._ids, chebi_id)
+
+            while pos < len(self._ids) and self._ids[pos] == chebi_id:
+                spans.append((self._starts[pos], self._ends[pos]))
+                pos += 1
+
+        merged = []
+
+        for start, end in sorted(set(spans)):
+            if merged and merged[-1][1] == start:
+                merged[-1] = (merged[-1][0], end)
+            else:
+                merged.append((start, end))
+
+        return merged
+
+    def dumps(self):
+        """Returns the index serialised to bytes"""
+        return (
+            _HEADER.pack(_MAGIC, len(self._ids))
+            + array.array("q", self._ids).tobytes()
+            + array.array("q", self._starts).tobytes()
+            + array.array("q", self._ends).tobytes()
+        )
+
+    @classmethod
+    def loads(cls, data):
+        """Returns an index serialised by dumps"""
+        magic, length = _HEADER.unpack_from(data)
+
+        if magic != _MAGIC:
+            raise ValueError("Not an offset index")
+
+        arrays = []
+
+        for idx in range(3):
+            start = _HEADER.size + idx * length * 8
+            values = array.array("q")
+            values.frombytes(data[start : start + length * 8])
+            arrays.append(values)
+
+        return cls(*arrays)
+
+
+def build_index(filepath, delimiter, key_column, quoted=False):
+    """Returns the OffsetIndex of an uncompressed flat file. If quoted,
+       lines within a quoted field (such as a mol block) belong to the row
+       the field started in.
+    """
+    spans = []
+    byte_delimiter = delimiter.encode("ascii")
+
+    with io.open(filepath, "rb") as binfile:
+        offset = len(binfile.readline())
+        in_quote = False
+
+        for line in binfile:
+            end = offset + len(line)
+
+            if in_quote:
+                if spans:
+                    spans[-1][2] = end
+            else:
+                fields = line.split(byte_delimiter, key_column + 1)
+
+                try:
+                    chebi_id = int(fields[key_column])
+                except (IndexError, ValueError):
+                    chebi_id = None
+
+                if chebi_id is not None:
+                    if spans and spans[-1][0] == chebi_id and spans[-1][2] == offset:
+                        spans[-1][2] = end
+                    else:
+                        spans.append([chebi_id, offset, end])
+
+            if quoted and line.count(b'"') % 2:
+                in_quote = not in_quote
+
+            offset = end
+
+    spans.sort()
+    return OffsetIndex(
+        array.array("q", [span[0] for span in spans]),
+        array.array("q", [span[1] for span in spans]),
+        array.array("q", [span[2] for span in spans]),
+    )
@@ -0,0 +1,366 @@
+"""
+libChEBIpy (c) University of Manchester 2015-2020
+
+libChEBIpy is licensed under the MIT License.
+
+To view a copy of this license, visit <http://opensource.org/licenses/MIT/>.
+
+@author:  neilswainston
+"""
+
+import array
+import bisect
+import datetime
+import json
+import math
+import struct
+
+from .._comment import Comment
+from .._compound_origin import CompoundOrigin
+from .._database_accession import DatabaseAccession
+from .._formula import Formula
+from .._name import Name
+from .._relation import Relation
+from .._structure import Structure
+
+
+_CLASSES = {
+    cls.__name__: cls
+    for cls in [
+        Comment,
+        CompoundOrigin,
+        DatabaseAccession,
+        Formula,
+        Name,
+        Relation,
+        Structure,
+    ]
+}
+
+# Sentinels for None and NaN in integer and datetime columns
+_NONE = -(2 ** 63)
+_NAN = -(2 ** 63) + 1
+
+# Strings never contain NUL, so it marks None in string columns
+_NONE_STR = "\x00"
+
+_EPOCH = datetime.datetime(1, 1, 1)
+_MICROSECOND = datetime.timedelta(microseconds=1)
+
+
+class PackedTable:
+    """A read-only table of ChEBI id to value, held in flat buffers (sorted
+       keys, row offsets and one array or string heap per field) rather than
+       in dicts of Python objects. Model objects are built on each access.
+
+       Since buffers hold no Python objects, reading them does not touch
+       reference counts, so pages are shared between forked processes.
+    """
+
+    def __init__(self, meta, buffers):
+        self.meta = meta
+        self.buffers = buffers
+        self._keys = memoryview(buffers["keys"]).cast("q")
+        self._index = memoryview(buffers["index"]).cast("q")
+        self._cls = _CLASSES.get(meta["cls"])
+        self._columns = [
+            _Column(kind, buffers, str(idx)) for idx, kind in enumerate(meta["kinds"])
+        ]
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __bool__(self):
+        return len(self._keys) > 0
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __contains__(self, key):
+        return self._find(key) is not None
+
+    def __getitem__(self, key):
+        pos = self._find(key)
+
+        if pos is None:
+            raise KeyError(key)
+
+        return self._get_value(pos)
+
+    def get(self, key, default=None):
+        """Returns value of key, or default if not present"""
+        pos = self._find(key)
+        return default if pos is None else self._get_value(pos)
+
+    def keys(self):
+        """Returns keys"""
+        return list(self._keys)
+
+    def values(self):
+        """Returns values"""
+        return [self._get_value(pos) for pos in range(len(self._keys))]
+
+    def items(self):
+        """Returns (key, value) pairs"""
+        return zip(self._keys, self.values())
+
+    def get_arrays(self):
+        """Returns (keys, values) of a table of single ints or floats, as
+           arrays that can be scanned without building any objects
+        """
+        if self.meta["shape"] != "scalar" or self.meta["kinds"] not in (["i"], ["f"]):
+            raise TypeError("Table does not hold single ints or floats")
+
+        return self._keys, self._columns[0].values
+
+    def _find(self, key):
+        """Returns position of key, or None if not present"""
+        if type(key) is not int:
+            return None
+
+        pos = bisect.bisect_left(self._keys, key)
+
+        if pos < len(self._keys) and self._keys[pos] == key:
+            return pos
+
+        return None
+
+    def _get_value(self, pos):
+        """Builds the value at position pos"""
+        start, end = self._index[pos], self._index[pos + 1]
+        rows = [self._get_row(row) for row in range(start, end)]
+        return rows if self.meta["shape"] == "list" else rows[0]
+
+    def _get_row(self, row):
+        """Builds a single value from row"""
+        fields = [column[row] for column in self._columns]
+
+        if self._cls is None:
+            return fields[0]
+
+        obj = self._cls.__new__(self._cls)
+        obj.__dict__.update(zip(self.meta["fields"], fields))
+        return obj
+
+
+class _Column:
+    """A single field of a packed table"""
+
+    def __init__(self, kind, buffers, name):
+        self.kind = kind
+
+        if kind == "s":
+            self._offsets = memoryview(buffers[name + ".offsets"]).cast("q")
+            self._heap = memoryview(buffers[name + ".heap"])
+        else:
+            self.values = memoryview(buffers[name]).cast(_TYPECODES[kind])
+
+    def __getitem__(self, row):
+        if self.kind == "s":
+            start, end = self._offsets[row], self._offsets[row + 1]
+            value = str(self._heap[start:end], "utf-8")
+            return None if value == _NONE_STR else value
+
+        value = self.values[row]
+
+        if self.kind == "b":
+            return None if value < 0 else bool(value)
+
+        if self.kind in ("i", "t"):
+            if value == _NONE:
+                return None
+
+            if value == _NAN:
+                return float("NaN")
+
+            if self.kind == "t":
+                return _EPOCH + datetime.timedelta(microseconds=value)
+
+        return value
+
+
+_TYPECODES = {"b": "b", "i": "q", "t": "q", "f": "d"}
+
+
+def pack(table):
+    """Returns a PackedTable holding the contents of a dict table, whose
+       values are lists of model objects or primitives, or single ones.
+    """
+    keys = sorted(table)
+    is_list = any(isinstance(value, list) for value in table.values())
+    shape = "list" if is_list else "scalar"
+
+    index = array.array("q", [0])
+    rows = []
+
+    for key in keys:
+        values = table[key] if shape == "list" else [table[key]]
+        rows.extend(values)
+        index.append(len(rows))
+
+    sample = next((row for row in rows if row is not None), None)
+    cls = type(sample).__name__ if type(sample).__name__ in _CLASSES else None
+    fields = list(vars(sample)) if cls else None
+
+    if cls:
+        columns = [[vars(row)[field] for row in rows] for field in fields]
+    else:
+        columns = [rows]
+
+    buffers = {"keys": array.array("q", keys).tobytes(), "index": index.tobytes()}
+    kinds = []
+
+    for idx, values in enumerate(columns):
+        kind = _get_kind(values)
+        kinds.append(kind)
+        buffers.update(_pack_column(kind, values, str(idx)))
+
+    meta = {"shape": shape, "cls": cls, "fields": fields, "kinds": kinds}
+    return PackedTable(meta, buffers)
+
+
+def _get_kind(values):
+    """Returns the kind of column needed to hold values"""
+    types = set(type(value) for value in values if value is not None)
+    has_nan = any(_is_nan(value) for value in values)
+
+    # NaN marks missing integers (for example, parent ids):
+    if has_nan and all(_is_nan(value) or type(value) is int for value in values):
+        return "i"
+
+    for kind, kind_types in [
+        ("s", {str}),
+        ("b", {bool}),
+        ("i", {int}),
+        ("f", {int, float}),
+        ("t", {datetime.datetime}),
+    ]:
+        if types <= kind_types:
+            # Floats cannot hold None:
+            if kind != "f" or None not in values:
+                return kind
+
+    raise TypeError("Cannot pack values of types %s" % types)
+
+
+def _pack_column(kind, values, name):
+    """Returns buffers holding a column of values"""
+    if kind == "s":
+        heap = bytearray()
+        offsets = array.array("q", [0])
+
+        for value in values:
+            heap += (_NONE_STR if value is None else value).encode("utf-8")
+            offsets.append(len(heap))
+
+        return {name + ".offsets": offsets.tobytes(), name + ".heap": bytes(heap)}
+
+    if kind == "b":
+        packed = [-1 if value is None else int(value) for value in values]
+    elif kind == "t":
+        packed = [
+            _NONE if value is None else (value - _EPOCH) // _MICROSECOND
+            for value in values
+        ]
+    elif kind == "i":
+        packed = [
+            _NONE if value is None else _NAN if _is_nan(value) else value
+            for value in values
+        ]
+    else:
+        packed = values
+
+    return {name: array.array(_TYPECODES[kind], packed).tobytes()}
+
+
+def _is_nan(value):
+    """Returns whether value is a float NaN"""
+    return isinstance(value, float) and math.isnan(value)
+
+
+# Serialised tables: magic, manifest length, JSON manifest, then buffers
+# aligned to 8 bytes so that they can be cast to int64 and double arrays
+_MAGIC = b"LCPK"
+_HEADER = struct.Struct("<4sQ")
+_ALIGN = 8
+
+
+def get_dump_size(tables, extra=None):
+    """Returns the size in bytes of tables serialised by dump_into"""
+    _, data_start, data_size = _get_manifest(tables, extra)
+    return data_start + data_size
+
+
+def dump_into(tables, buf, extra=None):
+    """Serialises a dict of attribute to PackedTable, plus JSON-able extra
+       data, into the writable buffer buf
+    """
+    manifest, data_start, _ = _get_manifest(tables, extra)
+    buf = memoryview(buf)
+    buf[: _HEADER.size] = _HEADER.pack(_MAGIC, len(manifest))
+    buf[_HEADER.size : _HEADER.size + len(manifest)] = manifest
+
+    offset = data_start
+
+    for table in tables.values():
+        for buffer in table.buffers.values():
+            length = len(memoryview(buffer).cast("B"))
+            buf[offset : offset + length] = memoryview(buffer).cast("B")
+            offset += _pad(length)
+
+
+def dumps(tables, extra=None):
+    """Returns tables serialised to bytes"""
+    buf = bytearray(get_dump_size(tables, extra))
+    dump_into(tables, buf, extra)
+    return bytes(buf)
+
+
+def loads(buf):
+    """Returns (dict of attribute to PackedTable, extra data) from serialised
+       tables. Tables read buf in place, without copying.
+    """
+    buf = memoryview(buf)
+    magic, manifest_length = _HEADER.unpack(buf[: _HEADER.size])
+
+    if magic != _MAGIC:
+        raise ValueError("Not a packed table dump")
+
+    manifest = json.loads(
+        str(buf[_HEADER.size : _HEADER.size + manifest_length], "utf-8")
+    )
+    data_start = _pad(_HEADER.size + manifest_length)
+    tables = {}
+
+    for attr, table in manifest["tables"].items():
+        buffers = {
+            name: buf[data_start + offset : data_start + offset + length]
+            for name, (offset, length) in table["buffers"].items()
+        }
+        tables[attr] = PackedTable(table["meta"], buffers)
+
+    return tables, manifest["extra"]
+
+
+def _get_manifest(tables, extra):
+    """Returns (JSON manifest, start and size of buffer data) of tables"""
+    manifest = {"extra": extra, "tables": {}}
+    offset = 0
+
+    for attr, table in tables.items():
+        buffers = {}
+
+        for name, buffer in table.buffers.items():
+            length = len(memoryview(buffer).cast("B"))
+            buffers[name] = [offset, length]
+            offset += _pad(length)
+
+        manifest["tables"][attr] = {"meta": table.meta, "buffers": buffers}
+
+    manifest = json.dumps(manifest).encode("utf-8")
+    return manifest, _pad(_HEADER.size + len(manifest)), offset
+
+
+def _pad(length):
+    """Returns length rounded up to the alignment of buffers"""
+    return (length + _ALIGN - 1) // _ALIGN * _ALIGN
@@ -0,0 +1,74 @@
+"""
+libChEBIpy (c) University of Manchester 2015-2020
+
+libChEBIpy is licensed under the MIT License.
+
+To view a copy of this license, visit <http://opensource.org/licenses/MIT/>.
+
+@author:  neilswainston
+"""
+
+import os.path
+from multiprocessing import resource_tracker, shared_memory
+
+from .base import ParserBase
+from .packed import dump_into, get_dump_size, loads
+
+
+def publish(parser, name=None, tables=None):
+    """Loads tables (by default, all tables) of parser and publishes them in
+       a shared memory segment, which other processes can attach to by name
+       with SharedMemoryCache. Returns the SharedMemory, which the caller
+       must close() and unlink() once no longer needed.
+    """
+    parser.load(tables)
+    packed_tables = parser.get_packed_tables()
+    extra = {"download_dir": parser.path}
+
+    shm = shared_memory.SharedMemory(
+        name=name, create=True, size=get_dump_size(packed_tables, extra)
+    )
+    dump_into(packed_tables, shm.buf, extra)
+    return shm
+
+
+class SharedMemoryCache(ParserBase):
+    """A parser over tables published to shared memory by another process.
+       Tables are read in place from the segment: nothing is parsed or
+       copied. Files that are not parsed into tables (such as structures
+       for get_mol) are read from the publisher's download directory.
+    """
+
+    def __init__(self, name):
+        self._shm = _attach(name)
+        tables, extra = loads(self._shm.buf)
+
+        super().__init__(extra["download_dir"], auto_update=False, packed=True)
+        self.name = name
+        self.set_packed_tables(tables)
+
+    def close(self):
+        """Detaches from the shared memory segment"""
+        self.clear()
+        self._shm.close()
+
+    def get_file(self, filename):
+        """Returns the publisher's copy of filename"""
+        filepath = os.path.join(self.path, filename)
+
+        if not os.path.exists(filepath):
+            raise IOError("%s is not available to attached parsers" % filepath)
+
+        return self._extract_compressed_file(filepath, self.path)
+
+
+def _attach(name):
+    """Attaches to a shared memory segment without taking ownership of it"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before Python 3.13, attaching registers the segment for unlinking
+        # when this process exits, so unregister it:
+        shm = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
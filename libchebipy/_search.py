@@ -0,0 +1,195 @@
+'''
+libChEBIpy (c) University of Manchester 2015-2020
+
+libChEBIpy is licensed under the MIT License.
+
+To view a copy of this license, visit <http://opensource.org/licenses/MIT/>.
+
+@author:  neilswainston
+'''
+import asyncio
+import hashlib
+import json
+import os.path
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+OLS_URL = 'https://www.ebi.ac.uk/ols/api/search'
+
+
+class ResponseCache(object):
+    '''On-disk cache of OLS responses, expiring entries after ttl seconds.'''
+
+    def __init__(self, directory, ttl=86400):
+        self.directory = directory
+        self.ttl = ttl
+
+    def get(self, key):
+        '''Returns cached response for key, or None if missing or stale.'''
+        filepath = self._get_filepath(key)
+
+        try:
+            if time.time() - os.path.getmtime(filepath) > self.ttl:
+                return None
+
+            with open(filepath, 'r') as cache_file:
+                return json.load(cache_file)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key, data):
+        '''Stores response for key.'''
+        os.makedirs(self.directory, exist_ok=True)
+
+        # Write to a temporary file first so readers never see partial JSON:
+        file_descriptor, tmp_filepath = tempfile.mkstemp(dir=self.directory)
+
+        with os.fdopen(file_descriptor, 'w') as cache_file:
+            json.dump(data, cache_file)
+
+        os.replace(tmp_filepath, self._get_filepath(key))
+
+    def _get_filepath(self, key):
+        '''Returns cache filepath for key.'''
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, digest + '.json')
+
+
+class SearchClient(object):
+    '''Client for the OLS search API, sharing one pooled HTTP session between
+    blocking and asyncio callers.'''
+
+    def __init__(self, url=OLS_URL, page_size=500, max_concurrency=8,
+                 timeout=30, cache_dir=None, cache_ttl=86400):
+        self.url = url
+        self.page_size = page_size
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.cache = None if cache_dir is None \
+            else ResponseCache(cache_dir, cache_ttl)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1,
+                              pool_maxsize=max_concurrency)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self.__executor = ThreadPoolExecutor(max_workers=max_concurrency)
+
+    def close(self):
+        '''Releases pooled connections and worker threads.'''
+        self.__executor.shutdown(wait=True)
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def search(self, term, exact=False, rows=None):
+        '''Returns ChEBI ids matching term, blocking until all pages are
+        fetched.'''
+        obo_ids = []
+        start = 0
+
+        while True:
+            page_rows = self._get_page_rows(start, rows)
+
+            if page_rows <= 0:
+                break
+
+            docs, num_found = self._parse_page(
+                self.get_page(term, exact, start, page_rows))
+            obo_ids.extend(docs)
+            start += page_rows
+
+            if not docs or start >= num_found:
+                break
+
+        return obo_ids
+
+    async def iter_search(self, term, exact=False, rows=None):
+        '''Asynchronously yields ChEBI ids matching term, page by page.'''
+        loop = asyncio.get_running_loop()
+        start = 0
+
+        while True:
+            page_rows = self._get_page_rows(start, rows)
+
+            if page_rows <= 0:
+                break
+
+            data = await loop.run_in_executor(self.__executor, self.get_page,
+                                              term, exact, start, page_rows)
+            docs, num_found = self._parse_page(data)
+
+            for obo_id in docs:
+                yield obo_id
+
+            start += page_rows
+
+            if not docs or start >= num_found:
+                break
+
+    async def search_async(self, term, exact=False, rows=None):
+        '''Asynchronously returns ChEBI ids matching term.'''
+        return [obo_id async for obo_id in self.iter_search(term, exact, rows)]
+
+    async def search_all(self, terms, exact=False, rows=None):
+        '''Asynchronously searches a batch of terms, with at most
+        max_concurrency queries in flight. Returns a dict of term to ChEBI
+        ids.'''
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def _search(term):
+            async with semaphore:
+                return await self.search_async(term, exact, rows)
+
+        results = await asyncio.gather(*[_search(term) for term in terms])
+        return dict(zip(terms, results))
+
+    def get_page(self, term, exact, start, rows):
+        '''Returns a single page of raw OLS search results.'''
+        params = [('ontology', 'chebi'),
+                  ('exact', str(exact).lower()),
+                  ('q', term if exact else '"' + term + '"'),
+                  ('start', str(start)),
+                  ('rows', str(rows))]
+
+        key = self.url + '?' + '&'.join('='.join(param) for param in params)
+
+        if self.cache is not None:
+            data = self.cache.get(key)
+
+            if data is not None:
+                return data
+
+        response = self.session.get(self.url, params=params,
+                                    timeout=self.timeout)
+        response.raise_for_status()
+        data = response.json()
+
+        if self.cache is not None:
+            self.cache.put(key, data)
+
+        return data
+
+    def _get_page_rows(self, start, rows):
+        '''Returns number of rows to request for page beginning at start.'''
+        if rows is None:
+            return self.page_size
+
+        return min(self.page_size, int(rows) - start)
+
+    @staticmethod
+    def _parse_page(data):
+        '''Returns ChEBI ids and total hit count from an OLS response.'''
+        response = data['response']
+        return [doc['obo_id'] for doc in response['docs']], \
+            response['numFound']
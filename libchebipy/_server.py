@@ -0,0 +1,316 @@
+'''
+libChEBIpy (c) University of Manchester 2015-2020
+
+libChEBIpy is licensed under the MIT License.
+
+To view a copy of this license, visit <http://opensource.org/licenses/MIT/>.
+
+@author:  neilswainston
+'''
+import contextlib
+import functools
+import json
+import math
+import threading
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from ._chebi_entity import ChebiEntity, ChebiException, get_parser
+from ._store import VersionedStore
+
+# Bytes of results buffered before each chunk of a response is sent
+_CHUNK_SIZE = 64 * 1024
+
+# Largest request body accepted
+_MAX_BODY_SIZE = 16 * 1024 * 1024
+
+
+class Coalescer(object):
+    '''Runs each distinct lookup once at a time: concurrent callers with the
+    same key wait for, and share, the result of the first.'''
+
+    def __init__(self):
+        self.__pending = {}
+        self.__lock = threading.Lock()
+        self.coalesced = 0
+
+    def get(self, key, func):
+        '''Returns the result of func, or of the call in progress for key.'''
+        with self.__lock:
+            future = self.__pending.get(key)
+            owner = future is None
+
+            if owner:
+                future = self.__pending[key] = Future()
+            else:
+                self.coalesced += 1
+
+        if owner:
+            try:
+                future.set_result(func())
+            except Exception as err:  # pylint: disable=broad-except
+                future.set_exception(err)
+            finally:
+                with self.__lock:
+                    del self.__pending[key]
+
+        return future.result()
+
+
+class LookupService(object):
+    '''Batched lookups over one parser, or over the active release of a
+    VersionedStore, as served by make_server. Each endpoint takes a list of
+    items and yields one result per item, so large batches can be streamed.
+    '''
+
+    def __init__(self, parser="filesystem"):
+        '''parser is a parser, its name or a VersionedStore.'''
+        self.__store = parser if isinstance(parser, VersionedStore) else None
+        self.__parser = None if self.__store else get_parser(parser)
+        self.__coalescer = Coalescer()
+
+    def get_version(self):
+        '''Returns version of the release served, if from a VersionedStore'''
+        return None if self.__store is None else self.__store.get_version()
+
+    def get_coalesced(self):
+        '''Returns number of lookups that shared a result already in
+        progress'''
+        return self.__coalescer.coalesced
+
+    @contextlib.contextmanager
+    def acquire(self):
+        '''Context manager yielding the parser of the release served'''
+        if self.__store is None:
+            yield self.__parser
+        else:
+            with self.__store.acquire() as parser:
+                yield parser
+
+    def lookup(self, endpoint, body):
+        '''Returns an iterator of results, one per item of a request body
+        such as {"ids": [...]} to endpoint (see ENDPOINTS). Raises KeyError
+        for an unknown endpoint and ValueError for a malformed body.'''
+        items_key, func, options = ENDPOINTS[endpoint]
+
+        if not isinstance(body, dict) or \
+                not isinstance(body.get(items_key), list):
+            raise ValueError('Expected a list of %s' % items_key)
+
+        unknown = set(body) - set(options) - {items_key}
+
+        if unknown:
+            raise ValueError('Unknown options: %s' % ', '.join(sorted(unknown)))
+
+        kwargs = {key: body[key] for key in options if key in body}
+        _check_options(kwargs)
+        return self.__lookup(endpoint, body[items_key], func, kwargs)
+
+    def __lookup(self, endpoint, items, func, kwargs):
+        '''Yields results of func for items, holding the release throughout'''
+        options = json.dumps(kwargs, sort_keys=True)
+
+        with self.acquire() as parser:
+            for item in items:
+                key = (id(parser), endpoint, json.dumps(item), options)
+                yield self.__coalescer.get(
+                    key, functools.partial(func, parser, item, **kwargs))
+
+
+def _check_options(kwargs):
+    '''Raises ValueError for malformed options'''
+    if 'types' in kwargs and \
+            (not isinstance(kwargs['types'], list) or
+             not all(isinstance(typ, str) for typ in kwargs['types'])):
+        raise ValueError('Expected a list of types')
+
+
+def _get_chebi_id(chebi_id):
+    '''Returns an int ChEBI id from an int or CHEBI: prefixed string'''
+    return int(str(chebi_id).replace('CHEBI:', ''))
+
+
+def _get_ids(chebi_ids):
+    '''Returns CHEBI: prefixed ids'''
+    return ['CHEBI:' + str(chebi_id) for chebi_id in chebi_ids]
+
+
+def _get_value(value):
+    '''Returns value, or None in place of NaN, which JSON lacks'''
+    return None if isinstance(value, float) and math.isnan(value) else value
+
+
+def _get_entity(parser, chebi_id):
+    '''Returns the properties of an entity'''
+    try:
+        entity = ChebiEntity(_get_chebi_id(chebi_id), parser=parser)
+    except (ChebiException, ValueError):
+        return {'id': chebi_id, 'error': 'Not found'}
+
+    return {
+        'id': entity.get_id(),
+        'name': entity.get_name(),
+        'definition': entity.get_definition(),
+        'parent_id': entity.get_parent_id(),
+        'formula': entity.get_formula(),
+        'mass': _get_value(entity.get_mass()),
+        'charge': _get_value(entity.get_charge()),
+        'star': _get_value(entity.get_star()),
+        'inchi': entity.get_inchi(),
+        'inchi_key': entity.get_inchi_key(),
+        'smiles': entity.get_smiles(),
+    }
+
+
+def _get_names(parser, name):
+    '''Returns ids of compounds with a name'''
+    return {'name': name, 'ids': _get_ids(parser.get_ids_by_name(str(name)))}
+
+
+def _get_mass_window(parser, mass, tolerance=0.01):
+    '''Returns ids of compounds within tolerance of a mass'''
+    try:
+        min_mass = float(mass) - float(tolerance)
+        max_mass = float(mass) + float(tolerance)
+    except (TypeError, ValueError):
+        return {'mass': mass, 'error': 'Invalid mass'}
+
+    return {'mass': mass,
+            'ids': _get_ids(parser.get_ids_by_mass(min_mass, max_mass))}
+
+
+def _get_xrefs(parser, accession, type=None):  # pylint: disable=redefined-builtin
+    '''Returns ids of compounds with a database accession'''
+    return {'accession': accession,
+            'ids': _get_ids(parser.get_ids_by_accession(str(accession),
+                                                        type))}
+
+
+def _get_ancestors(parser, chebi_id, types=('is_a',)):
+    '''Returns ids of the ancestors of an entity'''
+    try:
+        ancestors = parser.get_ancestors(_get_chebi_id(chebi_id), types)
+    except ValueError:
+        return {'id': chebi_id, 'error': 'Not found'}
+
+    return {'id': chebi_id, 'ancestors': _get_ids(ancestors)}
+
+
+# Endpoints: (key of the list of items, lookup of each item, options)
+ENDPOINTS = {
+    '/entities': ('ids', _get_entity, ()),
+    '/names': ('names', _get_names, ()),
+    '/mass': ('masses', _get_mass_window, ('tolerance',)),
+    '/xrefs': ('accessions', _get_xrefs, ('type',)),
+    '/ancestors': ('ids', _get_ancestors, ('types',)),
+}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    '''Serves POSTs of JSON batches to ENDPOINTS, streaming one JSON result
+    per line (NDJSON) with chunked transfer encoding.'''
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        '''Serves /health'''
+        if self.path != '/health':
+            self.__send_error(404, 'Unknown endpoint %s' % self.path)
+            return
+
+        service = self.server.service
+        self.__send_json(200, {'status': 'ok',
+                               'version': service.get_version(),
+                               'coalesced': service.get_coalesced()})
+
+    def do_POST(self):
+        '''Serves a batch lookup'''
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+
+            if length < 0:
+                raise ValueError('Invalid Content-Length')
+
+            if length > _MAX_BODY_SIZE:
+                raise ValueError('Request body too large')
+
+            body = json.loads(self.rfile.read(length).decode('utf-8'))
+            results = self.server.service.lookup(self.path, body)
+        except KeyError:
+            self.__send_error(404, 'Unknown endpoint %s' % self.path)
+            return
+        except ValueError as err:
+            self.__send_error(400, str(err))
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        try:
+            chunk = []
+            size = 0
+
+            for result in results:
+                line = json.dumps(result).encode('utf-8') + b'\n'
+                chunk.append(line)
+                size += len(line)
+
+                if size >= _CHUNK_SIZE:
+                    self.__write_chunk(b''.join(chunk))
+                    chunk = []
+                    size = 0
+
+            if chunk:
+                self.__write_chunk(b''.join(chunk))
+
+            self.wfile.write(b'0\r\n\r\n')
+        except Exception:
+            # Headers are sent, so end the response by closing:
+            self.close_connection = True
+            raise
+        finally:
+            results.close()
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        '''Logs only if the server is verbose'''
+        if self.server.verbose:
+            BaseHTTPRequestHandler.log_message(self, format, *args)
+
+    def __write_chunk(self, data):
+        '''Writes a chunk of a chunked response'''
+        self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+
+    def __send_json(self, status, value):
+        '''Sends a complete JSON response'''
+        data = json.dumps(value).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def __send_error(self, status, message):
+        '''Sends a JSON error'''
+        self.__send_json(status, {'error': message})
+
+
+class _Server(ThreadingHTTPServer):
+    '''Serves each request in its own daemon thread.'''
+
+    daemon_threads = True
+
+    # Queue bursts of connections from many clients, rather than refusing
+    request_queue_size = 128
+
+
+def make_server(parser="filesystem", host='127.0.0.1', port=8080,
+                verbose=False):
+    '''Returns an HTTP server (not yet serving) of a LookupService over
+    parser, a parser, its name or a VersionedStore. Each request is served
+    in its own thread.'''
+    server = _Server((host, port), _Handler)
+    server.service = LookupService(parser)
+    server.verbose = verbose
+    return server
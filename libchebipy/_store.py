@@ -0,0 +1,118 @@
+'''
+libChEBIpy (c) University of Manchester 2015-2020
+
+libChEBIpy is licensed under the MIT License.
+
+To view a copy of this license, visit <http://opensource.org/licenses/MIT/>.
+
+@author:  neilswainston
+'''
+import contextlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class _Version(object):
+    '''A loaded release, with a count of the readers using it.'''
+
+    def __init__(self, version, parser):
+        self.version = version
+        self.parser = parser
+        self.readers = 0
+        self.retiring = False
+
+
+class VersionedStore(object):
+    '''Holds the parser of the active ChEBI release for long-running services.
+
+    The next release is built and loaded in the background by reload(), then
+    swapped in atomically: readers inside acquire() keep the release they
+    started with, and a replaced release is retired only once its last
+    reader has finished.'''
+
+    def __init__(self, parser_factory, tables=None, on_retire=None):
+        '''parser_factory is called with a version and returns a parser for
+        that release; tables are loaded before a release is swapped in (by
+        default, all tables); on_retire is called with the version and parser
+        of each retired release.'''
+        self.__parser_factory = parser_factory
+        self.__tables = tables
+        self.__on_retire = on_retire
+        self.__active = None
+        self.__lock = threading.Lock()
+        self.__executor = ThreadPoolExecutor(max_workers=1)
+
+    def get_version(self):
+        '''Returns version of the active release'''
+        active = self.__active
+        return None if active is None else active.version
+
+    @contextlib.contextmanager
+    def acquire(self):
+        '''Context manager yielding the parser of the active release, which is
+        not retired until the context exits.'''
+        with self.__lock:
+            active = self.__active
+
+            if active is None:
+                raise ValueError('No release has been loaded')
+
+            active.readers += 1
+
+        try:
+            yield active.parser
+        finally:
+            with self.__lock:
+                active.readers -= 1
+                retire = active.retiring and not active.readers
+
+            if retire:
+                self.__retire(active)
+
+    def reload(self, version=None, background=True):
+        '''Builds and loads the release given by version, then makes it the
+        active release. Returns a Future of the version if background, or
+        the version once swapped in otherwise.'''
+        if background:
+            return self.__executor.submit(self.__reload, version)
+
+        return self.__reload(version)
+
+    def close(self):
+        '''Waits for any background reload, then retires the active release.'''
+        self.__executor.shutdown(wait=True)
+
+        with self.__lock:
+            active, self.__active = self.__active, None
+
+        if active is not None:
+            self.__swap_out(active)
+
+    def __reload(self, version):
+        '''Builds, loads and swaps in a release.'''
+        parser = self.__parser_factory(version)
+        parser.load(self.__tables)
+
+        with self.__lock:
+            previous, self.__active = self.__active, _Version(version, parser)
+
+        if previous is not None:
+            self.__swap_out(previous)
+
+        return version
+
+    def __swap_out(self, previous):
+        '''Retires a replaced release now, or when its last reader exits.'''
+        with self.__lock:
+            previous.retiring = True
+            retire = not previous.readers
+
+        if retire:
+            self.__retire(previous)
+
+    def __retire(self, version):
+        '''Frees a retired release.'''
+        version.parser.clear()
+
+        if self.__on_retire is not None:
+            self.__on_retire(version.version, version.parser)
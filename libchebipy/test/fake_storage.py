@@ -0,0 +1,139 @@
+'''
+libChEBIpy (c) University of Manchester 2015
+
+libChEBIpy is licensed under the MIT License.
+
+To view a copy of this license, visit <http://opensource.org/licenses/MIT/>.
+
+@author:  neilswainston
+'''
+import collections
+import datetime
+import hashlib
+import os.path
+
+
+class FakeClient(object):
+    '''In-memory stand-in for google.cloud.storage.Client, counting the
+    storage API calls made through it.'''
+
+    def __init__(self):
+        self.objects = {}
+        self.calls = collections.Counter()
+        self.downloads = collections.Counter()
+        self.bytes_downloaded = 0
+
+    def bucket(self, bucket_name):
+        '''Returns a bucket (without an API call, as Client.bucket)'''
+        return FakeBucket(self, bucket_name)
+
+    def put(self, bucket_name, blob_name, data, updated=None):
+        '''Stores an object directly, without counting a call'''
+        generation = self.objects.get((bucket_name, blob_name),
+                                      {'generation': 0})['generation'] + 1
+        self.objects[(bucket_name, blob_name)] = {
+            'data': bytes(data),
+            'generation': generation,
+            'etag': hashlib.md5(data).hexdigest(),
+            'updated': updated or datetime.datetime.now(datetime.timezone.utc)}
+
+    def put_directory(self, bucket_name, directory, prefix=''):
+        '''Stores each file of directory, without counting calls'''
+        for filename in os.listdir(directory):
+            with open(os.path.join(directory, filename), 'rb') as src:
+                self.put(bucket_name, os.path.join(prefix, filename),
+                         src.read())
+
+
+class FakeBucket(object):
+    '''In-memory stand-in for google.cloud.storage.Bucket.'''
+
+    def __init__(self, client, name):
+        self.client = client
+        self.name = name
+
+    def blob(self, blob_name, generation=None):
+        '''Returns a blob (without an API call, as Bucket.blob)'''
+        return FakeBlob(self, blob_name, generation)
+
+    def get_blob(self, blob_name):
+        '''Returns a blob with its metadata, or None if it does not exist'''
+        self.client.calls['get_blob'] += 1
+        blob = FakeBlob(self, blob_name)
+
+        if blob._get_object() is None:
+            return None
+
+        blob._set_metadata()
+        return blob
+
+
+class FakeBlob(object):
+    '''In-memory stand-in for google.cloud.storage.Blob.'''
+
+    def __init__(self, bucket, name, generation=None):
+        self.bucket = bucket
+        self.name = name
+        self.generation = generation
+        self.etag = None
+        self.size = None
+        self.updated = None
+        self.time_created = None
+
+    def exists(self):
+        '''Returns whether the blob exists'''
+        self.bucket.client.calls['exists'] += 1
+        return self._get_object() is not None
+
+    def reload(self):
+        '''Fetches metadata'''
+        self.bucket.client.calls['reload'] += 1
+
+        if self._get_object() is None:
+            raise IOError('No such object: %s' % self.name)
+
+        self._set_metadata()
+
+    def upload_from_string(self, data, content_type=None):
+        '''Uploads data'''
+        del content_type
+        self.bucket.client.calls['upload'] += 1
+        self.bucket.client.put(self.bucket.name, self.name, data)
+        self._set_metadata()
+
+    def upload_from_filename(self, filename, content_type=None):
+        '''Uploads the contents of filename'''
+        with open(filename, 'rb') as src:
+            self.upload_from_string(src.read(), content_type)
+
+    def download_as_bytes(self, start=None, end=None):
+        '''Downloads data, or bytes start to end inclusive'''
+        self.bucket.client.calls['download'] += 1
+        obj = self._get_object()
+
+        if obj is None or self.generation not in (None, obj['generation']):
+            raise IOError('No such object: %s' % self.name)
+
+        data = obj['data'][start or 0:None if end is None else end + 1]
+        self.bucket.client.downloads[self.name] += 1
+        self.bucket.client.bytes_downloaded += len(data)
+        return data
+
+    def download_to_filename(self, filename, start=None, end=None):
+        '''Downloads data to filename'''
+        data = self.download_as_bytes(start, end)
+
+        with open(filename, 'wb') as dest:
+            dest.write(data)
+
+    def _get_object(self):
+        '''Returns the stored object, or None'''
+        return self.bucket.client.objects.get((self.bucket.name, self.name))
+
+    def _set_metadata(self):
+        '''Sets metadata from the stored object'''
+        obj = self._get_object()
+        self.generation = obj['generation']
+        self.etag = obj['etag']
+        self.size = len(obj['data'])
+        self.updated = self.time_created = obj['updated']
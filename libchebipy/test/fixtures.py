@@ -0,0 +1,145 @@
+'''
+libChEBIpy (c) University of Manchester 2015
+
+libChEBIpy is licensed under the MIT License.
+
+To view a copy of this license, visit <http://opensource.org/licenses/MIT/>.
+
+@author:  neilswainston
+'''
+import gzip
+import os.path
+import tempfile
+
+from libchebipy._parsers.filesystem import FileSystemCache
+
+
+_WATER_MOL = '''
+  Marvin  01211112152D
+
+  3  2  0  0  0  0            999 V2000
+   -0.4125    0.7145    0.0000 H   0  0  0  0  0  0  0  0  0  0  0  0
+    0.0000    0.0000    0.0000 O   0  0  0  0  0  0  0  0  0  0  0  0
+   -0.4125   -0.7145    0.0000 H   0  0  0  0  0  0  0  0  0  0  0  0
+  2  1  1  0  0  0  0
+  2  3  1  0  0  0  0
+M  END'''
+
+_METHANE_MOL = '''
+  Marvin  01211112152D
+
+  1  0  0  0  0  0            999 V2000
+    0.0000    0.0000    0.0000 C   0  0  0  0  0  0  0  0  0  0  0  0
+M  END'''
+
+MOLS = {15377: _WATER_MOL, 16183: _METHANE_MOL}
+
+FLAT_FILES = {
+    'chemical_data.tsv': [
+        'ID\tCOMPOUND_ID\tSOURCE\tTYPE\tCHEMICAL_DATA',
+        '1\t15377\tChEBI\tFORMULA\tH2O',
+        '2\t15377\tChEBI\tMASS\t18.01530',
+        '3\t15377\tChEBI\tCHARGE\t0',
+        '4\t4167\tKEGG COMPOUND\tFORMULA\tC6H12O6',
+        '5\t4167\tChEBI\tMASS\t180.15588',
+        '6\t4167\tChEBI\tCHARGE\t0',
+        '7\t16183\tChEBI\tFORMULA\tCH4',
+        '8\t16183\tChEBI\tMASS\t16.04246',
+        '9\t29412\tChEBI\tCHARGE\t1-'],
+    'comments.tsv': [
+        'ID\tCOMPOUND_ID\tCREATED_ON\tDATATYPE\tDATATYPE_ID\tTEXT',
+        '1\t15377\t2005-03-18\tGeneral\t15377\tThe universal solvent.',
+        '2\t4167\t2006-09-01\tDatabaseAccession\t99025\tZ stereomer'],
+    'compound_origins.tsv': [
+        'ID\tCOMPOUND_ID\tSPECIES_TEXT\tSPECIES_ACCESSION\tCOMPONENT_TEXT'
+        '\tCOMPONENT_ACCESSION\tSTRAIN_TEXT\tSTRAIN_ACCESSION\tSOURCE_TYPE'
+        '\tSOURCE_ACCESSION\tCOMMENTS',
+        '1\t15377\tHomo sapiens\tNCBI:txid9606\tnull\tnull\tnull\tnull\tDOI'
+        '\t10.1038/nbt.2488\tnull'],
+    'compounds.tsv.gz': [
+        'ID\tSTATUS\tCHEBI_ACCESSION\tSOURCE\tPARENT_ID\tNAME\tDEFINITION'
+        '\tMODIFIED_ON\tCREATED_BY\tSTAR',
+        '15377\tC\tCHEBI:15377\tKEGG COMPOUND\tnull\twater'
+        '\tAn oxygen hydride.\t2014-05-01\tCHEBI\t3',
+        '5585\tC\tCHEBI:5585\tKEGG COMPOUND\t15377\tnull\tnull\t2012-01-01'
+        '\tops$mennis\t3',
+        '4167\tC\tCHEBI:4167\tKEGG COMPOUND\tnull\tD-glucopyranose'
+        '\tA glucopyranose having D-configuration.\t2015-02-03\tCHEBI\t3',
+        '17634\tC\tCHEBI:17634\tKEGG COMPOUND\tnull\tD-glucose\tnull'
+        '\t2016-07-08\tCHEBI\t3',
+        '16183\tC\tCHEBI:16183\tKEGG COMPOUND\tnull\tmethane\tnull'
+        '\tnull\tCHEBI\t3',
+        '29412\tC\tCHEBI:29412\tChEBI\tnull\toxonium\tnull\t2010-10-10'
+        '\tCHEBI\t3',
+        '24431\tC\tCHEBI:24431\tChEBI\tnull\tchemical entity\tnull'
+        '\t2011-11-11\tCHEBI\t3',
+        '25212\tC\tCHEBI:25212\tChEBI\tnull\tmetabolite\tnull\t2013-03-13'
+        '\tCHEBI\t3'],
+    'database_accession.tsv': [
+        'ID\tCOMPOUND_ID\tSOURCE\tTYPE\tACCESSION_NUMBER',
+        '1\t15377\tMetaCyc\tMetaCyc accession\tWATER',
+        '2\t15377\tKEGG COMPOUND\tKEGG COMPOUND accession\tC00001',
+        '3\t4167\tMetaCyc\tMetaCyc accession\tD-Glucose'],
+    'chebiId_inchi.tsv': [
+        'CHEBI_ID\tInChI',
+        '15377\tInChI=1S/H2O/h1H2',
+        '16183\tInChI=1S/CH4/h1H4'],
+    'names.tsv.gz': [
+        'ID\tCOMPOUND_ID\tTYPE\tSOURCE\tNAME\tADAPTED\tLANGUAGE',
+        '1\t15377\tSYNONYM\tChEBI\teau\tF\tfr',
+        '2\t15377\tSYNONYM\tChEBI\tdihydrogen oxide\tF\ten',
+        '3\t4167\tSYNONYM\tKEGG COMPOUND\tGrape sugar\tF\ten'],
+    'reference.tsv.gz': [
+        'COMPOUND_ID\tREFERENCE_ID\tREFERENCE_DB_NAME\tLOCATION_IN_REF'
+        '\tREFERENCE_NAME',
+        '15377\t1234\tPubMed Central',
+        '4167\tWO2006008754\tPatent\t\tNOVEL INTERMEDIATES',
+        '15377\t5678\tPubMed'],
+    'relation.tsv': [
+        'ID\tTYPE\tINIT_ID\tFINAL_ID\tSTATUS',
+        '1\tis_a\t17634\t4167\tC',
+        '2\tis_a\t24431\t17634\tC',
+        '3\thas_role\t25212\t15377\tC',
+        '4\thas_role\t25212\t4167\tC',
+        '5\tis_conjugate_acid_of\t15377\t29412\tC'],
+    'structures.csv.gz': [
+        'ID,COMPOUND_ID,STRUCTURE,TYPE,DIMENSION,DEFAULT_STRUCTURE,'
+        'AUTOGEN_STRUCTURE',
+        '1,15377,"' + _WATER_MOL.replace('\nM  END', '\nM  END\n",mol,2D,Y,N'),
+        '2,15377,XLYOFNOQVPJJNP-UHFFFAOYSA-N,InChIKey,1D,N,N',
+        '3,15377,[H]O[H],SMILES,1D,N,N',
+        '4,16183,"' + _METHANE_MOL.replace('\nM  END',
+                                          '\nM  END\n",mol,2D,Y,N'),
+        '5,16183,VNWKTOKETHGBQD-UHFFFAOYSA-N,InChIKey,1D,N,N',
+        '6,16183,C,SMILES,1D,N,N'],
+}
+
+
+def write_flat_files(directory=None, flat_files=None):
+    '''Writes flat files in the ChEBI download format to directory, returning
+    the directory. Lines are str, written as UTF-8, or bytes written as
+    is (including their line ending).'''
+    directory = directory or tempfile.mkdtemp()
+    flat_files = flat_files or FLAT_FILES
+
+    for filename, lines in flat_files.items():
+        filepath = os.path.join(directory, filename)
+        data = b''.join(line if isinstance(line, bytes)
+                        else line.encode('utf-8') + b'\n'
+                        for line in lines)
+
+        if filename.endswith('.gz'):
+            with gzip.open(filepath, 'wb') as gz_file:
+                gz_file.write(data)
+        else:
+            with open(filepath, 'wb') as flat_file:
+                flat_file.write(data)
+
+    return directory
+
+
+def get_parser(directory=None):
+    '''Returns a FileSystemCache over fixture flat files, with auto update
+    disabled so that nothing is downloaded.'''
+    return FileSystemCache(download_dir=write_flat_files(directory),
+                           auto_update=False)
@@ -0,0 +1,98 @@
+'''
+libChEBIpy (c) University of Manchester 2015
+
+libChEBIpy is licensed under the MIT License.
+
+To view a copy of this license, visit <http://opensource.org/licenses/MIT/>.
+
+@author:  neilswainston
+'''
+import io
+import os.path
+import tempfile
+import unittest
+
+from libchebipy.__main__ import main
+from libchebipy._annotate import annotate
+from libchebipy.test import fixtures
+
+_INPUT = '''sample\tcompound
+a\tCHEBI:15377
+b\t4167
+c\tnosuch
+d\t5585
+'''
+
+
+class TestAnnotate(unittest.TestCase):
+    '''Test class for bulk annotation.'''
+
+    def setUp(self):
+        self.parser = fixtures.get_parser()
+
+    def test_annotate_ids(self):
+        '''Tests rows are annotated by id, with unknown ids left empty.'''
+        lines = self.__annotate(_INPUT, column='compound',
+                                fields=['chebi_id', 'name', 'mass',
+                                        'parent_id'])
+
+        self.assertEqual(['sample\tcompound\tchebi_id\tname\tmass\tparent_id',
+                          'a\tCHEBI:15377\tCHEBI:15377\twater\t18.0153\t',
+                          'b\t4167\tCHEBI:4167\tD-glucopyranose\t180.15588\t',
+                          'c\tnosuch\t\t\t\t',
+                          'd\t5585\tCHEBI:5585\twater\t18.0153\tCHEBI:15377'],
+                         lines)
+
+    def test_annotate_keys(self):
+        '''Tests rows are annotated by name and InChI key.'''
+        self.assertEqual(['Grape sugar\tCHEBI:4167'],
+                         self.__annotate('Grape sugar\n', key='name',
+                                         fields=['chebi_id'], header=False))
+        self.assertEqual(['XLYOFNOQVPJJNP-UHFFFAOYSA-N\tH2O'],
+                         self.__annotate('XLYOFNOQVPJJNP-UHFFFAOYSA-N\n',
+                                         key='inchikey', fields=['formula'],
+                                         header=False))
+
+    def test_annotate_chunks(self):
+        '''Tests output is the same in chunks, and across processes.'''
+        data = _INPUT + ''.join('x\t%d\n' % chebi_id
+                                for chebi_id in [15377, 4167, 16183] * 20)
+        expected = self.__annotate(data, column=1)
+
+        self.assertEqual(expected, self.__annotate(data, column=1,
+                                                   chunk_size=7))
+        self.assertEqual(expected, self.__annotate(data, column=1,
+                                                   chunk_size=7,
+                                                   processes=2))
+
+    def test_unknown_field(self):
+        '''Tests unknown fields are rejected.'''
+        self.assertRaises(ValueError, self.__annotate, _INPUT,
+                          fields=['nosuch'])
+
+    def test_main(self):
+        '''Tests the annotate command.'''
+        directory = tempfile.mkdtemp()
+        input_path = os.path.join(directory, 'input.tsv')
+        output_path = os.path.join(directory, 'output.tsv')
+
+        with open(input_path, 'w') as input_file:
+            input_file.write(_INPUT)
+
+        main(['annotate', input_path, '-o', output_path, '--column',
+              'compound', '--fields', 'name', '--no-auto-update',
+              '--download-dir', self.parser.download_dir])
+
+        with open(output_path) as output_file:
+            self.assertEqual('a\tCHEBI:15377\twater\n',
+                             output_file.readlines()[1])
+
+    def __annotate(self, data, **kwargs):
+        '''Returns annotated lines of data.'''
+        outfile = io.StringIO()
+        annotate(io.StringIO(data), outfile, self.parser, **kwargs)
+        return outfile.getvalue().splitlines()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+'''
+libChEBIpy (c) University of Manchester 2015
+
+libChEBIpy is licensed under the MIT License.
+
+To view a copy of this license, visit <http://opensource.org/licenses/MIT/>.
+
+@author:  neilswainston
+'''
+import datetime
+import unittest
+
+from libchebipy import Comment
+from libchebipy._parsers.filesystem import FileSystemCache
+from libchebipy.test import fixtures
+
+
+class TestDates(unittest.TestCase):
+    '''Test class for dates, which are parsed on access.'''
+
+    def setUp(self):
+        self.parsers = [fixtures.get_parser(),
+                        FileSystemCache(
+                            download_dir=fixtures.write_flat_files(),
+                            auto_update=False, packed=True)]
+
+    def test_get_modified_on(self):
+        '''Tests modified on dates are returned as datetimes.'''
+        for parser in self.parsers:
+            self.assertEqual(datetime.datetime(2014, 5, 1),
+                             parser.get_modified_on(15377))
+            self.assertIsNone(parser.get_modified_on(16183))
+            self.assertIsNone(parser.get_modified_on(-1))
+            self.assertEqual(datetime.datetime(2014, 5, 1),
+                             parser.get_all_modified_on([15377, 5585, 16183]))
+            self.assertIsNone(parser.get_all_modified_on([16183, -1]))
+
+    def test_get_modified_since(self):
+        '''Tests compounds modified since a date are filtered.'''
+        for parser in self.parsers:
+            self.assertEqual([4167, 15377, 17634],
+                             parser.get_modified_since(
+                                 datetime.date(2014, 5, 1)))
+            self.assertEqual([17634],
+                             parser.get_modified_since(
+                                 datetime.datetime(2015, 2, 4, 12)))
+            self.assertEqual([], parser.get_modified_since(
+                datetime.date(2020, 1, 1)))
+
+    def test_comment_created_on(self):
+        '''Tests comment dates are parsed as they always have been.'''
+        expected = Comment('General', '15377', 'The universal solvent.',
+                           datetime.datetime.strptime('2005-03-18',
+                                                      '%Y-%M-%d'))
+
+        for parser in self.parsers:
+            comment = parser.get_comments(15377)[0]
+            self.assertEqual(expected, comment)
+            self.assertEqual(expected.get_created_on(),
+                             comment.get_created_on())
+
+
+if __name__ == "__main__":
+    unittest.main()
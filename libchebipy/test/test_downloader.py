@@ -0,0 +1,272 @@
+'''
+libChEBIpy (c) University of Manchester 2015
+
+libChEBIpy is licensed under the MIT License.
+
+To view a copy of this license, visit <http://opensource.org/licenses/MIT/>.
+
+@author:  neilswainston
+'''
+import email.utils
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from libchebipy._parsers import downloader
+from libchebipy._parsers.base import FILENAMES
+from libchebipy._parsers.filesystem import FileSystemCache
+from libchebipy.test import fixtures
+
+
+class _FileHandler(BaseHTTPRequestHandler):
+    '''Local stand-in for the ChEBI download site, supporting HEAD and Range
+    requests.'''
+
+    def do_HEAD(self):
+        '''Serves file headers.'''
+        self.__serve(False)
+
+    def do_GET(self):
+        '''Serves file contents.'''
+        self.__serve(True)
+
+    def __serve(self, send_body):
+        '''COMMENT'''
+        server = self.server
+        filepath = os.path.join(server.directory, os.path.basename(self.path))
+
+        if not os.path.isfile(filepath):
+            self.send_error(404)
+            return
+
+        with open(filepath, 'rb') as infile:
+            data = infile.read()
+
+        with server.lock:
+            server.requests.append((self.command, os.path.basename(self.path)))
+            server.ranges.append(self.headers.get('Range'))
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight,
+                                       server.in_flight)
+
+        time.sleep(server.delay if send_body else 0)
+
+        with server.lock:
+            server.in_flight -= 1
+
+        start = 0
+        byte_range = self.headers.get('Range')
+
+        if byte_range:
+            start = int(byte_range[len('bytes='):].split('-')[0])
+            self.send_response(206)
+            self.send_header('Content-Range', 'bytes %d-%d/%d' %
+                             (start, len(data) - 1, len(data)))
+        else:
+            self.send_response(200)
+
+        self.send_header('Content-Length', str(len(data) - start))
+        self.send_header('Last-Modified', email.utils.formatdate(
+            os.path.getmtime(filepath), usegmt=True))
+        self.end_headers()
+
+        if send_body:
+            self.wfile.write(data[start:])
+
+    def log_message(self, *args):
+        '''Silences request logging.'''
+
+
+class TestDownloader(unittest.TestCase):
+    '''Test class for the resumable downloader.'''
+
+    def setUp(self):
+        '''COMMENT'''
+        self.__remote_dir = fixtures.write_flat_files()
+        self.__server = ThreadingHTTPServer(('127.0.0.1', 0), _FileHandler)
+        self.__server.directory = self.__remote_dir
+        self.__server.lock = threading.Lock()
+        self.__server.requests = []
+        self.__server.ranges = []
+        self.__server.in_flight = 0
+        self.__server.max_in_flight = 0
+        self.__server.delay = 0
+        threading.Thread(target=self.__server.serve_forever,
+                         daemon=True).start()
+
+        self.__url = 'http://127.0.0.1:%d/chebi/' % \
+            self.__server.server_address[1]
+
+    def tearDown(self):
+        '''COMMENT'''
+        self.__server.shutdown()
+        self.__server.server_close()
+
+    def test_get_remote_metadata(self):
+        '''Tests remote size and mtime are read from headers.'''
+        filepath = os.path.join(self.__remote_dir, 'relation.tsv')
+        os.utime(filepath, (1500000000, 1500000000))
+        self.assertEqual(
+            (os.path.getsize(filepath), 1500000000),
+            downloader.get_remote_metadata(self.__url + 'relation.tsv'))
+
+    def test_download(self):
+        '''Tests download lands at filepath with no partial file left.'''
+        filepath = os.path.join(tempfile.mkdtemp(), 'relation.tsv')
+        downloader.download(self.__url + 'relation.tsv', filepath)
+
+        self.assertEqual(self.__read('relation.tsv'), _read(filepath))
+        self.assertFalse(os.path.exists(filepath + '.part'))
+
+    def test_download_resume(self):
+        '''Tests partial downloads are resumed with a Range request.'''
+        data = self.__read('relation.tsv')
+        filepath = os.path.join(tempfile.mkdtemp(), 'relation.tsv')
+
+        size, mtime = downloader.get_remote_metadata(self.__url +
+                                                     'relation.tsv')
+
+        with open(filepath + '.part', 'wb') as part_file:
+            part_file.write(data[:20])
+
+        with open(filepath + '.part.version', 'w') as version_file:
+            json.dump({'size': size, 'mtime': mtime}, version_file)
+
+        downloader.download(self.__url + 'relation.tsv', filepath)
+
+        self.assertEqual(data, _read(filepath))
+        self.assertIn('bytes=20-', self.__server.ranges)
+        self.assertFalse(os.path.exists(filepath + '.part.version'))
+
+    def test_download_resume_changed(self):
+        '''Tests partial downloads of another version are discarded.'''
+        data = self.__read('relation.tsv')
+        filepath = os.path.join(tempfile.mkdtemp(), 'relation.tsv')
+
+        for version in [None, {'size': len(data), 'mtime': 1}]:
+            with open(filepath + '.part', 'wb') as part_file:
+                part_file.write(b'x' * 20)
+
+            if version is not None:
+                with open(filepath + '.part.version', 'w') as version_file:
+                    json.dump(version, version_file)
+
+            downloader.download(self.__url + 'relation.tsv', filepath)
+
+            self.assertEqual(data, _read(filepath))
+
+        self.assertNotIn('bytes=20-', self.__server.ranges)
+
+    def test_download_md5(self):
+        '''Tests md5 is verified.'''
+        data = self.__read('relation.tsv')
+        filepath = os.path.join(tempfile.mkdtemp(), 'relation.tsv')
+
+        self.assertRaises(IOError, downloader.download,
+                          self.__url + 'relation.tsv', filepath, md5='0' * 32)
+        self.assertFalse(os.path.exists(filepath))
+        self.assertFalse(os.path.exists(filepath + '.part'))
+
+        downloader.download(self.__url + 'relation.tsv', filepath,
+                            md5=hashlib.md5(data).hexdigest())
+        self.assertEqual(data, _read(filepath))
+
+    def test_download_size(self):
+        '''Tests size is verified and the file is not moved into place.'''
+        filepath = os.path.join(tempfile.mkdtemp(), 'relation.tsv')
+
+        self.assertRaises(IOError, downloader.download,
+                          self.__url + 'relation.tsv', filepath, size=1)
+        self.assertFalse(os.path.exists(filepath))
+
+    def test_prefetch_all(self):
+        '''Tests all files are fetched in parallel and extracted.'''
+        self.__server.delay = 0.05
+        parser = FileSystemCache(download_dir=tempfile.mkdtemp(),
+                                 url=self.__url)
+        filepaths = parser.prefetch_all(max_workers=4)
+
+        self.assertEqual(len(FILENAMES), len(filepaths))
+        self.assertGreater(self.__server.max_in_flight, 1)
+
+        for filepath in filepaths:
+            self.assertFalse(filepath.endswith('.gz'))
+            self.assertTrue(os.path.isfile(filepath))
+
+        self.assertEqual('water', parser.get_name(15377))
+
+    def test_is_current(self):
+        '''Tests files are fetched once and metadata is cached.'''
+        parser = FileSystemCache(download_dir=tempfile.mkdtemp(),
+                                 url=self.__url)
+        parser.get_file('relation.tsv')
+        parser.get_file('relation.tsv')
+        parser.get_file('relation.tsv')
+
+        self.assertEqual([('HEAD', 'relation.tsv'), ('GET', 'relation.tsv')],
+                         self.__server.requests)
+
+    def test_is_current_changed(self):
+        '''Tests files are refetched only when the remote file changes.'''
+        parser = FileSystemCache(download_dir=tempfile.mkdtemp(),
+                                 url=self.__url, metadata_ttl=0)
+        filepath = parser.get_file('compounds.tsv.gz')
+        parser.get_file('compounds.tsv.gz')
+        self.assertEqual(1, self.__server.requests.count(
+            ('GET', 'compounds.tsv.gz')))
+
+        # Publish a new release of the file:
+        flat_files = dict(fixtures.FLAT_FILES)
+        flat_files['compounds.tsv.gz'] = flat_files['compounds.tsv.gz'][:2]
+        fixtures.write_flat_files(self.__remote_dir, flat_files)
+        remote_filepath = os.path.join(self.__remote_dir, 'compounds.tsv.gz')
+        os.utime(remote_filepath, (time.time() + 60, time.time() + 60))
+
+        self.assertEqual(filepath, parser.get_file('compounds.tsv.gz'))
+        self.assertEqual(2, self.__server.requests.count(
+            ('GET', 'compounds.tsv.gz')))
+
+        with open(filepath) as infile:
+            self.assertEqual(2, len(infile.readlines()))
+
+    def test_is_current_unreachable(self):
+        '''Tests the release date is used if the site is unreachable.'''
+        download_dir = fixtures.write_flat_files()
+        parser = FileSystemCache(download_dir=download_dir,
+                                 url='http://127.0.0.1:1/chebi/')
+        self.assertTrue(parser._is_current(
+            os.path.join(download_dir, 'relation.tsv')))
+
+    def test_is_current_unreachable_cached(self):
+        '''Tests a failed metadata lookup is not retried on every call.'''
+        download_dir = fixtures.write_flat_files()
+        parser = FileSystemCache(download_dir=download_dir,
+                                 url='http://127.0.0.1:1/chebi/', timeout=1)
+
+        with mock.patch.object(downloader, 'get_remote_metadata',
+                               side_effect=IOError('Unreachable')) as lookup:
+            for _ in range(3):
+                parser.get_file('relation.tsv')
+
+        self.assertEqual(1, lookup.call_count)
+        self.assertEqual(1, lookup.call_args[0][1])
+
+    def __read(self, filename):
+        '''COMMENT'''
+        return _read(os.path.join(self.__remote_dir, filename))
+
+
+def _read(filepath):
+    '''COMMENT'''
+    with open(filepath, 'rb') as infile:
+        return infile.read()
+
+
+if __name__ == "__main__":
+    unittest.main()
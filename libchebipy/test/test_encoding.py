@@ -0,0 +1,84 @@
+'''
+libChEBIpy (c) University of Manchester 2015
+
+libChEBIpy is licensed under the MIT License.
+
+To view a copy of this license, visit <http://opensource.org/licenses/MIT/>.
+
+@author:  neilswainston
+'''
+import io
+import unittest
+from unittest import mock
+
+from libchebipy._parsers.filesystem import FileSystemCache
+from libchebipy.test import fixtures
+
+
+# Names rows in UTF-8, cp1252, latin-1 only (0x81 is undefined in cp1252)
+# and with fields in different encodings, with CRLF and LF line endings:
+_NAMES = [
+    'ID\tCOMPOUND_ID\tTYPE\tSOURCE\tNAME\tADAPTED\tLANGUAGE',
+    '1\t15377\tSYNONYM\tChEBI\teau\tF\tfr',
+    '2\t4167\tSYNONYM\tChEBI\tα-D-glucose\tF\ten'.encode('utf-8') +
+    b'\r\n',
+    '3\t4167\tSYNONYM\tChEBI\tglucose – dextrose\tF\ten'.encode(
+        'cp1252') + b'\n',
+    b'4\t4167\tSYNONYM\tChEBI\tglucose\x81\tF\ten\n',
+    '5\t16183\tSYNONYM\tChEBI\tméthane\tF\tfr'.encode('cp1252') +
+    '\té'.encode('utf-8') + b'\n',
+    '6\t16183\tSYNONYM\tChEBI\tmethane\tF\ten']
+
+
+class TestEncoding(unittest.TestCase):
+    '''Test class for reading flat files in mixed encodings.'''
+
+    def setUp(self):
+        flat_files = dict(fixtures.FLAT_FILES)
+        flat_files['names.tsv.gz'] = _NAMES
+        self.parser = FileSystemCache(
+            download_dir=fixtures.write_flat_files(flat_files=flat_files),
+            auto_update=False)
+
+    def test_mixed_encodings(self):
+        '''Tests each field is decoded in its own encoding.'''
+        self.assertEqual(['α-D-glucose', 'glucose – dextrose',
+                          'glucose\x81'],
+                         [nme.get_name()
+                          for nme in self.parser.get_names(4167)])
+
+        names = self.parser.get_names(16183)
+        self.assertEqual(['méthane', 'methane'],
+                         [nme.get_name() for nme in names])
+        self.assertEqual(['fr', 'en'],
+                         [nme.get_language() for nme in names])
+
+    def test_single_pass(self):
+        '''Tests a file is read once, with no duplicated rows.'''
+        with mock.patch('libchebipy._parsers.base.io.open',
+                        wraps=io.open) as mock_open:
+            self.assertEqual(1, len(self.parser.get_names(15377)))
+
+        self.assertEqual(1, len([args for args, _ in mock_open.call_args_list
+                                 if str(args[0]).endswith('names.tsv')]))
+        self.assertEqual(len(_NAMES) - 1,
+                         sum(len(self.parser.get_names(chebi_id))
+                             for chebi_id in self.parser._ALL_NAMES))
+
+    def test_mol(self):
+        '''Tests mol blocks are read with universal newlines.'''
+        expected = fixtures.get_parser().get_mol(15377).get_structure()
+
+        flat_files = dict(fixtures.FLAT_FILES)
+        flat_files['structures.csv.gz'] = [
+            (line + '\n').replace('\n', '\r\n').encode('utf-8')
+            for line in flat_files['structures.csv.gz']]
+        parser = FileSystemCache(
+            download_dir=fixtures.write_flat_files(flat_files=flat_files),
+            auto_update=False)
+
+        self.assertEqual(expected, parser.get_mol(15377).get_structure())
+
+
+if __name__ == "__main__":
+    unittest.main()
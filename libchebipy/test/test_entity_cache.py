@@ -0,0 +1,96 @@
+'''
+libChEBIpy (c) University of Manchester 2015
+
+libChEBIpy is licensed under the MIT License.
+
+To view a copy of this license, visit <http://opensource.org/licenses/MIT/>.
+
+@author:  neilswainston
+'''
+import os
+import time
+import unittest
+
+from libchebipy import ChebiEntity, ChebiException, EntityCache
+from libchebipy.test import fixtures
+
+
+class TestEntityCache(unittest.TestCase):
+    '''Test class for EntityCache.'''
+
+    def setUp(self):
+        '''COMMENT'''
+        self.__parser = fixtures.get_parser()
+        self.__cache = EntityCache(maxsize=2)
+
+    def test_hit(self):
+        '''Tests repeated lookups share one entity.'''
+        entity = ChebiEntity.get('CHEBI:15377', self.__parser,
+                                 cache=self.__cache)
+        self.assertIs(entity, ChebiEntity.get(15377, self.__parser,
+                                              cache=self.__cache))
+        self.assertEqual(ChebiEntity(15377, parser=self.__parser), entity)
+        self.assertEqual(1, self.__cache.get_stats()['hits'])
+        self.assertEqual(1, self.__cache.get_stats()['misses'])
+
+    def test_memoised(self):
+        '''Tests getter results of cached entities are memoised.'''
+        entity = ChebiEntity.get(4167, self.__parser, cache=self.__cache)
+        names = entity.get_names()
+        self.assertEqual(names, entity.get_names())
+        self.assertEqual('D-glucopyranose', entity.get_name())
+
+        # Lists are copies, so modifying one leaves the memoised result:
+        names.clear()
+        self.assertTrue(entity.get_names())
+
+    def test_evict(self):
+        '''Tests least recently used entities are evicted.'''
+        water = ChebiEntity.get(15377, self.__parser, cache=self.__cache)
+        ChebiEntity.get(4167, self.__parser, cache=self.__cache)
+        ChebiEntity.get(15377, self.__parser, cache=self.__cache)
+        ChebiEntity.get(16183, self.__parser, cache=self.__cache)
+
+        self.assertIs(water, ChebiEntity.get(15377, self.__parser,
+                                             cache=self.__cache))
+        stats = self.__cache.get_stats()
+        self.assertEqual(2, stats['size'])
+        self.assertEqual(1, stats['evictions'])
+
+    def test_ttl(self):
+        '''Tests entities older than ttl are rebuilt.'''
+        cache = EntityCache(ttl=0)
+        entity = ChebiEntity.get(15377, self.__parser, cache=cache)
+        time.sleep(0.01)
+        self.assertIsNot(entity, ChebiEntity.get(15377, self.__parser,
+                                                 cache=cache))
+        self.assertEqual(1, cache.get_stats()['expirations'])
+
+    def test_invalidate(self):
+        '''Tests entities are rebuilt once parser data is cleared.'''
+        entity = ChebiEntity.get(15377, self.__parser, cache=self.__cache)
+        self.__parser.clear()
+        self.assertIsNot(entity, ChebiEntity.get(15377, self.__parser,
+                                                 cache=self.__cache))
+        self.assertEqual(1, self.__cache.get_stats()['invalidations'])
+
+    def test_mol_filename(self):
+        '''Tests each call writes a new mol file.'''
+        entity = ChebiEntity.get(15377, self.__parser, cache=self.__cache)
+        mol_filename = entity.get_mol_filename()
+        os.remove(mol_filename)
+
+        mol_filename = entity.get_mol_filename()
+        self.assertTrue(os.path.exists(mol_filename))
+        os.remove(mol_filename)
+
+    def test_invalid(self):
+        '''Tests invalid ids raise and are not cached.'''
+        with self.assertRaises(ChebiException):
+            ChebiEntity.get(-1, self.__parser, cache=self.__cache)
+
+        self.assertEqual(0, self.__cache.get_stats()['size'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+'''
+libChEBIpy (c) University of Manchester 2015
+
+libChEBIpy is licensed under the MIT License.
+
+To view a copy of this license, visit <http://opensource.org/licenses/MIT/>.
+
+@author:  neilswainston
+'''
+import io
+import os.path
+import tempfile
+import unittest
+
+from libchebipy.__main__ import main
+from libchebipy._export import export_mol_files, export_sdf
+from libchebipy.test import fixtures
+
+
+class TestExport(unittest.TestCase):
+    '''Test class for SDF and mol file export.'''
+
+    def setUp(self):
+        self.parser = fixtures.get_parser()
+
+    def test_iter_mols(self):
+        '''Tests default mol blocks of all compounds are read, in file
+        order, as by get_mol.'''
+        mols = list(self.parser.iter_mols())
+        self.assertEqual([15377, 16183], [chebi_id for chebi_id, _ in mols])
+
+        for chebi_id, structure in mols:
+            self.assertEqual(self.parser.get_mol(chebi_id), structure)
+
+        self.assertEqual([16183], [chebi_id for chebi_id, _ in
+                                   self.parser.iter_mols(['16183', 4167])])
+
+    def test_export_sdf(self):
+        '''Tests SDF records carry their id and selected properties.'''
+        outfile = io.StringIO()
+        self.assertEqual(1, export_sdf(outfile, self.parser, [15377],
+                                       ['name', 'mass']))
+
+        sdf = outfile.getvalue()
+        self.assertTrue(sdf.startswith('CHEBI:15377\n  Marvin'))
+        self.assertTrue(sdf.endswith('M  END\n> <ChEBI Name>\nwater\n\n'
+                                     '> <Mass>\n18.0153\n\n$$$$\n'))
+
+    def test_export_sdf_all(self):
+        '''Tests all default structures are exported, with properties.'''
+        outfile = io.StringIO()
+        self.assertEqual(2, export_sdf(outfile, self.parser))
+        self.assertEqual(2, outfile.getvalue().count('$$$$\n'))
+        self.assertIn('> <InChIKey>\nVNWKTOKETHGBQD-UHFFFAOYSA-N\n',
+                      outfile.getvalue())
+        self.assertRaises(ValueError, export_sdf, outfile, self.parser,
+                          properties=['nosuch'])
+
+    def test_export_mol_files(self):
+        '''Tests a mol file is written per compound.'''
+        directory = os.path.join(tempfile.mkdtemp(), 'mols')
+        filenames = export_mol_files(directory, self.parser)
+
+        self.assertEqual(['ChEBI_15377.mol', 'ChEBI_16183.mol'],
+                         sorted(os.listdir(directory)))
+
+        with open(filenames[0]) as mol_file:
+            self.assertEqual(
+                self.parser.get_mol(15377).get_structure().split('\n')[1:],
+                mol_file.read().split('\n')[1:])
+
+    def test_main(self):
+        '''Tests the export command.'''
+        directory = tempfile.mkdtemp()
+        ids_path = os.path.join(directory, 'ids.txt')
+        sdf_path = os.path.join(directory, 'out.sdf')
+
+        with open(ids_path, 'w') as ids_file:
+            ids_file.write('CHEBI:16183\n')
+
+        main(['export', '-o', sdf_path, '--ids-file', ids_path,
+              '--properties', 'formula', '--no-auto-update',
+              '--download-dir', self.parser.download_dir])
+
+        with open(sdf_path) as sdf_file:
+            self.assertIn('> <Formulae>\nCH4\n', sdf_file.read())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,179 @@
+'''
+libChEBIpy (c) University of Manchester 2015
+
+libChEBIpy is licensed under the MIT License.
+
+To view a copy of this license, visit <http://opensource.org/licenses/MIT/>.
+
+@author:  neilswainston
+'''
+import datetime
+import unittest
+
+from libchebipy._parsers.googlestorage import BLOB_METADATA, \
+    SNAPSHOT_NAME, GoogleStorageCache
+from libchebipy._parsers.packed import PackedTable
+from libchebipy.test import fixtures
+from libchebipy.test.fake_storage import FakeClient
+from libchebipy.test.test_packed import assert_same_getters
+
+
+class _NoParseCache(GoogleStorageCache):
+    '''GoogleStorageCache that fails on any parse.'''
+
+    def _parse_table(self, table):
+        raise AssertionError('Parsed %s' % table)
+
+
+class TestGoogleStorageCache(unittest.TestCase):
+    '''Test class for GoogleStorageCache, over a fake bucket.'''
+
+    def setUp(self):
+        BLOB_METADATA.invalidate()
+        self.client = FakeClient()
+        self.client.put_directory('bucket', fixtures.write_flat_files())
+        self.expected_parser = fixtures.get_parser()
+
+    def test_flat_files(self):
+        '''Tests flat files are parsed without a snapshot.'''
+        parser = self.__get_parser(GoogleStorageCache)
+        assert_same_getters(self, parser, self.expected_parser)
+
+    def test_snapshot(self):
+        '''Tests a published snapshot is loaded in one download, without
+        parsing.'''
+        self.__get_parser(GoogleStorageCache, snapshot=False) \
+            .publish_snapshot()
+        self.client.calls.clear()
+
+        parser = self.__get_parser(_NoParseCache)
+
+        self.assertEqual('water', parser.get_name(15377))
+        self.assertEqual({'get_blob': 1, 'download': 1},
+                         dict(self.client.calls))
+        self.assertIsInstance(parser._ALL_NAMES, PackedTable)
+        assert_same_getters(self, parser, self.expected_parser)
+        self.assertEqual(self.expected_parser.get_mol(15377),
+                         parser.get_mol(15377))
+
+    def test_snapshot_tables(self):
+        '''Tests tables missing from a snapshot are parsed.'''
+        self.__get_parser(GoogleStorageCache, snapshot=False) \
+            .publish_snapshot(['compounds'])
+
+        parser = self.__get_parser(GoogleStorageCache)
+        self.assertEqual('water', parser.get_name(15377))
+        self.assertEqual(['compounds'], parser.get_loaded_tables())
+
+        self.assertEqual(self.expected_parser.get_names(15377),
+                         parser.get_names(15377))
+
+    def test_stale_snapshot(self):
+        '''Tests a snapshot published before the flat files it was parsed
+        from is not loaded.'''
+        parser = self.__get_parser(GoogleStorageCache, snapshot=False)
+        parser.publish_snapshot(['compounds'])
+
+        self.client.put('bucket', SNAPSHOT_NAME,
+                        self.client.objects[('bucket', SNAPSHOT_NAME)]['data'],
+                        updated=datetime.datetime(2000, 1, 1,
+                                                  tzinfo=datetime.timezone.utc))
+
+        parser = self.__get_parser(GoogleStorageCache)
+        parser.auto_update = True
+        self.assertFalse(parser.load_snapshot())
+
+        parser.auto_update = False
+        self.assertTrue(parser.load_snapshot())
+
+    def test_metadata_cached(self):
+        '''Tests repeated getters make no storage API calls.'''
+        parser = self.__get_parser(GoogleStorageCache, auto_update=True)
+        parser.get_mol(15377)
+        parser.get_name(15377)
+        self.client.calls.clear()
+
+        for _ in range(3):
+            parser.get_mol(15377)
+            parser.get_name(15377)
+            parser.get_references([15377])
+
+        # Only reference.tsv.gz and its offset index, on first access:
+        self.assertEqual({'get_blob': 2, 'download': 1},
+                         dict(self.client.calls))
+
+    def test_metadata_shared(self):
+        '''Tests metadata is shared between parsers in a process.'''
+        self.__get_parser(GoogleStorageCache, auto_update=True).get_mol(15377)
+        self.client.calls.clear()
+
+        self.__get_parser(GoogleStorageCache, auto_update=True).get_mol(15377)
+        self.assertEqual({'download': 1}, dict(self.client.calls))
+
+    def test_metadata_generation(self):
+        '''Tests blobs are downloaded again only if their generation has
+        changed.'''
+        parser = self.__get_parser(GoogleStorageCache, auto_update=True,
+                                   metadata_ttl=0)
+        parser.get_mol(15377)
+        self.client.calls.clear()
+
+        # Checks for an offset index, and for changes to the flat file:
+        parser.get_mol(15377)
+        self.assertEqual({'get_blob': 2}, dict(self.client.calls))
+
+        # Publish structures with no mol blocks:
+        self.client.put_directory('bucket', fixtures.write_flat_files(
+            flat_files={'structures.csv.gz':
+                        fixtures.FLAT_FILES['structures.csv.gz'][:1]}))
+        self.client.calls.clear()
+
+        self.assertIsNone(parser.get_mol(15377))
+        self.assertEqual({'get_blob': 2, 'download': 1},
+                         dict(self.client.calls))
+
+    def test_indexed_reads(self):
+        '''Tests mols and references are read by range once indexed files
+        are published.'''
+        self.__get_parser(GoogleStorageCache).publish_indexed_files()
+        self.client.downloads.clear()
+
+        parser = self.__get_parser(GoogleStorageCache)
+
+        for chebi_id in [15377, 16183, 4167, -1, 'CHEBI:15377']:
+            self.assertEqual(self.expected_parser.get_mol(chebi_id),
+                             parser.get_mol(chebi_id))
+
+        for chebi_ids in [[15377], [4167, 15377], [-1], []]:
+            self.assertEqual(self.expected_parser.get_references(chebi_ids),
+                             parser.get_references(chebi_ids))
+
+        self.assertEqual({'structures.csv.idx.gz', 'structures.csv',
+                          'reference.tsv.idx.gz', 'reference.tsv'},
+                         set(self.client.downloads))
+        self.assertEqual(1, self.client.downloads['structures.csv.idx.gz'])
+
+    def test_indexed_reads_stale(self):
+        '''Tests whole files are read while no current index is
+        published.'''
+        self.__get_parser(GoogleStorageCache).publish_indexed_files(
+            ['reference.tsv.gz'])
+        self.client.downloads.clear()
+
+        parser = self.__get_parser(GoogleStorageCache)
+        self.assertEqual(self.expected_parser.get_mol(15377),
+                         parser.get_mol(15377))
+        self.assertEqual({'structures.csv.gz': 1},
+                         dict(self.client.downloads))
+
+    def __get_parser(self, cls, snapshot=True, auto_update=False,
+                     metadata_ttl=3600):
+        '''Returns a parser over the fake bucket.'''
+        # The FTP site is unreachable, so stored files are kept:
+        return cls(auto_update=auto_update, client=self.client,
+                   bucket_name='bucket', snapshot=snapshot,
+                   metadata_ttl=metadata_ttl, url='http://127.0.0.1:1/chebi/')
+
+
+if __name__ == "__main__":
+    unittest.main()
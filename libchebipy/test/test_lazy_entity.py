@@ -0,0 +1,105 @@
+'''
+libChEBIpy (c) University of Manchester 2015
+
+libChEBIpy is licensed under the MIT License.
+
+To view a copy of this license, visit <http://opensource.org/licenses/MIT/>.
+
+@author:  neilswainston
+'''
+import unittest
+
+from libchebipy import ChebiEntity, ChebiException, LazyChebiEntity
+from libchebipy._chebi_entity import get_parser
+from libchebipy.test import fixtures
+
+
+class TestLazyChebiEntity(unittest.TestCase):
+    '''Test class for LazyChebiEntity.'''
+
+    def setUp(self):
+        '''COMMENT'''
+        self.__parser = fixtures.get_parser()
+
+    def test_get_id(self):
+        '''Tests get_id does not materialise the entity.'''
+        entity = LazyChebiEntity('CHEBI:15377', self.__parser)
+        self.assertEqual('CHEBI:15377', entity.get_id())
+        self.assertFalse(entity.is_materialised())
+        self.assertFalse(self.__parser._NAMES)
+
+    def test_getter(self):
+        '''Tests getters materialise the entity once.'''
+        entity = LazyChebiEntity(15377, self.__parser)
+        self.assertEqual('water', entity.get_name())
+        self.assertTrue(entity.is_materialised())
+        self.assertIs(entity.get_entity(), entity.get_entity())
+        self.assertEqual('H2O', entity.get_formula())
+
+    def test_invalidate(self):
+        '''Tests the entity is materialised again once parser data is
+        cleared.'''
+        entity = LazyChebiEntity(15377, self.__parser)
+        materialised = entity.get_entity()
+        self.__parser.clear()
+        self.assertIsNot(materialised, entity.get_entity())
+        self.assertEqual('water', entity.get_name())
+
+    def test_invalid(self):
+        '''Tests invalid ids raise on first access.'''
+        entity = LazyChebiEntity(-1, self.__parser)
+        with self.assertRaises(ChebiException):
+            entity.get_name()
+
+    def test_from_ids(self):
+        '''Tests bulk handles share one parser.'''
+        entities = LazyChebiEntity.from_ids(['CHEBI:15377', 'CHEBI:4167'],
+                                            self.__parser)
+        self.assertEqual(['water', 'D-glucopyranose'],
+                         [entity.get_name() for entity in entities])
+        self.assertIs(entities[0].get_entity().parser,
+                      entities[1].get_entity().parser)
+
+    def test_eq(self):
+        '''Tests equality with lazy and full entities.'''
+        entity = LazyChebiEntity(15377, self.__parser)
+        self.assertEqual(entity, LazyChebiEntity('CHEBI:15377', self.__parser))
+        self.assertNotEqual(entity, LazyChebiEntity(4167, self.__parser))
+        self.assertEqual(entity, ChebiEntity('15377', parser=self.__parser))
+
+    def test_get_outgoing_targets(self):
+        '''Tests relation targets are returned as lazy entities.'''
+        entity = ChebiEntity('4167', parser=self.__parser)
+        targets = entity.get_outgoing_targets()
+        self.assertEqual(['CHEBI:17634', 'CHEBI:25212'],
+                         [target.get_id() for target in targets])
+        self.assertFalse(any(target.is_materialised() for target in targets))
+        self.assertEqual('D-glucose', targets[0].get_name())
+
+    def test_get_incoming_sources(self):
+        '''Tests relation sources are returned as lazy entities.'''
+        entity = ChebiEntity('25212', parser=self.__parser)
+        self.assertEqual(['CHEBI:15377', 'CHEBI:4167'],
+                         [source.get_id()
+                          for source in entity.get_incoming_sources()])
+
+
+class TestGetParser(unittest.TestCase):
+    '''Test class for shared parsers.'''
+
+    def test_shared(self):
+        '''Tests parsers are shared between entities.'''
+        download_dir = fixtures.write_flat_files()
+        parser = get_parser('filesystem', download_dir, False)
+        self.assertIs(parser, get_parser('file-system', download_dir, False))
+        self.assertIsNot(parser, get_parser('filesystem', download_dir, True))
+        self.assertIs(ChebiEntity('15377', download_dir=download_dir,
+                                  auto_update=False).parser, parser)
+
+    def test_invalid(self):
+        '''Tests invalid parser names raise.'''
+        self.assertRaises(ChebiException, get_parser, 'unknown')
+
+
+if __name__ == "__main__":
+    unittest.main()
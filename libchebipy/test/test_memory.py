@@ -0,0 +1,146 @@
+'''
+libChEBIpy (c) University of Manchester 2015
+
+libChEBIpy is licensed under the MIT License.
+
+To view a copy of this license, visit <http://opensource.org/licenses/MIT/>.
+
+@author:  neilswainston
+'''
+import unittest
+
+from libchebipy._parsers.packed import PackedTable
+from libchebipy.test import fixtures
+
+
+class TestMemoryBudget(unittest.TestCase):
+    '''Test class for memory budgeted table residency.'''
+
+    def setUp(self):
+        '''COMMENT'''
+        self.__parser = fixtures.get_parser()
+
+    def test_no_budget(self):
+        '''Tests tables are neither tracked nor evicted without a budget.'''
+        self.__parser.load(['compounds', 'names'])
+        stats = self.__parser.get_memory_stats()
+        self.assertIsNone(stats['budget'])
+        self.assertEqual({}, stats['tables'])
+        self.assertEqual(['compounds', 'names'],
+                         self.__parser.get_loaded_tables())
+
+    def test_evict(self):
+        '''Tests least recently used tables are evicted over budget.'''
+        self.__parser.load(['compounds', 'names'])
+        self.__parser.set_memory_budget(1)
+        stats = self.__parser.get_memory_stats()
+
+        self.assertEqual({'compounds': 1, 'names': 1}, stats['evictions'])
+        self.assertEqual([], self.__parser.get_loaded_tables())
+
+        self.__parser.get_name(15377)
+        self.assertEqual(['compounds'], self.__parser.get_loaded_tables())
+
+    def test_reload(self):
+        '''Tests evicted tables are reloaded from their snapshot.'''
+        expected = self.__parser.get_names(4167)
+        self.__parser.get_name(15377)
+        self.__parser.set_memory_budget(1)
+
+        # names is evicted as compounds is reloaded, and so on:
+        self.assertEqual('water', self.__parser.get_name(15377))
+        self.assertEqual(expected, self.__parser.get_names(4167))
+        self.assertEqual('water', self.__parser.get_name(15377))
+
+        stats = self.__parser.get_memory_stats()
+        self.assertEqual({'compounds': 2, 'names': 1}, stats['reloads'])
+        self.assertEqual(['compounds'], list(stats['tables']))
+        self.assertIsInstance(self.__parser._NAMES, PackedTable)
+
+    def test_evicted_attribute(self):
+        '''Tests attributes read before an eviction reload their table.'''
+        self.__parser.get_name(15377)
+        self.__parser.set_memory_budget(1)
+        self.assertIn(15377, self.__parser._NAMES)
+        self.assertEqual(['compounds'], self.__parser.get_loaded_tables())
+
+    def test_lru(self):
+        '''Tests the most recently used table stays loaded.'''
+        self.__parser.load(['compounds', 'names', 'chemical_data'])
+        self.__parser.set_memory_budget(None)
+        self.__parser.get_name(15377)
+
+        sizes = self.__parser.get_memory_stats()['tables']
+        self.assertEqual({}, sizes)
+
+        self.__parser.set_memory_budget(10 ** 9)
+        self.__parser.get_name(15377)
+        sizes = self.__parser.get_memory_stats()['tables']
+        self.assertEqual('compounds', list(sizes)[-1])
+
+        self.__parser.set_memory_budget(sizes['compounds'])
+        self.assertEqual(['compounds'], self.__parser.get_loaded_tables())
+
+    def test_clear(self):
+        '''Tests clear discards evicted tables and their snapshots.'''
+        self.__parser.get_name(15377)
+        self.__parser.set_memory_budget(1)
+        self.__parser.clear()
+        self.assertEqual({}, self.__parser._NAMES)
+        self.assertEqual('water', self.__parser.get_name(15377))
+        self.assertEqual({}, self.__parser.get_memory_stats()['reloads'])
+
+
+class TestMemoryReport(unittest.TestCase):
+    '''Test class for memory_report.'''
+
+    def setUp(self):
+        '''COMMENT'''
+        self.__parser = fixtures.get_parser()
+
+    def test_empty(self):
+        '''Tests an unloaded parser holds nothing.'''
+        self.assertEqual({'tables': {}, 'indexes': {}, 'mol_store': 0,
+                          'total': 0}, self.__parser.memory_report())
+
+    def test_tables(self):
+        '''Tests each loaded table is reported by attribute.'''
+        self.__parser.get_ids_by_mass(18, 19)
+        report = self.__parser.memory_report()
+        chemical_data = report['tables']['chemical_data']
+
+        self.assertEqual(['chemical_data'], list(report['tables']))
+        self.assertEqual({'type': 'dict', 'entries': 3},
+                         {key: chemical_data['attributes']['_FORMULAE'][key]
+                          for key in ('type', 'entries')})
+        self.assertEqual(sum(attribute['size'] for attribute
+                             in chemical_data['attributes'].values()),
+                         chemical_data['size'])
+        self.assertEqual(3, report['indexes']['_MASSES']['entries'])
+        self.assertEqual(chemical_data['size'] +
+                         report['indexes']['_MASSES']['size'],
+                         report['total'])
+
+    def test_clear(self):
+        '''Tests clear discards indexes.'''
+        self.__parser.get_ids_by_mass(18, 19)
+        self.__parser.clear()
+        self.assertEqual({}, self.__parser.memory_report()['indexes'])
+
+    def test_packed(self):
+        '''Tests packed tables are reported by the size of their buffers.'''
+        self.__parser.load(['compounds'])
+        size = self.__parser.memory_report()['tables']['compounds']['size']
+        self.__parser.set_packed_tables(self.__parser.get_packed_tables())
+        attributes = \
+            self.__parser.memory_report()['tables']['compounds']['attributes']
+
+        self.assertEqual({'PackedTable'},
+                         set(attribute['type']
+                             for attribute in attributes.values()))
+        self.assertLess(sum(attribute['size']
+                            for attribute in attributes.values()), size)
+
+
+if __name__ == "__main__":
+    unittest.main()
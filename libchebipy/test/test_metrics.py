@@ -0,0 +1,111 @@
+'''
+libChEBIpy (c) University of Manchester 2015
+
+libChEBIpy is licensed under the MIT License.
+
+To view a copy of this license, visit <http://opensource.org/licenses/MIT/>.
+
+@author:  neilswainston
+'''
+import unittest
+
+from libchebipy import Metrics
+from libchebipy._metrics import BUCKETS, Histogram
+from libchebipy.test import fixtures
+
+
+class TestHistogram(unittest.TestCase):
+    '''Test class for Histogram.'''
+
+    def test_percentiles(self):
+        '''Tests percentiles are bucket upper bounds.'''
+        histogram = Histogram()
+
+        for _ in range(99):
+            histogram.observe(1.5e-6)
+
+        histogram.observe(100)
+        self.assertEqual(BUCKETS[1], histogram.get_percentile(50))
+        self.assertEqual(BUCKETS[1], histogram.get_percentile(99))
+        self.assertEqual(100, histogram.get_percentile(100))
+        self.assertEqual(100, histogram.max)
+        self.assertEqual([(BUCKETS[1], 99), (None, 1)],
+                         histogram.to_dict()['buckets'])
+
+    def test_empty(self):
+        '''Tests an empty histogram.'''
+        self.assertEqual(0.0, Histogram().get_percentile(99))
+
+
+class TestMetrics(unittest.TestCase):
+    '''Test class for parser metrics.'''
+
+    def setUp(self):
+        '''COMMENT'''
+        self.__parser = fixtures.get_parser()
+        self.__metrics = Metrics()
+        self.__events = []
+        self.__metrics.add_hook(
+            lambda *event: self.__events.append(event))
+        self.__parser.set_metrics(self.__metrics)
+
+    def test_parse(self):
+        '''Tests file fetches and table parses are counted.'''
+        self.__parser.get_name(15377)
+        stats = self.__metrics.get_stats()
+
+        self.assertEqual(len(fixtures.FLAT_FILES['compounds.tsv.gz']) - 1,
+                         stats['parse']['compounds']['rows'])
+        self.assertGreater(stats['parse']['compounds']['bytes'], 0)
+        self.assertEqual(1, stats['file']['compounds.tsv.gz']['calls'])
+        self.assertEqual(1, stats['getter']['get_name']['calls'])
+        self.assertEqual(1, stats['getter']['get_name']['latency']['count'])
+
+        events = [event[:2] for event in self.__events]
+        self.assertLess(events.index(('file', 'compounds.tsv.gz')),
+                        events.index(('parse', 'compounds')))
+        self.assertEqual(('getter', 'get_name'), events[-1])
+
+    def test_file_bytes(self):
+        '''Tests bytes of files read by a getter are totalled against it.'''
+        self.__parser.get_references([15377])
+        self.__parser.get_references([15377])
+        stats = self.__metrics.get_stats()
+
+        self.assertEqual(2, stats['getter']['get_references']['calls'])
+        self.assertEqual(stats['file']['reference.tsv.gz']['bytes'],
+                         stats['getter']['get_references']['file_bytes'])
+        self.assertIn(('file', 'reference.tsv.gz'),
+                      [(event[0], event[1]) for event in self.__events])
+        self.assertEqual('get_references',
+                         [event[3] for event in self.__events
+                          if event[0] == 'file'][0]['getter'])
+
+    def test_outermost(self):
+        '''Tests getters called by another are timed as part of it.'''
+        self.__parser.get_all_names([15377, 4167])
+        self.__parser.get_generation()
+        stats = self.__metrics.get_stats()
+
+        self.assertEqual(['get_all_names'], list(stats['getter']))
+        self.assertEqual(1, stats['getter']['get_all_names']['calls'])
+        self.assertNotIn('get_generation', vars(self.__parser))
+
+    def test_disable(self):
+        '''Tests nothing is recorded once metrics are unset.'''
+        self.__parser.set_metrics(None)
+        self.__parser.get_name(15377)
+
+        self.assertIsNone(self.__parser.get_metrics())
+        self.assertEqual({}, self.__metrics.get_stats())
+        self.assertNotIn('get_name', vars(self.__parser))
+
+    def test_reset(self):
+        '''Tests reset discards recorded events.'''
+        self.__parser.get_name(15377)
+        self.__metrics.reset()
+        self.assertEqual({}, self.__metrics.get_stats())
+
+
+if __name__ == "__main__":
+    unittest.main()
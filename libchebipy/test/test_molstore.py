@@ -0,0 +1,84 @@
+'''
+libChEBIpy (c) University of Manchester 2015
+
+libChEBIpy is licensed under the MIT License.
+
+To view a copy of this license, visit <http://opensource.org/licenses/MIT/>.
+
+@author:  neilswainston
+'''
+import unittest
+
+from libchebipy._parsers.molstore import MolStore, train_dict
+from libchebipy.test import fixtures
+
+
+class _NoScanCache(fixtures.FileSystemCache):
+    '''FileSystemCache that fails on any read of structures.csv.gz.'''
+
+    def iter_mols(self, chebi_ids=None):
+        if chebi_ids is not None:
+            raise AssertionError('Read structures.csv.gz')
+
+        return super().iter_mols(chebi_ids)
+
+
+class TestMolStore(unittest.TestCase):
+    '''Test class for MolStore.'''
+
+    def setUp(self):
+        self.parser = fixtures.get_parser()
+
+    def test_build(self):
+        '''Tests mol blocks are returned as read from the flat file.'''
+        for dict_size in [0, 1024]:
+            store = MolStore.build(self.parser.iter_mols(),
+                                   dict_size=dict_size)
+            self.assertEqual(2, len(store))
+
+            for chebi_id in fixtures.MOLS:
+                self.assertIn(chebi_id, store)
+                self.assertEqual(self.parser.get_mol(chebi_id),
+                                 store.get(chebi_id))
+
+            self.assertIsNone(store.get(4167))
+            self.assertIsNone(store.get('15377'))
+
+    def test_train_dict(self):
+        '''Tests dictionaries hold repeated fragments, within size.'''
+        blocks = [mol + '\n' for mol in fixtures.MOLS.values()]
+        zdict = train_dict(blocks)
+        self.assertIn(b'  Marvin  01211112152D\n', zdict)
+        self.assertIn(b'M  END\n', zdict)
+        self.assertLessEqual(len(train_dict(blocks, 16)), 16)
+
+    def test_load_mol_store(self):
+        '''Tests get_mol reads from a complete store without scanning.'''
+        parser = _NoScanCache(download_dir=self.parser.download_dir,
+                              auto_update=False)
+        parser.load_mol_store()
+
+        for chebi_id in [15377, 16183, 4167, '15377', 'CHEBI:15377', None]:
+            self.assertEqual(self.parser.get_mol(chebi_id),
+                             parser.get_mol(chebi_id))
+
+        parser.clear()
+        self.assertRaises(AssertionError, parser.get_mol, 15377)
+
+    def test_load_mol_store_ids(self):
+        '''Tests get_mol falls back to a scan for ids not in a store.'''
+        self.parser.load_mol_store([15377])
+        self.assertEqual(fixtures.MOLS[16183] + '\n',
+                         self.parser.get_mol(16183).get_structure())
+
+    def test_load_mol_store_replaced(self):
+        '''Tests a partial store replacing a complete one is not taken to
+        cover all compounds.'''
+        self.parser.load_mol_store()
+        self.parser.load_mol_store([15377])
+        self.assertEqual(fixtures.MOLS[16183] + '\n',
+                         self.parser.get_mol(16183).get_structure())
+
+
+if __name__ == "__main__":
+    unittest.main()
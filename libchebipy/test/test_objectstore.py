@@ -0,0 +1,184 @@
+'''
+libChEBIpy (c) University of Manchester 2015
+
+libChEBIpy is licensed under the MIT License.
+
+To view a copy of this license, visit <http://opensource.org/licenses/MIT/>.
+
+@author:  neilswainston
+'''
+import os.path
+import shutil
+import tempfile
+import time
+import unittest
+import uuid
+from unittest import mock
+
+from libchebipy import ChebiException
+from libchebipy._chebi_entity import get_parser
+from libchebipy._parsers.objectstore import STAT_CACHE, MemoryStore, \
+    ObjectStore, ObjectStoreCache, get_store
+from libchebipy.test import fixtures
+from libchebipy.test.test_packed import assert_same_getters
+
+
+class TestObjectStore(unittest.TestCase):
+    '''Test class for object stores and ObjectStoreCache.'''
+
+    def setUp(self):
+        STAT_CACHE.invalidate()
+        self.url = 'memory://%s/chebi' % uuid.uuid4().hex
+        self.store = get_store(self.url)
+        self.flat_dir = fixtures.write_flat_files()
+        self.expected_parser = fixtures.get_parser()
+
+    def test_store(self):
+        '''Tests put, get, stat and read_range.'''
+        self.assertIsNone(self.store.stat('file'))
+
+        self.store.put('file', b'0123456789')
+        stat = self.store.stat('file')
+        self.assertEqual(10, stat['size'])
+        self.assertEqual(b'0123456789', self.store.get('file'))
+        self.assertEqual(b'234', self.store.read_range('file', 2, 5))
+
+        self.store.put('file', b'abc')
+        self.assertNotEqual(stat['version'], self.store.stat('file')['version'])
+        self.assertRaises(IOError, self.store.get, 'file', stat['version'])
+
+        # Stores of the same URL share objects:
+        self.assertEqual(b'abc', get_store(self.url).get('file'))
+
+    def test_abstract_store(self):
+        '''Tests stores must implement stat, get, put and read_range.'''
+        self.assertRaises(TypeError, ObjectStore, 'nosuch', 'bucket')
+
+    def test_unknown_store(self):
+        '''Tests an unknown URL scheme raises.'''
+        self.assertRaises(ValueError, get_store, 'nosuch://bucket')
+
+    def test_flat_files(self):
+        '''Tests flat files in the store are parsed.'''
+        self.__put_flat_files()
+        parser = self.__get_parser()
+        assert_same_getters(self, parser, self.expected_parser)
+
+    def test_staged_once(self):
+        '''Tests flat files are staged from FTP once, then copied from the
+        store by each parser.'''
+        with self.__mock_ftp() as download:
+            parsers = [self.__get_parser(auto_update=True) for _ in range(2)]
+
+            for parser in parsers:
+                self.assertEqual('water', parser.get_name(15377))
+
+        self.assertEqual(1, download.call_count)
+        self.assertEqual(1, self.store.calls['put'])
+        self.assertEqual(1, self.store.calls['get'])
+
+    def test_copy_current(self):
+        '''Tests local copies are fetched again only once the stored object
+        differs from them.'''
+        self.__put_flat_files()
+        download_dir = tempfile.mkdtemp()
+        ObjectStoreCache(self.store, download_dir, True).get_name(15377)
+        self.store.calls.clear()
+
+        # A new parser reuses the local copy:
+        parser = ObjectStoreCache(self.store, download_dir, True,
+                                  metadata_ttl=0)
+        self.assertEqual('water', parser.get_name(15377))
+        self.assertEqual(0, self.store.calls['get'])
+
+        # Publish compounds with one row:
+        flat_dir = fixtures.write_flat_files(
+            flat_files={'compounds.tsv.gz':
+                        fixtures.FLAT_FILES['compounds.tsv.gz'][:2]})
+        self.store.put_file('compounds.tsv.gz',
+                            os.path.join(flat_dir, 'compounds.tsv.gz'))
+        parser.get_file('compounds.tsv.gz')
+        self.assertEqual(1, self.store.calls['get'])
+
+    def test_restaged(self):
+        '''Tests a flat file changed on the FTP site is staged again, and a
+        snapshot published before is ignored.'''
+        with self.__mock_ftp() as download:
+            parser = self.__get_parser(auto_update=True)
+            parser.snapshot = False
+            parser.publish_snapshot(['compounds'])
+
+            # Publish a new release of compounds:
+            compounds = [line.replace('\twater\t', '\toxidane\t')
+                         for line in fixtures.FLAT_FILES['compounds.tsv.gz']]
+            fixtures.write_flat_files(
+                self.flat_dir, {'compounds.tsv.gz': compounds})
+            filepath = os.path.join(self.flat_dir, 'compounds.tsv.gz')
+            os.utime(filepath, (time.time() + 60, time.time() + 60))
+
+            parser = self.__get_parser(auto_update=True)
+            self.assertFalse(parser.load_snapshot())
+            self.assertEqual('oxidane', parser.get_name(15377))
+
+        self.assertEqual(2, download.call_count)
+
+    def test_indexed_reads(self):
+        '''Tests mols are read by range once indexed files are published.'''
+        self.__put_flat_files()
+        self.__get_parser().publish_indexed_files()
+        self.store.calls.clear()
+
+        parser = self.__get_parser()
+        self.assertEqual(self.expected_parser.get_mol(15377),
+                         parser.get_mol(15377))
+        self.assertEqual(self.expected_parser.get_references([15377]),
+                         parser.get_references([15377]))
+
+        # Only the two offset indexes are read whole:
+        self.assertEqual(2, self.store.calls['get'])
+        self.assertTrue(self.store.calls['read_range'])
+
+    def test_get_parser(self):
+        '''Tests the objectstore parser is configured by environment.'''
+        self.__put_flat_files()
+
+        with mock.patch.dict(os.environ,
+                             {'LIBCHEBIPY_OBJECT_STORE': self.url}):
+            parser = get_parser('objectstore', tempfile.mkdtemp(), False)
+
+        self.assertIsInstance(parser, ObjectStoreCache)
+        self.assertEqual('water', parser.get_name(15377))
+        self.assertRaises(ChebiException, get_parser, 'nosuch')
+
+    def __mock_ftp(self):
+        '''Returns a patch of download, copying from the fixture flat files
+        as the FTP site, whose metadata is that of those files.'''
+        def _download(url, filepath, **_):
+            shutil.copy(os.path.join(self.flat_dir, os.path.basename(url)),
+                        filepath)
+
+        def _get_remote_metadata(_, filename):
+            filepath = os.path.join(self.flat_dir, filename)
+            return os.path.getsize(filepath), os.path.getmtime(filepath)
+
+        remote_metadata = mock.patch.object(
+            ObjectStoreCache, '_get_remote_metadata', _get_remote_metadata)
+        remote_metadata.start()
+        self.addCleanup(remote_metadata.stop)
+        return mock.patch('libchebipy._parsers.objectstore.download',
+                          side_effect=_download)
+
+    def __put_flat_files(self):
+        '''Stores fixture flat files.'''
+        for filename in os.listdir(self.flat_dir):
+            self.store.put_file(filename,
+                                os.path.join(self.flat_dir, filename))
+
+    def __get_parser(self, auto_update=False):
+        '''Returns a parser over the store, with its own download
+        directory.'''
+        return ObjectStoreCache(self.store, tempfile.mkdtemp(), auto_update)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,165 @@
+'''
+libChEBIpy (c) University of Manchester 2015
+
+libChEBIpy is licensed under the MIT License.
+
+To view a copy of this license, visit <http://opensource.org/licenses/MIT/>.
+
+@author:  neilswainston
+'''
+import datetime
+import gc
+import math
+import os
+import unittest
+
+from libchebipy import Name
+from libchebipy._parsers.filesystem import FileSystemCache
+from libchebipy._parsers.packed import PackedTable, pack
+from libchebipy.test import fixtures
+
+
+# Getters over every table:
+GETTERS = ['get_formulae', 'get_mass', 'get_charge', 'get_comments',
+           'get_compound_origins', 'get_status', 'get_source',
+           'get_parent_id', 'get_all_ids', 'get_name', 'get_definition',
+           'get_modified_on', 'get_created_by', 'get_star',
+           'get_database_accessions', 'get_inchi', 'get_names',
+           'get_outgoings', 'get_incomings', 'get_inchi_key', 'get_smiles']
+
+CHEBI_IDS = [-1, 5585, 4167, 15377, 16183, 17634, 24431, 25212, 29412]
+
+
+def assert_same_getters(test, parser, expected_parser):
+    '''Asserts all getters of parser match those of expected_parser.'''
+    for getter in GETTERS:
+        for chebi_id in CHEBI_IDS + ['CHEBI:15377', None]:
+            value = getattr(parser, getter)(chebi_id)
+            expected = getattr(expected_parser, getter)(chebi_id)
+
+            if isinstance(expected, float) and math.isnan(expected):
+                test.assertTrue(math.isnan(value), (getter, chebi_id))
+            else:
+                test.assertEqual(expected, value, (getter, chebi_id))
+
+
+class TestPack(unittest.TestCase):
+    '''Test class for packed tables.'''
+
+    def test_pack_objects(self):
+        '''Tests lists of model objects are packed.'''
+        table = pack({2: [Name('eau', 'SYNONYM', 'ChEBI', False, 'fr'),
+                          Name('water', 'NAME', 'ChEBI', True, None)],
+                      1: []})
+        self.assertIsInstance(table, PackedTable)
+        self.assertEqual([1, 2], table.keys())
+        self.assertEqual([], table[1])
+        self.assertEqual(Name('water', 'NAME', 'ChEBI', True, None),
+                         table[2][1])
+        self.assertNotIn(3, table)
+        self.assertNotIn('2', table)
+        self.assertIsNone(table.get(3))
+
+    def test_pack_scalars(self):
+        '''Tests primitives, None and NaN are packed.'''
+        now = datetime.datetime(2020, 1, 2, 3, 4, 5, 6)
+
+        self.assertEqual([None, 'é'], pack({1: None, 2: 'é'}).values())
+        self.assertEqual([-1, 2], pack({1: -1, 2: 2}).values())
+        self.assertEqual([1.5, 2], pack({1: 1.5, 2: 2}).values())
+        self.assertEqual([now, None], pack({1: now, 2: None}).values())
+
+        parent_ids = pack({1: float('NaN'), 2: 2}).values()
+        self.assertTrue(math.isnan(parent_ids[0]))
+        self.assertEqual(2, parent_ids[1])
+
+    def test_parser(self):
+        '''Tests a packed parser returns the same values as a dict one.'''
+        parser = FileSystemCache(download_dir=fixtures.write_flat_files(),
+                                 auto_update=False, packed=True)
+        parser.load()
+
+        self.assertIsInstance(parser._ALL_NAMES, PackedTable)
+        assert_same_getters(self, parser, fixtures.get_parser())
+
+    def test_update(self):
+        '''Tests packed tables are reparsed on update.'''
+        parser = FileSystemCache(download_dir=fixtures.write_flat_files(),
+                                 auto_update=False, packed=True)
+        parser.load(['names'])
+        self.assertEqual({'names': 0}, parser.update())
+
+
+@unittest.skipUnless(os.path.exists('/proc/self/smaps_rollup') and
+                     hasattr(os, 'fork'), 'Requires Linux')
+class TestForkSharing(unittest.TestCase):
+    '''Test class for sharing of packed tables between forked workers.'''
+
+    def test_unique_rss(self):
+        '''Tests reading packed tables in forked workers copies far fewer
+        pages than reading dict tables.'''
+        flat_files = dict(fixtures.FLAT_FILES)
+        flat_files['names.tsv.gz'] = flat_files['names.tsv.gz'][:1] + [
+            '%d\t%d\tSYNONYM\tChEBI\tsynonym %d of compound %d\tF\ten' %
+            (idx, idx // 4, idx % 4, idx // 4) for idx in range(200000)]
+        download_dir = fixtures.write_flat_files(flat_files=flat_files)
+
+        unique_rss = {}
+
+        for packed in [False, True]:
+            parser = FileSystemCache(download_dir=download_dir,
+                                     auto_update=False, packed=packed)
+            parser.load(['names'])
+            unique_rss[packed] = _get_worker_unique_rss(parser)
+
+        self.assertLess(unique_rss[True], unique_rss[False] / 4)
+
+
+def _get_worker_unique_rss(parser, workers=2):
+    '''Returns the mean growth in private (unshared) memory, in kB, of forked
+    workers reading every name.'''
+    gc.collect()
+    gc.freeze()
+    pipes = []
+
+    for _ in range(workers):
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+
+        if pid == 0:
+            before = _get_private_kb()
+
+            for chebi_id in parser._ALL_NAMES:
+                parser.get_names(chebi_id)
+
+            os.write(write_fd, str(_get_private_kb() - before).encode())
+            os._exit(0)
+
+        os.close(write_fd)
+        pipes.append((pid, read_fd))
+
+    growth = []
+
+    for pid, read_fd in pipes:
+        growth.append(int(os.read(read_fd, 64)))
+        os.close(read_fd)
+        os.waitpid(pid, 0)
+
+    gc.unfreeze()
+    return sum(growth) / len(growth)
+
+
+def _get_private_kb():
+    '''Returns private memory of this process in kB.'''
+    private_kb = 0
+
+    with open('/proc/self/smaps_rollup') as smaps:
+        for line in smaps:
+            if line.startswith('Private_'):
+                private_kb += int(line.split()[1])
+
+    return private_kb
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+'''
+libChEBIpy (c) University of Manchester 2015
+
+libChEBIpy is licensed under the MIT License.
+
+To view a copy of this license, visit <http://opensource.org/licenses/MIT/>.
+
+@author:  neilswainston
+'''
+import unittest
+
+from libchebipy import CompoundOrigin, DatabaseAccession, Name
+from libchebipy._parsers.filesystem import FileSystemCache
+from libchebipy.test import fixtures
+
+
+class TestRawRows(unittest.TestCase):
+    '''Test class for tables held as raw rows, built into model objects by
+    getters.'''
+
+    def setUp(self):
+        self.parser = fixtures.get_parser()
+
+    def test_raw_rows(self):
+        '''Tests rows are held as one string per ChEBI id.'''
+        self.parser.load(['names', 'database_accessions', 'comments',
+                          'compound_origins'])
+
+        for table in [self.parser._ALL_NAMES,
+                      self.parser._DATABASE_ACCESSIONS,
+                      self.parser._COMMENTS,
+                      self.parser._COMPOUND_ORIGINS]:
+            self.assertTrue(all(isinstance(rows, str)
+                                for rows in table.values()))
+
+    def test_many_rows(self):
+        '''Tests an id with many rows keeps them all, in order.'''
+        accessions = fixtures.FLAT_FILES['database_accession.tsv'][:1] + \
+            ['%d\t15377\tMetaCyc\tMetaCyc accession\tW%d' % (idx, idx)
+             for idx in range(16000)]
+        parser = FileSystemCache(
+            download_dir=fixtures.write_flat_files(
+                flat_files={'database_accession.tsv': accessions}),
+            auto_update=False)
+
+        accessions = parser.get_database_accessions(15377)
+        self.assertEqual(16000, len(accessions))
+        self.assertEqual('W15999', accessions[-1].get_accession_number())
+        self.assertIsInstance(parser._DATABASE_ACCESSIONS[15377], str)
+
+    def test_getters(self):
+        '''Tests getters build model objects from raw rows.'''
+        self.assertEqual([Name('eau', 'SYNONYM', 'ChEBI', False, 'fr'),
+                          Name('dihydrogen oxide', 'SYNONYM', 'ChEBI', False,
+                               'en')],
+                         self.parser.get_names(15377))
+        self.assertEqual([DatabaseAccession('MetaCyc accession', 'WATER',
+                                            'MetaCyc'),
+                          DatabaseAccession('KEGG COMPOUND accession',
+                                            'C00001', 'KEGG COMPOUND')],
+                         self.parser.get_database_accessions(15377))
+        self.assertEqual([CompoundOrigin('Homo sapiens', 'NCBI:txid9606',
+                                         'null', 'null', 'null', 'null',
+                                         'DOI', '10.1038/nbt.2488', 'null')],
+                         self.parser.get_compound_origins(15377))
+        self.assertEqual([], self.parser.get_names(-1))
+        self.assertEqual([], self.parser.get_compound_origins('CHEBI:15377'))
+
+    def test_objects_not_shared(self):
+        '''Tests each call builds new objects.'''
+        self.assertIsNot(self.parser.get_names(15377)[0],
+                         self.parser.get_names(15377)[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,191 @@
+'''
+libChEBIpy (c) University of Manchester 2015
+
+libChEBIpy is licensed under the MIT License.
+
+To view a copy of this license, visit <http://opensource.org/licenses/MIT/>.
+
+@author:  neilswainston
+'''
+import asyncio
+import json
+import os.path
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from libchebipy import SearchClient
+from libchebipy._search import ResponseCache
+
+
+# Fake OLS index: term -> matching ChEBI ids.
+_INDEX = {
+    '"glucose"': ['CHEBI:%d' % chebi_id for chebi_id in range(1, 1201)],
+    '"water"': ['CHEBI:15377', 'CHEBI:5585'],
+    '"none"': [],
+}
+
+
+class _OlsHandler(BaseHTTPRequestHandler):
+    '''Local stand-in for the OLS search endpoint.'''
+
+    def do_GET(self):
+        '''Serves a page of search results.'''
+        server = self.server
+        params = parse_qs(urlparse(self.path).query)
+        hits = _INDEX.get(params['q'][0], [])
+        start = int(params['start'][0])
+        rows = int(params['rows'][0])
+
+        with server.lock:
+            server.requests += 1
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight,
+                                       server.in_flight)
+
+        time.sleep(server.delay)
+
+        with server.lock:
+            server.in_flight -= 1
+
+        body = json.dumps({'response': {
+            'numFound': len(hits),
+            'docs': [{'obo_id': obo_id}
+                     for obo_id in hits[start:start + rows]]}}).encode()
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        '''Silences request logging.'''
+
+
+class TestSearchClient(unittest.TestCase):
+    '''Test class for SearchClient, run against a local OLS stand-in.'''
+
+    def setUp(self):
+        '''COMMENT'''
+        self.__server = ThreadingHTTPServer(('127.0.0.1', 0), _OlsHandler)
+        self.__server.lock = threading.Lock()
+        self.__server.requests = 0
+        self.__server.in_flight = 0
+        self.__server.max_in_flight = 0
+        self.__server.delay = 0
+        threading.Thread(target=self.__server.serve_forever,
+                         daemon=True).start()
+
+        self.__url = 'http://127.0.0.1:%d/ols/api/search' % \
+            self.__server.server_address[1]
+
+    def tearDown(self):
+        '''COMMENT'''
+        self.__server.shutdown()
+        self.__server.server_close()
+
+    def test_search_paginated(self):
+        '''Tests all pages are fetched.'''
+        with SearchClient(self.__url, page_size=500) as client:
+            obo_ids = client.search('glucose')
+
+        self.assertEqual(_INDEX['"glucose"'], obo_ids)
+        self.assertEqual(3, self.__server.requests)
+
+    def test_search_rows(self):
+        '''Tests rows limits the number of results.'''
+        with SearchClient(self.__url, page_size=500) as client:
+            obo_ids = client.search('glucose', rows=600)
+
+        self.assertEqual(_INDEX['"glucose"'][:600], obo_ids)
+        self.assertEqual(2, self.__server.requests)
+
+    def test_search_exact(self):
+        '''Tests exact searches are not quoted.'''
+        with SearchClient(self.__url) as client:
+            self.assertEqual([], client.search('water', exact=True))
+            self.assertEqual(2, len(client.search('water')))
+
+    def test_iter_search(self):
+        '''Tests asynchronous streamed pagination.'''
+        async def _collect(client):
+            return [obo_id async for obo_id in client.iter_search('glucose')]
+
+        with SearchClient(self.__url, page_size=100) as client:
+            obo_ids = asyncio.run(_collect(client))
+
+        self.assertEqual(_INDEX['"glucose"'], obo_ids)
+        self.assertEqual(12, self.__server.requests)
+
+    def test_search_all_bounded(self):
+        '''Tests batch searches do not exceed max_concurrency.'''
+        self.__server.delay = 0.05
+        terms = ['water'] * 6 + ['none'] * 6
+
+        with SearchClient(self.__url, max_concurrency=3) as client:
+            results = asyncio.run(client.search_all(terms))
+
+        self.assertEqual(['CHEBI:15377', 'CHEBI:5585'], results['water'])
+        self.assertEqual([], results['none'])
+        self.assertLessEqual(self.__server.max_in_flight, 3)
+        self.assertGreater(self.__server.max_in_flight, 1)
+
+    def test_cache(self):
+        '''Tests responses are served from the on-disk cache.'''
+        cache_dir = tempfile.mkdtemp()
+
+        with SearchClient(self.__url, cache_dir=cache_dir) as client:
+            client.search('water')
+            client.search('water')
+
+        self.assertEqual(1, self.__server.requests)
+
+        with SearchClient(self.__url, cache_dir=cache_dir) as client:
+            self.assertEqual(2, len(client.search('water')))
+
+        self.assertEqual(1, self.__server.requests)
+
+    def test_cache_expired(self):
+        '''Tests stale cache entries are refetched.'''
+        cache_dir = tempfile.mkdtemp()
+
+        with SearchClient(self.__url, cache_dir=cache_dir,
+                          cache_ttl=-1) as client:
+            client.search('water')
+            client.search('water')
+
+        self.assertEqual(2, self.__server.requests)
+
+    def test_cache_concurrent_put(self):
+        '''Tests concurrent writers may all create the cache directory.'''
+        cache = ResponseCache(os.path.join(tempfile.mkdtemp(), 'cache'), 60)
+        barrier = threading.Barrier(8)
+        errors = []
+
+        def _put(idx):
+            barrier.wait()
+
+            try:
+                cache.put(str(idx), [idx])
+            except OSError as err:
+                errors.append(err)
+
+        threads = [threading.Thread(target=_put, args=(idx,))
+                   for idx in range(8)]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual([], errors)
+        self.assertEqual([3], cache.get('3'))
+
+
+if __name__ == "__main__":
+    unittest.main()
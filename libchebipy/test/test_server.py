@@ -0,0 +1,177 @@
+'''
+libChEBIpy (c) University of Manchester 2015
+
+libChEBIpy is licensed under the MIT License.
+
+To view a copy of this license, visit <http://opensource.org/licenses/MIT/>.
+
+@author:  neilswainston
+'''
+import http.client
+import json
+import threading
+import time
+import unittest
+import urllib.error
+import urllib.request
+
+from libchebipy._server import Coalescer, make_server
+from libchebipy.test import fixtures
+
+
+class TestIndexes(unittest.TestCase):
+    '''Test class for reverse lookups of parsers.'''
+
+    def setUp(self):
+        self.parser = fixtures.get_parser()
+
+    def test_get_ids_by_name(self):
+        '''Tests names and synonyms are found, ignoring case.'''
+        self.assertEqual([15377], self.parser.get_ids_by_name('Water'))
+        self.assertEqual([4167], self.parser.get_ids_by_name('grape sugar'))
+        self.assertEqual([], self.parser.get_ids_by_name('nosuch'))
+
+    def test_get_ids_by_mass(self):
+        '''Tests ids are returned in order of mass.'''
+        self.assertEqual([16183, 15377], self.parser.get_ids_by_mass(16, 19))
+        self.assertEqual([], self.parser.get_ids_by_mass(19, 20))
+
+    def test_get_ids_by_accession(self):
+        '''Tests ids are found by accession, and type.'''
+        self.assertEqual([15377], self.parser.get_ids_by_accession('C00001'))
+        self.assertEqual([], self.parser.get_ids_by_accession(
+            'C00001', 'MetaCyc accession'))
+
+    def test_get_ancestors(self):
+        '''Tests ancestors are found through is_a relations.'''
+        self.assertEqual([17634, 24431], self.parser.get_ancestors(4167))
+        self.assertEqual([25212], self.parser.get_ancestors(4167,
+                                                            ['has_role']))
+
+    def test_index_rebuilt(self):
+        '''Tests indexes are rebuilt when tables are reloaded.'''
+        self.assertEqual([15377], self.parser.get_ids_by_name('water'))
+        self.parser.packed = True
+        self.parser.clear()
+        self.assertEqual([15377], self.parser.get_ids_by_name('water'))
+
+
+class TestCoalescer(unittest.TestCase):
+    '''Test class for Coalescer.'''
+
+    def test_coalesce(self):
+        '''Tests concurrent lookups of one key share a single call.'''
+        coalescer = Coalescer()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def _lookup():
+            calls.append(1)
+            started.set()
+            release.wait()
+            return 'result'
+
+        results = []
+        owner = threading.Thread(
+            target=lambda: results.append(coalescer.get('key', _lookup)))
+        owner.start()
+        started.wait()
+
+        waiter = threading.Thread(
+            target=lambda: results.append(coalescer.get('key', _lookup)))
+        waiter.start()
+
+        while not coalescer.coalesced:
+            time.sleep(0.001)
+
+        release.set()
+        owner.join()
+        waiter.join()
+
+        self.assertEqual(['result', 'result'], results)
+        self.assertEqual(1, len(calls))
+
+
+class TestServer(unittest.TestCase):
+    '''Test class for the HTTP lookup server.'''
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = make_server(fixtures.get_parser(), port=0)
+        cls.url = 'http://%s:%d' % cls.server.server_address[:2]
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def test_entities(self):
+        '''Tests entities are returned, one per line.'''
+        results = self.__post('/entities', {'ids': ['CHEBI:15377', 5585, -1]})
+        self.assertEqual(3, len(results))
+        self.assertEqual('water', results[0]['name'])
+        self.assertEqual(18.0153, results[0]['mass'])
+        self.assertEqual('[H]O[H]', results[0]['smiles'])
+        self.assertEqual('CHEBI:15377', results[1]['parent_id'])
+        self.assertEqual({'id': -1, 'error': 'Not found'}, results[2])
+
+    def test_lookups(self):
+        '''Tests name, mass, cross reference and ancestor lookups.'''
+        self.assertEqual([{'name': 'eau', 'ids': ['CHEBI:15377']}],
+                         self.__post('/names', {'names': ['eau']}))
+        self.assertEqual([{'mass': 16.04, 'ids': ['CHEBI:16183']}],
+                         self.__post('/mass', {'masses': [16.04],
+                                               'tolerance': 0.01}))
+        self.assertEqual([{'accession': 'WATER', 'ids': ['CHEBI:15377']}],
+                         self.__post('/xrefs', {'accessions': ['WATER']}))
+        self.assertEqual([{'id': 4167,
+                           'ancestors': ['CHEBI:17634', 'CHEBI:24431']}],
+                         self.__post('/ancestors', {'ids': [4167]}))
+
+    def test_large_batch(self):
+        '''Tests a batch larger than one chunk is streamed in full.'''
+        results = self.__post('/names', {'names': ['water'] * 5000})
+        self.assertEqual(5000, len(results))
+
+    def test_errors(self):
+        '''Tests unknown endpoints and malformed bodies are rejected.'''
+        for path, body, status in [('/nosuch', {}, 404),
+                                   ('/entities', {'names': []}, 400),
+                                   ('/entities', {'ids': [], 'x': 1}, 400),
+                                   ('/ancestors', {'ids': [4167],
+                                                   'types': 'is_a'}, 400)]:
+            with self.assertRaises(urllib.error.HTTPError) as context:
+                self.__post(path, body)
+
+            self.assertEqual(status, context.exception.code)
+
+    def test_negative_length(self):
+        '''Tests a negative Content-Length is rejected without reading.'''
+        connection = http.client.HTTPConnection(
+            *self.server.server_address[:2], timeout=5)
+        connection.putrequest('POST', '/entities')
+        connection.putheader('Content-Length', '-1')
+        connection.endheaders()
+
+        self.assertEqual(400, connection.getresponse().status)
+        connection.close()
+
+    def test_health(self):
+        '''Tests the health endpoint.'''
+        with urllib.request.urlopen(self.url + '/health') as response:
+            self.assertEqual('ok', json.loads(response.read())['status'])
+
+    def __post(self, path, body):
+        '''Returns the results of a POST.'''
+        request = urllib.request.Request(
+            self.url + path, json.dumps(body).encode('utf-8'),
+            {'Content-Type': 'application/json'})
+
+        with urllib.request.urlopen(request) as response:
+            return [json.loads(line) for line in response]
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+'''
+libChEBIpy (c) University of Manchester 2015
+
+libChEBIpy is licensed under the MIT License.
+
+To view a copy of this license, visit <http://opensource.org/licenses/MIT/>.
+
+@author:  neilswainston
+'''
+import multiprocessing
+import unittest
+
+from libchebipy._parsers.packed import PackedTable
+from libchebipy._parsers.sharedmemory import SharedMemoryCache, publish
+from libchebipy.test import fixtures
+from libchebipy.test.test_packed import assert_same_getters
+
+
+def _get_names(name, chebi_id):
+    '''Returns names of chebi_id from a parser attached to segment name.'''
+    parser = SharedMemoryCache(name)
+
+    try:
+        return [nme.get_name() for nme in parser.get_names(chebi_id)]
+    finally:
+        parser.close()
+
+
+class _NoParseCache(SharedMemoryCache):
+    '''SharedMemoryCache that fails on any parse.'''
+
+    def _parse_table(self, table):
+        raise AssertionError('Parsed %s' % table)
+
+
+class TestSharedMemory(unittest.TestCase):
+    '''Test class for tables published to shared memory.'''
+
+    def setUp(self):
+        self.expected_parser = fixtures.get_parser()
+        self.shm = publish(self.expected_parser)
+
+    def tearDown(self):
+        self.shm.close()
+        self.shm.unlink()
+
+    def test_attach(self):
+        '''Tests an attached parser returns the same values, without
+        parsing.'''
+        parser = _NoParseCache(self.shm.name)
+
+        try:
+            self.assertIsInstance(parser._ALL_NAMES, PackedTable)
+            self.assertEqual(sorted(self.expected_parser.get_loaded_tables()),
+                             sorted(parser.get_loaded_tables()))
+            assert_same_getters(self, parser, self.expected_parser)
+            self.assertEqual(self.expected_parser.get_mol(15377),
+                             parser.get_mol(15377))
+        finally:
+            parser.close()
+
+    def test_attach_process(self):
+        '''Tests a separate process attaches by name.'''
+        expected = [nme.get_name()
+                    for nme in self.expected_parser.get_names(15377)]
+
+        ctx = multiprocessing.get_context('spawn')
+
+        with ctx.Pool(2) as pool:
+            results = pool.starmap(_get_names, [(self.shm.name, 15377)] * 2)
+
+        self.assertEqual([expected, expected], results)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+'''
+libChEBIpy (c) University of Manchester 2015
+
+libChEBIpy is licensed under the MIT License.
+
+To view a copy of this license, visit <http://opensource.org/licenses/MIT/>.
+
+@author:  neilswainston
+'''
+import threading
+import unittest
+
+from libchebipy import VersionedStore
+from libchebipy._parsers.filesystem import FileSystemCache
+from libchebipy.test import fixtures
+
+
+class TestVersionedStore(unittest.TestCase):
+    '''Test class for VersionedStore.'''
+
+    def setUp(self):
+        '''COMMENT'''
+        self.__retired = []
+        self.__store = VersionedStore(_get_parser, tables=['compounds'],
+                                      on_retire=self.__on_retire)
+
+    def tearDown(self):
+        '''COMMENT'''
+        self.__store.close()
+
+    def test_acquire_unloaded(self):
+        '''Tests acquire fails before a release is loaded.'''
+        with self.assertRaises(ValueError):
+            with self.__store.acquire():
+                pass
+
+    def test_reload(self):
+        '''Tests a release is loaded in the background then swapped in.'''
+        self.assertEqual('v1', self.__store.reload('v1').result())
+        self.assertEqual('v1', self.__store.get_version())
+
+        with self.__store.acquire() as parser:
+            self.assertEqual(['compounds'], parser.get_loaded_tables())
+            self.assertEqual('water', parser.get_name(15377))
+
+    def test_swap_retires_after_readers(self):
+        '''Tests a replaced release is retired after its last reader.'''
+        self.__store.reload('v1', background=False)
+
+        with self.__store.acquire() as old_parser:
+            self.__store.reload('v2', background=False)
+
+            with self.__store.acquire() as new_parser:
+                self.assertEqual('oxidane', new_parser.get_name(15377))
+
+            # The old release stays intact for in-flight readers:
+            self.assertEqual([], self.__retired)
+            self.assertEqual('water', old_parser.get_name(15377))
+
+        self.assertEqual(['v1'], self.__retired)
+        self.assertEqual([], old_parser.get_loaded_tables())
+
+    def test_concurrent_readers(self):
+        '''Tests readers always see a fully loaded release during swaps.'''
+        self.__store.reload('v1', background=False)
+        stop = threading.Event()
+        errors = []
+
+        def _read():
+            while not stop.is_set():
+                with self.__store.acquire() as parser:
+                    if parser.get_name(15377) not in ('water', 'oxidane'):
+                        errors.append(parser.get_name(15377))
+
+        threads = [threading.Thread(target=_read) for _ in range(8)]
+
+        for thread in threads:
+            thread.start()
+
+        for idx in range(10):
+            self.__store.reload('v%d' % (idx + 2)).result()
+
+        stop.set()
+
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual([], errors)
+        self.assertEqual(sorted('v%d' % (idx + 1) for idx in range(10)),
+                         sorted(self.__retired))
+
+    def __on_retire(self, version, _):
+        '''COMMENT'''
+        self.__retired.append(version)
+
+
+def _get_parser(version):
+    '''Returns a parser for a fixture release, in which water is renamed from
+    v2 onwards.'''
+    flat_files = dict(fixtures.FLAT_FILES)
+
+    if version != 'v1':
+        flat_files['compounds.tsv.gz'] = [
+            line.replace('\twater\t', '\toxidane\t')
+            for line in flat_files['compounds.tsv.gz']]
+
+    return FileSystemCache(
+        download_dir=fixtures.write_flat_files(flat_files=flat_files),
+        auto_update=False)
+
+
+if __name__ == "__main__":
+    unittest.main()
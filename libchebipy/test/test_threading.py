@@ -0,0 +1,137 @@
+'''
+libChEBIpy (c) University of Manchester 2015
+
+libChEBIpy is licensed under the MIT License.
+
+To view a copy of this license, visit <http://opensource.org/licenses/MIT/>.
+
+@author:  neilswainston
+'''
+import collections
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from libchebipy._parsers.filesystem import FileSystemCache
+from libchebipy.test import fixtures
+
+
+class _SlowCache(FileSystemCache):
+    '''FileSystemCache that counts parses and parses slowly, to widen any
+    window in which a partially built table could be read.'''
+
+    def __init__(self):
+        super().__init__(download_dir=fixtures.write_flat_files(),
+                         auto_update=False)
+        self.parses = collections.Counter()
+        self.__lock = threading.Lock()
+
+    def _parse_table(self, table):
+        '''Counts parses.'''
+        with self.__lock:
+            self.parses[table] += 1
+
+        super()._parse_table(table)
+
+    def _add_compounds(self, tokens):
+        '''Adds a row slowly.'''
+        time.sleep(0.005)
+        super()._add_compounds(tokens)
+
+
+class _FailingCache(FileSystemCache):
+    '''FileSystemCache whose first parse of compounds fails partway.'''
+
+    def __init__(self):
+        super().__init__(download_dir=fixtures.write_flat_files(),
+                         auto_update=False)
+        self.fail = True
+
+    def _add_compounds(self, tokens):
+        '''Fails on the second row of the first parse.'''
+        if self.fail and self._NAMES:
+            self.fail = False
+            raise IOError('Read failed')
+
+        super()._add_compounds(tokens)
+
+
+class TestThreading(unittest.TestCase):
+    '''Test class for concurrent first access to tables.'''
+
+    def test_concurrent_first_access(self):
+        '''Tests each table is parsed once and never read partially built.'''
+        parser = _SlowCache()
+
+        # The last compound row, and getters over every compounds attribute:
+        getters = [
+            (parser.get_name, 25212, 'metabolite'),
+            (parser.get_star, 25212, 3),
+            (parser.get_status, 25212, 'C'),
+            (parser.get_source, 25212, 'ChEBI'),
+            (parser.get_created_by, 25212, 'CHEBI'),
+            (parser.get_all_ids, 15377, [15377, 5585]),
+            (parser.get_parent_id, 5585, 15377),
+            (parser.get_mass, 15377, 18.0153),
+            (parser.get_inchi, 15377, 'InChI=1S/H2O/h1H2'),
+            (parser.get_names, 4167, parser.get_names(4167)),
+        ]
+
+        def _get(idx):
+            getter, chebi_id, expected = getters[idx % len(getters)]
+            return getter(chebi_id) == expected
+
+        with ThreadPoolExecutor(max_workers=32) as executor:
+            results = list(executor.map(_get, range(320)))
+
+        self.assertTrue(all(results))
+        self.assertEqual({'compounds': 1, 'chemical_data': 1, 'inchi': 1,
+                          'names': 1}, dict(parser.parses))
+
+    def test_concurrent_load(self):
+        '''Tests load() and getters share a single parse.'''
+        parser = _SlowCache()
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            futures = [executor.submit(parser.load, ['compounds'])
+                       for _ in range(4)]
+            futures += [executor.submit(parser.get_name, 25212)
+                        for _ in range(4)]
+
+        self.assertEqual('metabolite', futures[-1].result())
+        self.assertEqual({'compounds': 1}, dict(parser.parses))
+
+    def test_warm_up(self):
+        '''Tests getters wait on a background warm up rather than parse.'''
+        parser = _SlowCache()
+        future = parser.warm_up(['compounds', 'chemical_data'])
+
+        self.assertEqual('metabolite', parser.get_name(25212))
+        self.assertEqual(['compounds', 'chemical_data'],
+                         future.result(timeout=10))
+        self.assertEqual(['chemical_data', 'compounds'],
+                         sorted(parser.get_loaded_tables()))
+        self.assertEqual({'compounds': 1, 'chemical_data': 1},
+                         dict(parser.parses))
+
+    def test_warm_up_invalid(self):
+        '''Tests unknown tables raise before any load.'''
+        parser = _SlowCache()
+        self.assertRaises(ValueError, parser.warm_up, ['unknown'])
+        self.assertEqual(['compounds'],
+                         parser.warm_up(['compounds'], background=False))
+
+    def test_parse_failure(self):
+        '''Tests a failed parse leaves no partial rows and is retried.'''
+        parser = _FailingCache()
+        self.assertRaises(IOError, parser.get_name, 25212)
+        self.assertEqual({}, parser._NAMES)
+        self.assertEqual([], parser.get_loaded_tables())
+
+        self.assertEqual('metabolite', parser.get_name(25212))
+        self.assertEqual([15377, 5585], parser.get_all_ids(15377))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,228 @@
+'''
+libChEBIpy (c) University of Manchester 2015
+
+libChEBIpy is licensed under the MIT License.
+
+To view a copy of this license, visit <http://opensource.org/licenses/MIT/>.
+
+@author:  neilswainston
+'''
+import math
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from libchebipy import Name, Relation
+from libchebipy._parsers.filesystem import FileSystemCache
+from libchebipy.test import fixtures
+
+
+class _MirrorCache(FileSystemCache):
+    '''FileSystemCache that "downloads" changed files from a local remote
+    directory.'''
+
+    def __init__(self, remote_dir):
+        super().__init__(download_dir=tempfile.mkdtemp(), auto_update=False)
+        self.remote_dir = remote_dir
+
+    def get_file(self, filename):
+        '''Copies filename from the remote directory if it has changed.'''
+        remote_filepath = os.path.join(self.remote_dir, filename)
+        filepath = os.path.join(self.path, filename)
+
+        if not os.path.exists(filepath) or \
+                os.path.getmtime(filepath) != os.path.getmtime(remote_filepath):
+            shutil.copy2(remote_filepath, filepath)
+
+        return super().get_file(filename)
+
+
+class _CountingCache(_MirrorCache):
+    '''_MirrorCache that counts the names rows it parses, on the class, as
+    updates parse rows into tables of another instance.'''
+
+    rows = 0
+
+    def _add_names(self, tokens):
+        '''Counts a row.'''
+        type(self).rows += 1
+        super()._add_names(tokens)
+
+
+class TestUpdate(unittest.TestCase):
+    '''Test class for incremental updates.'''
+
+    def setUp(self):
+        '''COMMENT'''
+        self.__remote_dir = fixtures.write_flat_files()
+        self.__parser = _MirrorCache(self.__remote_dir)
+        self.__flat_files = dict(fixtures.FLAT_FILES)
+
+    def test_update_unchanged(self):
+        '''Tests nothing is rewritten if files are unchanged.'''
+        self.__parser.get_names(15377)
+        self.assertEqual({'names': 0}, self.__parser.update())
+
+    def test_update_unloaded(self):
+        '''Tests tables that are not loaded are not updated.'''
+        self.assertEqual({}, self.__parser.update())
+
+    def test_update_names(self):
+        '''Tests only changed ids are rewritten.'''
+        water_names = self.__parser.get_names(15377)
+        glucose_names = self.__parser.get_names(4167)
+        glucose_rows = self.__parser._ALL_NAMES[4167]
+
+        names = self.__flat_files['names.tsv.gz']
+        self.__publish('names.tsv.gz', names[:2] + names[3:] +
+                       ['4\t16183\tSYNONYM\tChEBI\tmarsh gas\tF\ten'])
+
+        self.assertEqual({'names': 2}, self.__parser.update())
+        self.assertEqual(water_names[:1], self.__parser.get_names(15377))
+        self.assertEqual([Name('marsh gas', 'SYNONYM', 'ChEBI', False, 'en')],
+                         self.__parser.get_names(16183))
+
+        # Unchanged rows are kept as they are:
+        self.assertEqual(glucose_names, self.__parser.get_names(4167))
+        self.assertIs(glucose_rows, self.__parser._ALL_NAMES[4167])
+
+    def test_update_parses_changed(self):
+        '''Tests only the rows of changed ids are parsed.'''
+        parser = _CountingCache(self.__remote_dir)
+        parser.get_names(15377)
+        _CountingCache.rows = 0
+
+        names = self.__flat_files['names.tsv.gz']
+        self.__publish('names.tsv.gz', names +
+                       ['99\t16183\tSYNONYM\tChEBI\tmarsh gas\tF\ten'])
+
+        self.assertEqual({'names': 1}, parser.update())
+        self.assertEqual(1, _CountingCache.rows)
+
+    def test_update_index(self):
+        '''Tests reverse indexes are rebuilt over updated tables.'''
+        self.assertEqual([15377], self.__parser.get_ids_by_name('water'))
+
+        compounds = [line.replace('\twater\t', '\toxidane\t')
+                     for line in self.__flat_files['compounds.tsv.gz']]
+        self.__publish('compounds.tsv.gz', compounds)
+
+        self.assertEqual({'compounds': 1, 'names': 0},
+                         self.__parser.update())
+        self.assertEqual([], self.__parser.get_ids_by_name('water'))
+        self.assertEqual([15377], self.__parser.get_ids_by_name('oxidane'))
+
+    def test_update_compounds(self):
+        '''Tests compounds and all ids are updated.'''
+        self.__parser.get_name(15377)
+        self.assertEqual([15377, 5585], self.__parser.get_all_ids(15377))
+
+        compounds = [line for line in self.__flat_files['compounds.tsv.gz']
+                     if not line.startswith('5585\t')]
+        compounds = [line.replace('\twater\t', '\toxidane\t')
+                     .replace('2014-05-01', '2020-01-01')
+                     for line in compounds]
+        self.__publish('compounds.tsv.gz', compounds)
+
+        self.assertEqual({'compounds': 2}, self.__parser.update())
+        self.assertEqual('oxidane', self.__parser.get_name(15377))
+        self.assertEqual(2020, self.__parser.get_modified_on(15377).year)
+        self.assertIsNone(self.__parser.get_name(5585))
+        self.assertTrue(math.isnan(self.__parser.get_parent_id(5585)))
+        self.assertEqual([15377], self.__parser.get_all_ids(15377))
+
+    def test_update_relation(self):
+        '''Tests incomings are updated with outgoings.'''
+        self.__parser.get_outgoings(4167)
+
+        relations = [line for line in self.__flat_files['relation.tsv']
+                     if not line.startswith('4\t')]
+        self.__publish('relation.tsv', relations)
+
+        self.assertEqual({'relation': 1}, self.__parser.update())
+        self.assertEqual([Relation('is_a', '17634', 'C')],
+                         self.__parser.get_outgoings(4167))
+        self.assertEqual([Relation('has_role', '15377', 'C')],
+                         self.__parser.get_incomings(25212))
+
+    def test_update_replaced(self):
+        '''Tests tables are updated if their parsed file was replaced, as
+        rows are hashed when parsed.'''
+        parser = fixtures.get_parser()
+        parser.get_outgoings(4167)
+
+        relations = [line for line in self.__flat_files['relation.tsv']
+                     if not line.startswith('4\t')]
+        self.__publish('relation.tsv', relations, parser.path)
+
+        self.assertEqual({'relation': 1}, parser.update())
+        self.assertEqual([Relation('is_a', '17634', 'C')],
+                         parser.get_outgoings(4167))
+
+    def test_update_packed(self):
+        '''Tests packed tables are replaced in full.'''
+        parser = fixtures.get_parser()
+        parser.get_outgoings(4167)
+        parser.set_packed_tables(parser.get_packed_tables())
+
+        relations = [line for line in self.__flat_files['relation.tsv']
+                     if not line.startswith('4\t')]
+        self.__publish('relation.tsv', relations, parser.path)
+
+        self.assertEqual({'relation': None}, parser.update())
+        self.assertEqual([Relation('is_a', '17634', 'C')],
+                         parser.get_outgoings(4167))
+
+    def test_update_fresh(self):
+        '''Tests updated tables equal those of a fresh parse, in order.'''
+        tables = ['compounds', 'relation', 'names']
+        self.__parser.load(tables)
+
+        self.__publish('compounds.tsv.gz', [
+            line.replace('\twater\t', '\toxidane\t')
+            for line in self.__flat_files['compounds.tsv.gz']])
+        self.__publish('relation.tsv', [
+            line.replace('\thas_role\t25212\t15377', '\tis_a\t25212\t15377')
+            for line in self.__flat_files['relation.tsv']])
+        self.__publish('names.tsv.gz', self.__flat_files['names.tsv.gz'] +
+                       ['99\t15377\tSYNONYM\tChEBI\toxidane\tF\ten'])
+
+        self.assertEqual({'compounds': 1, 'relation': 1, 'names': 1},
+                         self.__parser.update())
+
+        fresh = _MirrorCache(self.__remote_dir)
+        fresh.load(tables)
+
+        for table in tables:
+            for attr in FileSystemCache._TABLES[table][3]:
+                # Compared by repr, as NaN never equals itself:
+                self.assertEqual(_repr_values(getattr(fresh, attr)),
+                                 _repr_values(getattr(self.__parser, attr)),
+                                 attr)
+
+        self.assertEqual([15377, 5585], self.__parser.get_all_ids(15377))
+        self.assertEqual(['CHEBI:15377', 'CHEBI:4167'],
+                         [relation.get_target_chebi_id() for relation
+                          in self.__parser.get_incomings(25212)])
+
+    def __publish(self, filename, lines, directory=None):
+        '''Writes a new version of a flat file.'''
+        directory = directory or self.__remote_dir
+        self.__flat_files[filename] = lines
+        fixtures.write_flat_files(directory,
+                                  {filename: self.__flat_files[filename]})
+
+        # Ensure the new version has a different mtime:
+        filepath = os.path.join(directory, filename)
+        os.utime(filepath, (time.time() + 60, time.time() + 60))
+
+
+def _repr_values(values):
+    '''Returns a dict of key to repr of value'''
+    return {key: repr(value) for key, value in values.items()}
+
+
+if __name__ == "__main__":
+    unittest.main()
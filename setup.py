@@ -27,6 +27,6 @@ setup(name='libChEBIpy',
                    'Programming Language :: Python :: 2.7'
       ],
       keywords='chemistry cheminformatics ChEBI',
-      packages=find_packages(),
+      packages=find_packages(exclude=['benchmarks', 'benchmarks.*']),
       test_suite='libchebipy.test',
       install_requires=['requests', 'six'])